@@ -0,0 +1,471 @@
+import json
+import hashlib
+import argparse
+import logging
+import multiprocessing
+from functools import partial
+from aiohttp import web
+from Config.settings import settings
+from Logging.logging import setup_logging, shutdown_logging
+from Database.Connection.ping_connection import connect_to_database, disconnect_from_database
+from Database.Cache.store_cache import store_cache
+from Database.Indexes.indexes import ensure_indexes
+from Database.Migration.status import load_migration_status
+from Database.Delete.delete_docs import delete_one_document, delete_many_documents
+from Database.Delete.criteria import parse_criteria
+from Database.InsertOne.insert_one import insert_document
+from Database.SearchOne.search_one import search_one
+from Database.SearchMany.search_many import search_many, read_ids
+from Database.SearchAll.search_all import search_page, DEFAULT_PAGE_SIZE
+from Database.Modify.modify import modify_document
+from Database.Model.store import Store, WEEKDAYS, projection
+from Database.Model.hours import parse_hours
+from Database.OpeningHours.opening_hours import stores_open_at, stores_open_during
+from User.Login.login import login_session
+from User.Session.session import verify_token
+from Metrics.metrics import metrics
+
+# Initialize a logger for the api module
+api_logger = logging.getLogger("api_logger")
+api_logger.setLevel(logging.DEBUG)
+
+log_dir = r"RS\Logging\Loggers"
+
+# Largest page a client may request from GET /stores
+MAX_PAGE_SIZE = 1000
+
+# Routes that can be called without a session token; /metrics joins them when API_PUBLIC_METRICS is set
+PUBLIC_ROUTES = ("/login", "/health")
+
+# Serialise ObjectIds and other BSON types as strings
+_dumps = partial(json.dumps, default=str)
+
+@web.middleware
+async def auth_middleware(request, handler):
+    """
+    Require a valid session token ("Authorization: Bearer <token>") on every non-public route.
+
+    Parameters:
+    - request (web.Request): The incoming request.
+    - handler: The route handler.
+
+    Returns:
+    - web.Response: The handler's response, or 401 if the token is missing or invalid.
+    """
+    if request.path in PUBLIC_ROUTES or (request.path == "/metrics" and settings.api_public_metrics):
+        return await handler(request)
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    username = verify_token(token) if scheme.lower() == "bearer" and token else None
+    if username is None:
+        return _error(401, "A valid session token is required. POST /login to get one.")
+
+    request["user"] = username
+    return await handler(request)
+
+@web.middleware
+async def error_middleware(request, handler):
+    """
+    Turn a failed database query into an error response instead of an empty result.
+
+    Parameters:
+    - request (web.Request): The incoming request.
+    - handler: The route handler.
+
+    Returns:
+    - web.Response: The handler's response, 503 if a MongoDB operation failed or 500 for
+                    any other unexpected error.
+    """
+    from pymongo.errors import PyMongoError
+
+    try:
+        return await handler(request)
+    except web.HTTPException:
+        raise
+    except PyMongoError as pe:
+        api_logger.error(f"MongoDB error on {request.method} {request.path}: {pe}")
+        return _error(503, "The database query failed; see the logs.")
+    except Exception as e:
+        api_logger.error(f"Unexpected error on {request.method} {request.path}: {e}")
+        return _error(500, "Unexpected server error; see the logs.")
+
+def create_app():
+    """
+    Build the aiohttp application.
+
+    The shared Motor client is created when the application starts, so every request
+    in a worker reuses the same connection pool, and it is closed on shutdown.
+
+    Returns:
+    - web.Application: The application.
+    """
+    app = web.Application(middlewares=[error_middleware, auth_middleware])
+    app.add_routes([
+        web.get("/health", health),
+        web.get("/metrics", prometheus_metrics),
+        web.post("/login", login),
+        web.get("/stores", list_stores),
+        web.post("/stores", create_store),
+        web.delete("/stores", delete_stores),
+        web.get("/stores/open", open_stores),
+        web.get("/stores/{store_id}", get_store),
+        web.put("/stores/{store_id}/restrictions", update_restrictions),
+        web.delete("/stores/{store_id}", delete_store),
+    ])
+    app.on_startup.append(_on_startup)
+    app.on_cleanup.append(_on_cleanup)
+    return app
+
+async def health(request):
+    """
+    GET /health: report that the worker is up.
+    """
+    return web.json_response({"status": "ok"})
+
+async def prometheus_metrics(request):
+    """
+    GET /metrics: this worker's operation statistics in the Prometheus text format.
+    """
+    return web.Response(text=metrics.to_prometheus(), content_type="text/plain")
+
+async def login(request):
+    """
+    POST /login: check {"username", "password"} and return a session token.
+    """
+    body = await _read_json(request)
+    token = await login_session(str(body.get("username", "")), str(body.get("password", "")))
+    if token is None:
+        return _error(401, "Invalid credentials.")
+    return web.json_response({"token": token, "expires_in": settings.session_ttl})
+
+async def list_stores(request):
+    """
+    GET /stores: one page of stores, or the stores with the given IDs.
+
+    Query parameters:
+    - ids: Comma separated store IDs; when given, paging parameters are ignored.
+    - page_size: The number of stores per page (default DEFAULT_PAGE_SIZE, at most MAX_PAGE_SIZE).
+    - after_id: The next_after_id of the previous page.
+    - criteria: A filter such as "tail_lift=true, km<10".
+    - fields: Comma separated store fields to return, e.g. "id,name,kilometers".
+    """
+    query = request.query
+    if "ids" in query:
+        try:
+            ids = read_ids(query["ids"])
+        except ValueError as ve:
+            return _error(400, str(ve))
+        found, missing = await search_many(ids)
+        stores = [Store.from_document(store).to_dict() for store in found.values()]
+        return _conditional(request, {"stores": stores, "missing": missing})
+
+    page_size = min(_int_param(query, "page_size", DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+    after_id = _int_param(query, "after_id", None)
+    try:
+        filter_query = parse_criteria(query["criteria"]) if query.get("criteria") else None
+        fields = projection([field.strip() for field in query["fields"].split(",") if field.strip()]) if query.get("fields") else None
+    except ValueError as ve:
+        return _error(400, str(ve))
+
+    stores, last_id = await search_page(max(1, page_size), after_id, filter_query, fields)
+    stores = [Store.from_document(store).to_dict() for store in stores]
+    return _conditional(request, {"stores": stores, "next_after_id": last_id})
+
+async def open_stores(request):
+    """
+    GET /stores/open: the stores open on a day at a time, or during part of a window.
+
+    Query parameters:
+    - day: The weekday, e.g. "Monday" or "mo".
+    - at: A time of day, e.g. "10:30"; or
+    - from, to: A window; stores open for any part of it match.
+    - criteria: A filter such as "tail_lift=true, km<10".
+    - fields: Comma separated store fields to return, e.g. "id,name".
+    """
+    query = request.query
+    try:
+        if "day" not in query or ("at" in query) == ("from" in query and "to" in query):
+            raise ValueError("Give day and either at, or from and to.")
+        filter_query = parse_criteria(query["criteria"]) if query.get("criteria") else None
+        fields = projection([field.strip() for field in query["fields"].split(",") if field.strip()]) if query.get("fields") else None
+        if "at" in query:
+            stores = await stores_open_at(query["day"], query["at"], filter_query, fields)
+        else:
+            stores = await stores_open_during(query["day"], query["from"], query["to"], filter_query, fields)
+    except ValueError as ve:
+        return _error(400, str(ve))
+    return _conditional(request, {"stores": [Store.from_document(store).to_dict() for store in stores]})
+
+async def get_store(request):
+    """
+    GET /stores/{store_id}: one store, with an ETag for conditional requests.
+    """
+    store = await search_one(_store_id(request))
+    if store is None:
+        return _error(404, "Store not found.")
+    return _conditional(request, Store.from_document(store).to_dict())
+
+async def create_store(request):
+    """
+    POST /stores: insert a store from {"id", "name", "address", "postcode", "km", "tail_lift", "restrictions"}.
+    """
+    body = await _read_json(request)
+    try:
+        store_id = int(body["id"])
+        kms = float(body["km"])
+        restrictions = _restrictions(body.get("restrictions", {}))
+        fields = {name: str(body[name]) for name in ("name", "address", "postcode")}
+    except (KeyError, TypeError, ValueError) as e:
+        return _error(400, f"Invalid store: {e}")
+    if not isinstance(body.get("tail_lift"), bool):
+        return _error(400, "tail_lift must be true or false.")
+
+    inserted_id = await insert_document(
+        id=store_id,
+        store_name=fields["name"],
+        store_address=fields["address"],
+        store_postcode=fields["postcode"],
+        kms=kms,
+        tail_lift=body["tail_lift"],
+        store_restrictions=restrictions
+    )
+    if inserted_id is None:
+        return _error(409, f"Store {store_id} already exists.")
+    return web.json_response({"inserted": inserted_id}, status=201, headers={"Location": f"/stores/{inserted_id}"})
+
+async def update_restrictions(request):
+    """
+    PUT /stores/{store_id}/restrictions: replace a store's restrictions with {"Monday": "...", ...}.
+    """
+    try:
+        restrictions = _restrictions(await _read_json(request))
+    except ValueError as ve:
+        return _error(400, str(ve))
+    store_id = _store_id(request)
+    if not await modify_document(store_id, restrictions):
+        return _error(404, "Store not found.")
+    return web.json_response({"modified": store_id})
+
+async def delete_store(request):
+    """
+    DELETE /stores/{store_id}: delete one store.
+    """
+    if not await delete_one_document(_store_id(request)):
+        return _error(404, "Store not found.")
+    return web.Response(status=204)
+
+async def delete_stores(request):
+    """
+    DELETE /stores?criteria=...[&dry_run=true]: delete, or count, the stores matching a filter.
+
+    Deleting every store is deliberately not exposed over HTTP.
+    """
+    criteria = request.query.get("criteria", "")
+    if not criteria.strip() or criteria.strip().lower() == "all":
+        return _error(400, "A criteria filter is required.")
+    try:
+        parse_criteria(criteria)
+    except ValueError as ve:
+        return _error(400, str(ve))
+
+    dry_run = request.query.get("dry_run", "false").lower() == "true"
+    count = await delete_many_documents(criteria, dry_run=dry_run)
+    if count is None:
+        return _error(500, "The delete failed; see the delete log.")
+    return web.json_response({"matched": count} if dry_run else {"deleted": count})
+
+def serve(host=None, port=None, workers=None):
+    """
+    Run the API, in several worker processes sharing the port when workers > 1.
+
+    Each worker is a separate process with its own event loop, Motor client and log
+    queue; the kernel spreads connections across them with SO_REUSEPORT. SESSION_SECRET
+    must be set for tokens issued by one worker to be accepted by the others. With more
+    than one worker the store cache is disabled, as a write in one worker cannot
+    invalidate the copies cached by the others.
+
+    Parameters:
+    - host (str): The interface to listen on. Default is None to use API_HOST.
+    - port (int): The port to listen on. Default is None to use API_PORT.
+    - workers (int): The number of worker processes. Default is None to use API_WORKERS.
+    """
+    host = host or settings.api_host
+    port = port or settings.api_port
+    workers = max(1, workers or settings.api_workers)
+
+    if workers == 1:
+        _run_worker(host, port, False)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_run_worker, args=(host, port, True), name=f"api-worker-{number}")
+        for number in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+def _run_worker(host, port, reuse_port):
+    """
+    Run one API worker until it is stopped.
+
+    Parameters:
+    - host (str): The interface to listen on.
+    - port (int): The port to listen on.
+    - reuse_port (bool): Whether to share the port with other workers.
+    """
+    setup_logging(log_dir)
+    try:
+        if reuse_port:
+            # Invalidation is process-local, so other workers would serve stale stores and ETags
+            store_cache.disable()
+        if not settings.session_secret and reuse_port:
+            api_logger.warning("SESSION_SECRET is not set; tokens will only be accepted by the worker that issued them.")
+        web.run_app(create_app(), host=host, port=port, reuse_port=reuse_port, access_log=api_logger, print=None)
+    finally:
+        shutdown_logging()
+
+async def _on_startup(app):
+    """
+    Connect the shared client, load the migration status and make sure the indexes it needs exist.
+    """
+    if await connect_to_database() is None:
+        api_logger.warning("MongoDB is not reachable; store requests will fail until it is.")
+    await ensure_indexes(legacy=await load_migration_status())
+    api_logger.info("API worker started.")
+
+async def _on_cleanup(app):
+    """
+    Close the shared client.
+    """
+    disconnect_from_database()
+    api_logger.info("API worker stopped.")
+
+def _conditional(request, data):
+    """
+    Build a JSON response with an ETag, or 304 if the client already has this version.
+
+    Parameters:
+    - request (web.Request): The request, for its If-None-Match header.
+    - data: The JSON-serialisable response body.
+
+    Returns:
+    - web.Response: 200 with the body and ETag, or 304 Not Modified.
+    """
+    body = _dumps(data)
+    etag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+    if_none_match = [value.strip() for value in request.headers.get("If-None-Match", "").split(",")]
+    if etag in if_none_match or "*" in if_none_match:
+        return web.Response(status=304, headers={"ETag": etag})
+    return web.Response(text=body, content_type="application/json", headers={"ETag": etag})
+
+def _error(status, message):
+    """
+    Build a JSON error response.
+
+    Parameters:
+    - status (int): The HTTP status.
+    - message (str): The error message.
+
+    Returns:
+    - web.Response: The response.
+    """
+    return web.json_response({"error": message}, status=status)
+
+async def _read_json(request):
+    """
+    Read a JSON object request body.
+
+    Parameters:
+    - request (web.Request): The request.
+
+    Returns:
+    - dict: The body.
+
+    Raises:
+    - web.HTTPBadRequest: If the body is not a JSON object.
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text=_dumps({"error": "The body must be a JSON object."}), content_type="application/json")
+    return body
+
+def _store_id(request):
+    """
+    Read the store ID from the URL.
+
+    Parameters:
+    - request (web.Request): The request.
+
+    Returns:
+    - int: The store ID.
+
+    Raises:
+    - web.HTTPBadRequest: If the ID is not a number.
+    """
+    try:
+        return int(request.match_info["store_id"])
+    except ValueError:
+        raise web.HTTPBadRequest(text=_dumps({"error": "Store IDs are numbers."}), content_type="application/json")
+
+def _int_param(query, name, default):
+    """
+    Read an integer query parameter.
+
+    Parameters:
+    - query: The request's query parameters.
+    - name (str): The parameter name.
+    - default: The value when the parameter is absent.
+
+    Returns:
+    - int: The value.
+
+    Raises:
+    - web.HTTPBadRequest: If the value is not a number.
+    """
+    if name not in query:
+        return default
+    try:
+        return int(query[name])
+    except ValueError:
+        raise web.HTTPBadRequest(text=_dumps({"error": f"{name} must be a number."}), content_type="application/json")
+
+def _restrictions(values):
+    """
+    Build a store restrictions dict from a {"Monday": "09:00 AM - 05:00 PM", ...} object.
+
+    Parameters:
+    - values (dict): Opening hours per day.
+
+    Returns:
+    - dict: Opening hours for every weekday, empty for the days not given.
+
+    Raises:
+    - ValueError: If a key is not a weekday or its hours cannot be read.
+    """
+    if not isinstance(values, dict):
+        raise ValueError("restrictions must be an object of weekday to opening hours.")
+    restrictions = {day: "" for day in WEEKDAYS}
+    for day, hours in values.items():
+        if day.capitalize() not in WEEKDAYS:
+            raise ValueError(f"'{day}' is not a weekday.")
+        parse_hours(str(hours))
+        restrictions[day.capitalize()] = str(hours)
+    return restrictions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Route Solutions HTTP API.")
+    parser.add_argument("--host", help=f"Interface to listen on (default API_HOST, {settings.api_host}).")
+    parser.add_argument("--port", type=int, help=f"Port to listen on (default API_PORT, {settings.api_port}).")
+    parser.add_argument("--workers", type=int, help=f"Worker processes (default API_WORKERS, {settings.api_workers}).")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
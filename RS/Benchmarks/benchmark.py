@@ -0,0 +1,383 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from urllib.parse import urlparse
+
+# Directory holding main.py; the application modules are imported relative to it
+RS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Where results are written when no --output is given
+RESULTS_DIR = os.path.join(RS_DIR, "Benchmarks", "results")
+
+DEFAULT_URI = "mongodb://localhost:27017"
+DEFAULT_IMPORT_SIZES = (1000, 10000, 100000)
+DEFAULT_LOOKUPS = 1000
+DEFAULT_WRITES = 500
+
+# Columns of the generated import files, as insert_documents expects them
+IMPORT_COLUMNS = ["ID", "Store Name", "Store Address", "Store Postcode", "Kilometers", "Tail Lift"]
+
+def _percentile(samples, fraction):
+    """
+    Return a percentile of a list of samples.
+
+    Args:
+    - samples (list): The measured values.
+    - fraction (float): The percentile as a fraction, e.g. 0.99.
+
+    Returns:
+    - float: The value at that percentile.
+    """
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+def _store_row(store_id):
+    """
+    Build one synthetic row of a store import file.
+
+    Args:
+    - store_id (int): The store ID.
+
+    Returns:
+    - list: Values in IMPORT_COLUMNS order.
+    """
+    return [store_id, f"Store {store_id}", f"{store_id} High Street", f"AB{store_id % 100} {store_id % 10}CD",
+            round(random.uniform(1, 300), 1), store_id % 3 == 0]
+
+def write_import_file(directory, rows, file_format="xlsx"):
+    """
+    Write a synthetic store import file.
+
+    Args:
+    - directory (str): The directory to write to.
+    - rows (int): The number of stores.
+    - file_format (str): 'xlsx' or 'csv'.
+
+    Returns:
+    - str: The path of the file.
+    """
+    file_path = os.path.join(directory, f"stores_{rows}.{file_format}")
+    if file_format == "csv":
+        import csv
+        with open(file_path, "w", newline="", encoding="utf-8") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(IMPORT_COLUMNS)
+            writer.writerows(_store_row(store_id) for store_id in range(1, rows + 1))
+    else:
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        worksheet.append(IMPORT_COLUMNS)
+        for store_id in range(1, rows + 1):
+            worksheet.append(_store_row(store_id))
+        workbook.save(file_path)
+    return file_path
+
+async def _clear_stores():
+    """
+    Remove every document from the benchmark's Stores collection and empty the store cache.
+    """
+    from Database.Cache.store_cache import store_cache
+    from Database.Connection.client import get_client
+
+    await get_client()["StoreInformation"]["Stores"].delete_many({})
+    store_cache.clear()
+
+async def bench_import(sizes, file_format, work_dir):
+    """
+    Measure insert_documents throughput for each import size.
+
+    Args:
+    - sizes (list): Row counts to import.
+    - file_format (str): 'xlsx' or 'csv'.
+    - work_dir (str): Where to write the generated files.
+
+    Returns:
+    - dict: rows/sec, elapsed seconds and inserted count per size.
+    """
+    from Database.InsertMany.insert_many import insert_documents
+
+    results = {}
+    for rows in sizes:
+        file_path = write_import_file(work_dir, rows, file_format)
+        await _clear_stores()
+
+        started = time.perf_counter()
+        report = await insert_documents(file_path)
+        elapsed = time.perf_counter() - started
+
+        results[str(rows)] = {
+            "seconds": elapsed,
+            "rows_per_second": rows / elapsed,
+            "inserted": len(report.inserted)
+        }
+        print(f"import {rows:>7} rows ({file_format}): {rows / elapsed:10.0f} rows/s")
+    return results
+
+async def bench_search_one(store_count, lookups):
+    """
+    Measure search_one latency for random IDs, with the cache cold and warm.
+
+    Args:
+    - store_count (int): The number of stores in the collection.
+    - lookups (int): The number of lookups per scenario.
+
+    Returns:
+    - dict: p50/p99/mean latency in milliseconds per scenario.
+    """
+    from Database.Cache.store_cache import store_cache
+    from Database.SearchOne.search_one import search_one
+
+    ids = [random.randint(1, store_count) for _ in range(lookups)]
+    results = {}
+    for scenario in ("cold", "warm"):
+        samples = []
+        for store_id in ids:
+            if scenario == "cold":
+                store_cache.clear()
+            started = time.perf_counter()
+            await search_one(store_id)
+            samples.append((time.perf_counter() - started) * 1000)
+
+        results[scenario] = {
+            "p50_ms": _percentile(samples, 0.50),
+            "p99_ms": _percentile(samples, 0.99),
+            "mean_ms": sum(samples) / len(samples)
+        }
+        print(f"search_one ({scenario}): p50 {results[scenario]['p50_ms']:.3f} ms, p99 {results[scenario]['p99_ms']:.3f} ms")
+    return results
+
+async def bench_search_all():
+    """
+    Measure the time and peak Python memory of search_all and of streaming with iter_stores.
+
+    Returns:
+    - dict: Seconds, documents and peak memory in MiB for each approach.
+    """
+    from Database.SearchAll.search_all import search_all, iter_stores
+
+    results = {}
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    documents = await search_all() or []
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results["search_all"] = {"seconds": elapsed, "documents": len(documents), "peak_mib": peak / 2 ** 20}
+    del documents
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = 0
+    async for _ in iter_stores(batch_size=1000):
+        count += 1
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results["iter_stores"] = {"seconds": elapsed, "documents": count, "peak_mib": peak / 2 ** 20}
+
+    for name, result in results.items():
+        print(f"{name}: {result['documents']} documents in {result['seconds']:.3f} s, peak {result['peak_mib']:.1f} MiB")
+    return results
+
+async def bench_modify(store_count, writes, work_dir):
+    """
+    Measure modify_document and bulk modify_documents throughput.
+
+    Args:
+    - store_count (int): The number of stores in the collection.
+    - writes (int): The number of stores to modify.
+    - work_dir (str): Where to write the restrictions file.
+
+    Returns:
+    - dict: Operations per second for each path.
+    """
+    import csv
+    from Database.Modify.modify import modify_document, modify_documents, WEEKDAYS
+
+    ids = random.sample(range(1, store_count + 1), min(writes, store_count))
+    restrictions = {day: "09:00 AM - 05:00 PM" for day in WEEKDAYS}
+
+    started = time.perf_counter()
+    for store_id in ids:
+        await modify_document(store_id, restrictions)
+    single = len(ids) / (time.perf_counter() - started)
+
+    file_path = os.path.join(work_dir, "restrictions.csv")
+    with open(file_path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["ID", *WEEKDAYS])
+        writer.writerows([store_id, *(["08:00 AM - 04:00 PM"] * len(WEEKDAYS))] for store_id in ids)
+
+    started = time.perf_counter()
+    await modify_documents(file_path)
+    bulk = len(ids) / (time.perf_counter() - started)
+
+    print(f"modify: {single:.0f} stores/s one at a time, {bulk:.0f} stores/s bulk")
+    return {"single_per_second": single, "bulk_per_second": bulk}
+
+async def bench_delete(store_count, writes):
+    """
+    Measure delete_one_document and batched delete_documents_by_ids throughput.
+
+    Args:
+    - store_count (int): The number of stores in the collection.
+    - writes (int): The number of stores to delete with each path.
+
+    Returns:
+    - dict: Deletes per second for each path.
+    """
+    from Database.Delete.delete_docs import delete_one_document, delete_documents_by_ids
+
+    ids = random.sample(range(1, store_count + 1), min(2 * writes, store_count))
+    single_ids, batch_ids = ids[:len(ids) // 2], ids[len(ids) // 2:]
+
+    started = time.perf_counter()
+    for store_id in single_ids:
+        await delete_one_document(store_id)
+    single = len(single_ids) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await delete_documents_by_ids(batch_ids)
+    batched = len(batch_ids) / (time.perf_counter() - started)
+
+    print(f"delete: {single:.0f} stores/s one at a time, {batched:.0f} stores/s batched")
+    return {"single_per_second": single, "batched_per_second": batched}
+
+async def bench_startup():
+    """
+    Measure CLI import time and the time to connect to the database.
+
+    Returns:
+    - dict: Import and connect times in milliseconds.
+    """
+    sys.path.insert(0, os.path.join(RS_DIR, "Benchmarks"))
+    from import_time import measure_import_time
+    from Database.Connection.ping_connection import connect_to_database
+
+    import_ms, _, _ = measure_import_time(runs=3)
+    connect_ms = await connect_to_database(fast_start=True)
+    if connect_ms is None:
+        raise RuntimeError("Could not connect to MongoDB; see the connection log.")
+    print(f"startup: import {import_ms:.1f} ms, connect {connect_ms:.1f} ms")
+    return {"import_ms": import_ms, "connect_ms": connect_ms}
+
+async def run_benchmarks(args):
+    """
+    Run every benchmark against the configured server.
+
+    Args:
+    - args (argparse.Namespace): The parsed command line.
+
+    Returns:
+    - dict: The results of every benchmark.
+    """
+    from Database.Connection.ping_connection import disconnect_from_database
+
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results["startup"] = await bench_startup()
+            results["import"] = await bench_import(args.sizes, args.format, work_dir)
+            store_count = args.sizes[-1]
+            results["search_one"] = await bench_search_one(store_count, args.lookups)
+            results["search_all"] = await bench_search_all()
+            results["modify"] = await bench_modify(store_count, args.writes, work_dir)
+            results["delete"] = await bench_delete(store_count, args.writes)
+            await _clear_stores()
+    finally:
+        disconnect_from_database()
+    return results
+
+def compare(baseline_path, current_path):
+    """
+    Print the relative change of every numeric result between two result files.
+
+    Args:
+    - baseline_path (str): The earlier result file.
+    - current_path (str): The later result file.
+    """
+    with open(baseline_path, encoding="utf-8") as baseline_file, open(current_path, encoding="utf-8") as current_file:
+        baseline, current = json.load(baseline_file), json.load(current_file)
+    print(f"{baseline.get('commit', '?')[:10]} -> {current.get('commit', '?')[:10]}")
+
+    def walk(before, after, path):
+        for key, value in after.items():
+            if isinstance(value, dict):
+                walk(before.get(key, {}), value, f"{path}{key}.")
+            elif isinstance(value, (int, float)) and isinstance(before.get(key), (int, float)) and before[key]:
+                change = (value - before[key]) / before[key] * 100
+                print(f"  {path}{key:<30} {before[key]:>14.3f} {value:>14.3f} {change:>+8.1f}%")
+
+    walk(baseline["results"], current["results"], "")
+
+def _git_commit():
+    """
+    Return the current git commit, or 'unknown' outside a git checkout.
+
+    Returns:
+    - str: The commit hash.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=RS_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main():
+    """
+    Run the data-access benchmarks and store the results as JSON, or compare two result files.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the Route Solutions data-access layer against a local mongod.")
+    parser.add_argument("--uri", default=os.getenv("BENCHMARK_MONGO_URI", DEFAULT_URI),
+                        help="MongoDB server to benchmark against. Its StoreInformation.Stores collection is emptied.")
+    parser.add_argument("--allow-remote", action="store_true", help="Allow a server other than localhost.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_IMPORT_SIZES), help="Import sizes in rows.")
+    parser.add_argument("--format", choices=("xlsx", "csv"), default="xlsx", help="Import file format.")
+    parser.add_argument("--lookups", type=int, default=DEFAULT_LOOKUPS, help="search_one lookups per scenario.")
+    parser.add_argument("--writes", type=int, default=DEFAULT_WRITES, help="Stores modified and deleted per path.")
+    parser.add_argument("--output", help="Result file. Default is Benchmarks/results/<commit>-<time>.json.")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two result files and exit.")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    host = urlparse(args.uri).hostname
+    if host not in ("localhost", "127.0.0.1", "::1") and not args.allow_remote:
+        parser.error(f"refusing to benchmark against '{host}', which would empty its Stores collection; pass --allow-remote to override")
+
+    # Point the application at the benchmark server before its settings are loaded
+    os.environ["MONGO_CONNECTION_STRING"] = args.uri
+    os.chdir(RS_DIR)
+    sys.path.insert(0, RS_DIR)
+
+    args.sizes = sorted(args.sizes)
+    results = asyncio.run(run_benchmarks(args))
+
+    commit = _git_commit()
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit[:10]}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as output_file:
+        json.dump({
+            "commit": commit,
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {"sizes": args.sizes, "format": args.format, "lookups": args.lookups, "writes": args.writes},
+            "results": results
+        }, output_file, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import os
+import sys
+import argparse
+import subprocess
+
+# Directory holding main.py, which must be the working directory for the application's imports
+RS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default budget for importing main.py, in milliseconds
+DEFAULT_BUDGET_MS = 1000.0
+
+# Heavy dependencies that must only be imported when an operation needs them
+LAZY_MODULES = ("pandas", "numpy", "openpyxl", "pyarrow", "bcrypt", "motor", "pymongo", "bson")
+
+def measure_import_time(module="main", runs=5):
+    """
+    Measure how long importing a module takes, using python -X importtime in a fresh process.
+
+    Args:
+    - module (str): The module to import, relative to the RS directory.
+    - runs (int): The number of runs; the fastest is reported to reduce noise.
+
+    Returns:
+    - tuple: (cumulative import time in milliseconds, set of top-level packages imported,
+              list of (milliseconds, package) for the slowest imports).
+    """
+    best = None
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=RS_DIR, capture_output=True, text=True, check=True
+        )
+        timings = _parse_importtime(completed.stderr)
+        if best is None or timings[module] < best[module]:
+            best = timings
+
+    packages = {name.split(".")[0] for name in best}
+    slowest = sorted(((us / 1000, name) for name, us in best.items() if "." not in name), reverse=True)[:10]
+    return best[module] / 1000, packages, slowest
+
+def import_failures(elapsed_ms, packages, budget_ms):
+    """
+    List the ways an import measured by measure_import_time() breaks the startup budget.
+
+    Args:
+    - elapsed_ms (float): The cumulative import time in milliseconds.
+    - packages (set): The top-level packages imported.
+    - budget_ms (float): The allowed import time in milliseconds.
+
+    Returns:
+    - list: One message per failure; empty if the import is within budget and lazy.
+    """
+    failures = []
+    if elapsed_ms > budget_ms:
+        failures.append(f"import time {elapsed_ms:.1f} ms exceeds the {budget_ms:.1f} ms budget")
+    eager = sorted(packages.intersection(LAZY_MODULES))
+    if eager:
+        failures.append(f"heavy dependencies imported at startup: {', '.join(eager)}")
+    return failures
+
+def budget_from_env():
+    """
+    Return the import time budget, from IMPORT_TIME_BUDGET_MS or DEFAULT_BUDGET_MS.
+
+    Returns:
+    - float: The budget in milliseconds.
+    """
+    return float(os.getenv("IMPORT_TIME_BUDGET_MS", DEFAULT_BUDGET_MS))
+
+def _parse_importtime(output):
+    """
+    Parse python -X importtime output into cumulative microseconds per module.
+
+    Args:
+    - output (str): The stderr of the importing process.
+
+    Returns:
+    - dict: Cumulative import time in microseconds keyed by module name.
+    """
+    timings = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+def main():
+    """
+    Check that importing main.py stays within budget and does not pull in heavy dependencies.
+
+    Exits with status 1 if the budget is exceeded or a lazily loaded dependency is imported.
+    """
+    parser = argparse.ArgumentParser(description="Check the import time of the Route Solutions CLI.")
+    parser.add_argument("--budget-ms", type=float, default=budget_from_env())
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    elapsed_ms, packages, slowest = measure_import_time(runs=args.runs)
+    print(f"import main: {elapsed_ms:.1f} ms (budget {args.budget_ms:.1f} ms)")
+    for ms, name in slowest:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    failures = import_failures(elapsed_ms, packages, args.budget_ms)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
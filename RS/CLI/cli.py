@@ -0,0 +1,548 @@
+import os
+import sys
+import json
+import shlex
+import asyncio
+import getpass
+import argparse
+import logging
+from dataclasses import asdict
+from Database.Connection.ping_connection import connect_to_database, disconnect_from_database
+from Database.Migration.status import load_migration_status
+from Database.Delete.delete_docs import delete_many_documents, delete_documents_by_ids
+from Database.Delete.criteria import parse_criteria
+from Database.InsertOne.insert_one import insert_document
+from Database.InsertMany.insert_many import insert_documents, sync_documents, DEFAULT_BATCH_SIZE
+from Database.SearchMany.search_many import search_many, read_ids
+from Database.SearchAll.search_all import iter_stores
+from Database.Modify.modify import modify_document, modify_documents, WEEKDAYS
+from Database.Export.export import export_documents, EXPORT_COLUMNS
+from Database.Migration.migrate_stores import migrate_stores, DEFAULT_BATCH_SIZE as MIGRATION_BATCH_SIZE
+from Database.Model.store import Store, ATTRIBUTE_FIELDS, projection
+from Database.Model.hours import parse_hours
+from Database.OpeningHours.opening_hours import stores_open_at, stores_open_during
+from User.Login.login import login_session, resume_session
+from User.Session.session import clear_token
+
+# Share the connection module's logger so command failures land next to connection events
+connection_logger = logging.getLogger("connection_logger")
+
+# Output formats: one JSON document for the whole run, or one JSON object per line
+OUTPUT_FORMATS = ("ndjson", "json")
+
+# Number of batch file commands in flight at once
+DEFAULT_CONCURRENCY = 16
+
+# Subcommands that cannot appear inside a batch file
+_NOT_BATCHABLE = ("batch", "login", "logout", "migrate")
+
+class CommandError(Exception):
+    """
+    Raised by a subcommand when its operation did not succeed.
+    """
+
+def build_parser():
+    """
+    Build the argument parser for the non-interactive command line.
+
+    Returns:
+    - argparse.ArgumentParser: The parser, with one subparser per command.
+    """
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Route Solutions command line. Run without arguments for the interactive menu."
+    )
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="ndjson",
+                        help="Write one JSON object per line (default) or a single JSON array.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    login = commands.add_parser("login", help="Log in and store a session token for later commands.")
+    login.add_argument("--username", required=True)
+    login.add_argument("--password-stdin", action="store_true",
+                       help="Read the password from standard input instead of prompting.")
+
+    commands.add_parser("logout", help="Delete the stored session token.")
+
+    insert = commands.add_parser("insert", help="Insert one store.")
+    insert.add_argument("id", type=int)
+    insert.add_argument("--name", required=True)
+    insert.add_argument("--address", required=True)
+    insert.add_argument("--postcode", required=True)
+    insert.add_argument("--km", type=float, required=True)
+    insert.add_argument("--tail-lift", choices=("true", "false"), required=True)
+    insert.add_argument("--restriction", action="append", default=[], metavar="DAY=HOURS",
+                        help="Opening hours for one day, e.g. 'Monday=09:00 AM - 05:00 PM'. Repeat per day.")
+
+    import_parser = commands.add_parser("import", help="Insert or sync many stores from an Excel, CSV or Parquet file.")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--sync", action="store_true", help="Write only new and changed stores.")
+    import_parser.add_argument("--delete-missing", action="store_true",
+                               help="With --sync, delete stores that are not in the file.")
+    import_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    search = commands.add_parser("search", help="Search for stores by ID.")
+    search.add_argument("ids", nargs="+", help="Store IDs, or the path to a file of IDs.")
+
+    search_all = commands.add_parser("search-all", help="Stream every store, optionally filtered.")
+    search_all.add_argument("--criteria", help="Filter, e.g. 'tail_lift=true, km<10'.")
+    search_all.add_argument("--fields", help=f"Comma separated fields to return ({', '.join(ATTRIBUTE_FIELDS)}, or weekday names).")
+    search_all.add_argument("--limit", type=int, default=0)
+
+    open_parser = commands.add_parser("open", help="Find the stores open on a day at a time, or during part of a window.")
+    open_parser.add_argument("day", help="Weekday, e.g. Monday or mo.")
+    when = open_parser.add_mutually_exclusive_group(required=True)
+    when.add_argument("--at", help="Time of day, e.g. 10:30 or 10:30 AM.")
+    when.add_argument("--between", nargs=2, metavar=("START", "END"),
+                      help="Window; stores open for any part of it match. An END before START runs past midnight.")
+    open_parser.add_argument("--criteria", help="Filter, e.g. 'tail_lift=true, km<10'.")
+    open_parser.add_argument("--fields", help=f"Comma separated fields to return ({', '.join(ATTRIBUTE_FIELDS)}, or weekday names).")
+
+    modify = commands.add_parser("modify", help="Replace one store's restrictions, or update many from a file.")
+    target = modify.add_mutually_exclusive_group(required=True)
+    target.add_argument("--id", type=int)
+    target.add_argument("--file", help="Spreadsheet with an 'ID' column and a column per weekday.")
+    modify.add_argument("--restriction", action="append", default=[], metavar="DAY=HOURS",
+                        help="Opening hours for one day. Days not given are cleared.")
+
+    export = commands.add_parser("export", help="Export stores to a CSV, Excel or Parquet file that can be imported again.")
+    export.add_argument("file")
+    export.add_argument("--criteria", help="Filter, e.g. 'tail_lift=true, km<10'.")
+    export.add_argument("--columns", help=f"Comma separated columns (default all: {', '.join(EXPORT_COLUMNS)}).")
+
+    migrate = commands.add_parser("migrate", help="Convert stores to the compact layout and add their opening windows.")
+    migrate.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE,
+                         help=f"Stores rewritten per bulk write (default {MIGRATION_BATCH_SIZE}).")
+    migrate.add_argument("--keep-legacy-indexes", action="store_true",
+                         help="Do not drop the indexes on the long field names afterwards.")
+
+    delete = commands.add_parser("delete", help="Delete stores by ID, ID list, criteria or all.")
+    target = delete.add_mutually_exclusive_group(required=True)
+    target.add_argument("--id", type=int)
+    target.add_argument("--ids", help="Comma separated IDs, or the path to a file of IDs.")
+    target.add_argument("--criteria", help="Filter, e.g. 'tail_lift=true, km<10'.")
+    target.add_argument("--all", action="store_true")
+    delete.add_argument("--dry-run", action="store_true", help="Only count the matching stores.")
+    delete.add_argument("--yes", action="store_true", help="Confirm deleting all stores.")
+
+    batch = commands.add_parser("batch", help="Run a file of commands, one per line, concurrently.")
+    batch.add_argument("file", help="File of commands; blank lines and lines starting with '#' are ignored.")
+    batch.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                       help=f"Maximum number of commands in flight (default {DEFAULT_CONCURRENCY}).")
+
+    return parser
+
+async def run_cli(argv):
+    """
+    Run one command from the command line and write its results to standard output.
+
+    Every command except login and logout needs a session from a previous login. The
+    database connection is opened once and shared by every operation of the run.
+
+    Parameters:
+    - argv (list): The command line arguments, without the program name.
+
+    Returns:
+    - int: The process exit code: 0 on success, 1 if the command failed or MongoDB could not
+           be reached, 2 if not logged in.
+    """
+    from pymongo.errors import PyMongoError
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "logout":
+        clear_token()
+        _write([{"logged_out": True}], args.format)
+        return 0
+
+    if args.command != "login" and resume_session() is None:
+        _write([{"error": "Not logged in. Run the 'login' command first."}], args.format)
+        return 2
+
+    if await connect_to_database() is None:
+        disconnect_from_database()
+        _write([{"error": "Could not connect to MongoDB; see the connection log."}], args.format)
+        return 1
+    try:
+        await load_migration_status()
+        if args.command == "batch":
+            return await run_batch(parser, args.file, args.concurrency, args.format)
+
+        try:
+            await _write_stream(_dispatch(args), args.format)
+            return 0
+        except CommandError as ce:
+            _write([{"error": str(ce)}], args.format)
+            return 1
+        except PyMongoError as pe:
+            # A failed query is an error, not an empty result
+            _write([{"error": f"MongoDB error: {pe}"}], args.format)
+            return 1
+    finally:
+        disconnect_from_database()
+
+async def run_batch(parser, file_path, concurrency=DEFAULT_CONCURRENCY, output_format="ndjson"):
+    """
+    Run a file of commands concurrently over the shared connection.
+
+    Each non-blank line is a command as it would be given on the command line, e.g.
+    "search 101 102" or "delete --id 7". At most concurrency commands run at once. With
+    NDJSON output each command's result is written as soon as it finishes, tagged with its
+    line number; with JSON output the results are written in file order at the end.
+
+    Parameters:
+    - parser (argparse.ArgumentParser): The parser from build_parser().
+    - file_path (str): The path to the command file.
+    - concurrency (int): The maximum number of commands in flight.
+    - output_format (str): "ndjson" or "json".
+
+    Returns:
+    - int: 0 if every command succeeded, 1 otherwise.
+    """
+    with open(file_path, encoding="utf-8") as command_file:
+        lines = [(number, line.strip()) for number, line in enumerate(command_file, start=1)
+                 if line.strip() and not line.lstrip().startswith("#")]
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_line(number, line):
+        async with semaphore:
+            result = {"line": number, "command": line}
+            try:
+                args = _parse_batch_line(parser, line)
+                result["results"] = [record async for record in _dispatch(args)]
+                result["ok"] = True
+            except CommandError as ce:
+                result["ok"] = False
+                result["error"] = str(ce)
+            except Exception as e:
+                connection_logger.error(f"Batch line {number} failed: {e}")
+                result["ok"] = False
+                result["error"] = f"Unexpected error: {e}"
+            return result
+
+    tasks = [asyncio.create_task(run_line(number, line)) for number, line in lines]
+    results = []
+    for finished in asyncio.as_completed(tasks):
+        result = await finished
+        results.append(result)
+        if output_format == "ndjson":
+            _write([result], output_format)
+
+    if output_format == "json":
+        _write(sorted(results, key=lambda result: result["line"]), output_format)
+
+    failed = sum(1 for result in results if not result["ok"])
+    connection_logger.info(f"Batch {file_path} finished: {len(results) - failed} succeeded, {failed} failed.")
+    return 1 if failed else 0
+
+def _parse_batch_line(parser, line):
+    """
+    Parse one line of a batch file.
+
+    Parameters:
+    - parser (argparse.ArgumentParser): The parser from build_parser().
+    - line (str): The command line.
+
+    Returns:
+    - argparse.Namespace: The parsed arguments.
+
+    Raises:
+    - CommandError: If the line is not a valid command or cannot run in a batch.
+    """
+    try:
+        args = parser.parse_args(shlex.split(line))
+    except (SystemExit, ValueError):
+        raise CommandError(f"Invalid command: {line}")
+    if args.command in _NOT_BATCHABLE:
+        raise CommandError(f"'{args.command}' cannot be used in a batch file.")
+    return args
+
+async def _dispatch(args):
+    """
+    Run a parsed command and yield its result records.
+
+    Parameters:
+    - args (argparse.Namespace): The parsed arguments.
+
+    Yields:
+    - dict: Each result record.
+
+    Raises:
+    - CommandError: If the operation did not succeed.
+    """
+    handler = _HANDLERS[args.command]
+    async for record in handler(args):
+        yield record
+
+async def _login(args):
+    """
+    Log in and store the session token.
+    """
+    password = sys.stdin.readline().rstrip("\n") if args.password_stdin else getpass.getpass("Password: ")
+    if await login_session(args.username, password, remember=True) is None:
+        raise CommandError("Invalid credentials.")
+    yield {"logged_in": args.username}
+
+async def _insert(args):
+    """
+    Insert one store.
+    """
+    store_id = await insert_document(
+        id=args.id,
+        store_name=args.name,
+        store_address=args.address,
+        store_postcode=args.postcode,
+        kms=args.km,
+        tail_lift=args.tail_lift == "true",
+        store_restrictions=_parse_restrictions(args.restriction)
+    )
+    if store_id is None:
+        raise CommandError(f"Store {args.id} was not inserted; see the insert_one log.")
+    yield {"inserted": store_id}
+
+async def _import(args):
+    """
+    Insert or sync many stores from a file and yield the report.
+
+    Fails if the file is missing, the import stopped part way, or any row was invalid
+    or rejected; the rows are listed in the insert_many log.
+    """
+    from pymongo.errors import PyMongoError
+
+    if not os.path.isfile(args.file):
+        raise CommandError(f"No such file: '{args.file}'")
+    if args.sync:
+        try:
+            report = await sync_documents(args.file, batch_size=args.batch_size, delete_missing=args.delete_missing)
+        except (ValueError, OSError, PyMongoError) as e:
+            raise CommandError(f"Sync failed: {e}")
+    else:
+        report = await insert_documents(args.file, batch_size=args.batch_size)
+        if report.error:
+            raise CommandError(f"Import failed: {report.error} ({report.summary()})")
+        if report.failed:
+            raise CommandError(f"Import finished with rejected rows: {report.summary()}")
+    if report.invalid:
+        raise CommandError(f"Import finished with invalid rows: {report.summary()}")
+    yield {"summary": report.summary(), **asdict(report)}
+
+async def _search(args):
+    """
+    Yield the stores with the given IDs, then any IDs that were not found.
+    """
+    ids = _read_ids(" ".join(args.ids))
+    found, missing = await search_many(ids)
+    for store in found.values():
+        yield Store.from_document(store).to_dict()
+    if missing:
+        yield {"missing": missing}
+
+async def _search_all(args):
+    """
+    Stream the matching stores straight from the cursor.
+    """
+    filter_query = _parse_filter(args.criteria) if args.criteria else None
+    fields = None
+    if args.fields:
+        try:
+            fields = projection([field.strip() for field in args.fields.split(",") if field.strip()])
+        except ValueError as ve:
+            raise CommandError(str(ve))
+    async for store in iter_stores(filter_query, fields, limit=args.limit):
+        yield Store.from_document(store).to_dict()
+
+async def _open(args):
+    """
+    Yield the stores open on a day at a time, or during part of a window.
+    """
+    filter_query = _parse_filter(args.criteria) if args.criteria else None
+    try:
+        fields = projection([field.strip() for field in args.fields.split(",") if field.strip()]) if args.fields else None
+        if args.at:
+            stores = await stores_open_at(args.day, args.at, filter_query, fields)
+        else:
+            stores = await stores_open_during(args.day, *args.between, filter_query, fields)
+    except ValueError as ve:
+        raise CommandError(str(ve))
+    for store in stores:
+        yield Store.from_document(store).to_dict()
+
+async def _modify(args):
+    """
+    Replace one store's restrictions, or update many from a file and yield the report.
+    """
+    if args.file:
+        if not os.path.isfile(args.file):
+            raise CommandError(f"No such file: '{args.file}'")
+        report = await modify_documents(args.file)
+        if report.error:
+            raise CommandError(f"Update failed: {report.error} ({report.summary()})")
+        if report.invalid:
+            raise CommandError(f"Update finished with invalid or rejected rows: {report.summary()}")
+        yield {"summary": report.summary(), **asdict(report)}
+        return
+
+    if not await modify_document(args.id, _parse_restrictions(args.restriction)):
+        raise CommandError(f"No store was modified with ID: {args.id}")
+    yield {"modified": args.id}
+
+async def _export(args):
+    """
+    Stream the matching stores to a file and yield the count.
+    """
+    from pymongo.errors import PyMongoError
+
+    filter_query = _parse_filter(args.criteria) if args.criteria else None
+    columns = [column.strip() for column in args.columns.split(",") if column.strip()] if args.columns else None
+    try:
+        exported = await export_documents(args.file, filter_query, columns)
+    except ValueError as ve:
+        raise CommandError(str(ve))
+    except (OSError, PyMongoError) as e:
+        raise CommandError(f"Export failed: {e}")
+    yield {"exported": exported, "file": args.file}
+
+async def _migrate(args):
+    """
+    Migrate the legacy store documents and yield the report.
+    """
+    report = await migrate_stores(args.batch_size, drop_legacy=not args.keep_legacy_indexes)
+    if report.remaining != 0:
+        raise CommandError(f"Migration incomplete: {report.summary()}")
+    yield {"summary": report.summary(), **asdict(report)}
+
+async def _delete(args):
+    """
+    Delete, or with --dry-run count, stores by ID, ID list, criteria or all.
+    """
+    from pymongo.errors import PyMongoError
+
+    if args.id is not None or args.ids:
+        ids = [args.id] if args.id is not None else _read_ids(args.ids)
+        if args.dry_run:
+            found, _ = await search_many(ids)
+            yield {"matched": len(found)}
+            return
+        try:
+            deleted = await delete_documents_by_ids(ids)
+        except PyMongoError as pe:
+            raise CommandError(f"The delete failed part way; see the delete log: {pe}")
+        yield {"deleted": deleted}
+        return
+
+    if args.all and not (args.yes or args.dry_run):
+        raise CommandError("Deleting all stores needs --yes.")
+    criteria = "all" if args.all else args.criteria
+    if not args.all:
+        _parse_filter(criteria)
+
+    count = await delete_many_documents(criteria, dry_run=args.dry_run, confirmed=True)
+    if count is None:
+        raise CommandError("The delete failed; see the delete log.")
+    yield {"matched": count} if args.dry_run else {"deleted": count}
+
+_HANDLERS = {
+    "login": _login,
+    "insert": _insert,
+    "import": _import,
+    "search": _search,
+    "search-all": _search_all,
+    "open": _open,
+    "modify": _modify,
+    "export": _export,
+    "migrate": _migrate,
+    "delete": _delete,
+}
+
+def _parse_restrictions(values):
+    """
+    Build a store restrictions dict from DAY=HOURS arguments.
+
+    Parameters:
+    - values (list): Strings such as "Monday=09:00 AM - 05:00 PM".
+
+    Returns:
+    - dict: Opening hours for every weekday, empty for the days not given.
+
+    Raises:
+    - CommandError: If a value is not DAY=HOURS, the day is not a weekday or the hours
+                    cannot be read.
+    """
+    restrictions = {day: "" for day in WEEKDAYS}
+    for value in values:
+        day, separator, hours = value.partition("=")
+        day = day.strip().capitalize()
+        if not separator or day not in WEEKDAYS:
+            raise CommandError(f"Invalid restriction '{value}'; expected DAY=HOURS, e.g. Monday=09:00 AM - 05:00 PM.")
+        try:
+            parse_hours(hours)
+        except ValueError as ve:
+            raise CommandError(f"{day}: {ve}")
+        restrictions[day] = hours.strip()
+    return restrictions
+
+def _read_ids(value):
+    """
+    Read store IDs from a list or file, turning bad IDs into command errors.
+
+    Parameters:
+    - value (str): IDs such as "101, 102 103" or the path to a file of IDs.
+
+    Returns:
+    - list: The IDs.
+
+    Raises:
+    - CommandError: If an ID is not a number or the file cannot be read.
+    """
+    try:
+        return read_ids(value)
+    except (OSError, ValueError) as e:
+        raise CommandError(str(e))
+
+def _parse_filter(criteria):
+    """
+    Compile a criteria string, turning parse errors into command errors.
+
+    Parameters:
+    - criteria (str): The criteria string.
+
+    Returns:
+    - dict: The MongoDB filter.
+
+    Raises:
+    - CommandError: If the criteria cannot be parsed.
+    """
+    try:
+        return parse_criteria(criteria)
+    except ValueError as ve:
+        raise CommandError(str(ve))
+
+async def _write_stream(records, output_format):
+    """
+    Write the records of an async iterator as they arrive (NDJSON) or all at once (JSON).
+
+    Parameters:
+    - records: An async iterator of dicts.
+    - output_format (str): "ndjson" or "json".
+    """
+    if output_format == "ndjson":
+        async for record in records:
+            _write([record], output_format)
+    else:
+        _write([record async for record in records], output_format)
+
+def _write(records, output_format):
+    """
+    Write records to standard output.
+
+    Parameters:
+    - records (list): The dicts to write.
+    - output_format (str): "ndjson" for one object per line, "json" for a single array.
+    """
+    if output_format == "ndjson":
+        for record in records:
+            sys.stdout.write(json.dumps(record, default=str) + "\n")
+    else:
+        sys.stdout.write(json.dumps(records, default=str, indent=2) + "\n")
+    sys.stdout.flush()
@@ -0,0 +1,102 @@
+import os
+from dataclasses import dataclass, field
+from dotenv import load_dotenv
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Data class holding the application settings read from the environment.
+
+    Attributes:
+    - mongo_connection_string (str): The MongoDB connection string (MONGO_CONNECTION_STRING).
+    - mongo_max_pool_size (int): The maximum size of the shared connection pool (MONGO_MAX_POOL_SIZE).
+    - mongo_min_pool_size (int): The minimum size of the shared connection pool (MONGO_MIN_POOL_SIZE).
+    - mongo_max_idle_time_ms (int): How long a pooled connection may sit idle (MONGO_MAX_IDLE_TIME_MS).
+    - mongo_fast_start (bool): Whether startup builds the inventory in the background (MONGO_FAST_START).
+    - store_cache_size (int): The maximum number of cached stores (STORE_CACHE_SIZE).
+    - store_cache_ttl (float): How long a cached store stays valid, in seconds (STORE_CACHE_TTL).
+    - log_format (str): 'text' or 'json' for JSON lines log files (LOG_FORMAT).
+    - log_level (str): The default level written to the log files (LOG_LEVEL).
+    - log_levels (dict): Per-logger levels, from "logger=LEVEL,..." (LOG_LEVELS).
+    - log_sample_rates (dict): Per-logger 1-in-N sampling of DEBUG/INFO messages,
+                               from "logger=N,..." (LOG_SAMPLE_RATES).
+    - bcrypt_rounds (int): The bcrypt work factor for new and upgraded password hashes (BCRYPT_ROUNDS).
+    - session_secret (str): The key session tokens are signed with (SESSION_SECRET).
+    - session_ttl (int): How long a session token stays valid, in seconds (SESSION_TTL).
+    - session_file (str): Where scripted invocations keep their session token (SESSION_FILE).
+    - api_host (str): The interface the HTTP API listens on (API_HOST).
+    - api_port (int): The port the HTTP API listens on (API_PORT).
+    - api_workers (int): The number of HTTP API worker processes (API_WORKERS).
+    - api_public_metrics (bool): Whether GET /metrics can be scraped without a session token (API_PUBLIC_METRICS).
+    """
+    mongo_connection_string: str = None
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_max_idle_time_ms: int = 300000
+    mongo_fast_start: bool = True
+    store_cache_size: int = 5000
+    store_cache_ttl: float = 300.0
+    log_format: str = "text"
+    log_level: str = "DEBUG"
+    log_levels: dict = field(default_factory=dict)
+    log_sample_rates: dict = field(default_factory=dict)
+    bcrypt_rounds: int = 12
+    session_secret: str = None
+    session_ttl: int = 28800
+    session_file: str = None
+    api_host: str = "127.0.0.1"
+    api_port: int = 8080
+    api_workers: int = 1
+    api_public_metrics: bool = False
+
+def load_settings():
+    """
+    Load the .env file and parse the settings from the environment.
+
+    Returns:
+    - Settings: The parsed settings.
+    """
+    # Load environment variables from the .env file
+    load_dotenv()
+
+    return Settings(
+        mongo_connection_string=os.getenv("MONGO_CONNECTION_STRING"),
+        mongo_max_pool_size=int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+        mongo_min_pool_size=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        mongo_max_idle_time_ms=int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+        mongo_fast_start=os.getenv("MONGO_FAST_START", "true").lower() == "true",
+        store_cache_size=int(os.getenv("STORE_CACHE_SIZE", "5000")),
+        store_cache_ttl=float(os.getenv("STORE_CACHE_TTL", "300")),
+        log_format=os.getenv("LOG_FORMAT", "text").lower(),
+        log_level=os.getenv("LOG_LEVEL", "DEBUG").upper(),
+        log_levels={name: level.upper() for name, level in _parse_pairs(os.getenv("LOG_LEVELS", "")).items()},
+        log_sample_rates={name: int(rate) for name, rate in _parse_pairs(os.getenv("LOG_SAMPLE_RATES", "")).items()},
+        bcrypt_rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+        session_secret=os.getenv("SESSION_SECRET"),
+        session_ttl=int(os.getenv("SESSION_TTL", "28800")),
+        session_file=os.path.expanduser(os.getenv("SESSION_FILE", "~/.route_solutions_session")),
+        api_host=os.getenv("API_HOST", "127.0.0.1"),
+        api_port=int(os.getenv("API_PORT", "8080")),
+        api_workers=int(os.getenv("API_WORKERS", "1")),
+        api_public_metrics=os.getenv("API_PUBLIC_METRICS", "false").lower() == "true"
+    )
+
+def _parse_pairs(value):
+    """
+    Parse a "key=value,key=value" setting into a dict.
+
+    Args:
+    - value (str): The raw setting.
+
+    Returns:
+    - dict: The parsed pairs, with surrounding whitespace removed.
+    """
+    pairs = {}
+    for item in value.split(","):
+        if "=" in item:
+            key, item_value = item.split("=", 1)
+            pairs[key.strip()] = item_value.strip()
+    return pairs
+
+# The settings for this process, parsed once at first import
+settings = load_settings()
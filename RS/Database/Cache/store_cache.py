@@ -0,0 +1,166 @@
+import copy
+import time
+import logging
+from collections import OrderedDict
+from Config.settings import settings
+
+# Initialize a logger for the cache module
+cache_logger = logging.getLogger("cache_logger")
+cache_logger.setLevel(logging.DEBUG)
+
+class StoreCache:
+    """
+    In-process read-through cache of store documents keyed by store ID.
+
+    Entries expire after ttl_seconds, and once max_size entries are held the least
+    recently used entry is evicted. Writers call invalidate() or clear() so the cache
+    never serves a store that has been changed through this application.
+
+    The cache is single-process only: invalidation does not reach other processes, so a
+    process whose stores can be written by another one, such as an API worker when
+    API_WORKERS is above 1, must call disable().
+
+    Both bump a generation counter. A reader takes generation() before it queries MongoDB
+    and passes it to put(), which skips the document if a write was invalidated in the
+    meantime, so a read that raced a write cannot cache the store as it was before.
+
+    Attributes:
+    - max_size (int): The maximum number of cached stores.
+    - ttl_seconds (float): How long an entry stays valid.
+    - hits (int): The number of lookups served from the cache.
+    - misses (int): The number of lookups that had to go to MongoDB.
+    - evictions (int): The number of entries dropped because the cache was full.
+    - stale_puts (int): The number of documents not cached because a write overtook their read.
+    """
+
+    def __init__(self, max_size, ttl_seconds):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_puts = 0
+        self._generation = 0
+        self._entries = OrderedDict()
+
+    def get(self, store_id):
+        """
+        Return a cached store, or None if it is not cached or has expired.
+
+        Args:
+        - store_id (int): The ID of the store.
+
+        Returns:
+        - dict: A copy of the cached document, or None.
+        """
+        store_id = _normalize_id(store_id)
+        entry = self._entries.get(store_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, document = entry
+        if expires_at < time.monotonic():
+            del self._entries[store_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(store_id)
+        self.hits += 1
+        return copy.deepcopy(document)
+
+    def generation(self):
+        """
+        Return the current generation, to be passed to put() once the read has finished.
+
+        Returns:
+        - int: The number of invalidations so far.
+        """
+        return self._generation
+
+    def put(self, store_id, document, generation=None):
+        """
+        Cache a store document.
+
+        Args:
+        - store_id (int): The ID of the store.
+        - document (dict): The store document.
+        - generation (int): The generation() taken before the document was read. If stores
+                            have been invalidated since, the document may predate a write
+                            and is not cached. Default is None to cache it unconditionally.
+        """
+        if self.max_size <= 0:
+            return
+        if generation is not None and generation != self._generation:
+            self.stale_puts += 1
+            return
+        store_id = _normalize_id(store_id)
+        self._entries[store_id] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(document))
+        self._entries.move_to_end(store_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, *store_ids):
+        """
+        Drop the given stores from the cache.
+
+        Args:
+        - store_ids: The IDs of the stores that were written.
+        """
+        self._generation += 1
+        for store_id in store_ids:
+            self._entries.pop(_normalize_id(store_id), None)
+
+    def clear(self):
+        """
+        Drop every cached store.
+        """
+        self._generation += 1
+        self._entries.clear()
+        cache_logger.info("Store cache cleared.")
+
+    def disable(self):
+        """
+        Drop every cached store and stop caching, so every lookup goes to MongoDB.
+        """
+        self.max_size = 0
+        self.clear()
+        cache_logger.info("Store cache disabled.")
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+        - dict: Size, capacity, hits, misses, evictions, stale puts and hit ratio.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale_puts": self.stale_puts,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+def _normalize_id(store_id):
+    """
+    Convert a store ID to the int form used as the '_id' of store documents.
+
+    Args:
+    - store_id: The ID as entered or stored.
+
+    Returns:
+    - The ID as an int when it is numeric, otherwise unchanged.
+    """
+    try:
+        return int(store_id)
+    except (TypeError, ValueError):
+        return store_id
+
+# The process-wide store cache shared by the Database modules
+store_cache = StoreCache(settings.store_cache_size, settings.store_cache_ttl)
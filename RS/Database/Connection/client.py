@@ -0,0 +1,50 @@
+import logging
+from Config.settings import settings
+
+# Share the connection module's logger so pool lifecycle events land in the same log file
+connection_logger = logging.getLogger("connection_logger")
+
+# The single process-wide client, created on first use
+_client = None
+
+def get_client():
+    """
+    Return the shared MongoDB client, creating it on first use.
+
+    The client owns a connection pool sized by MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE,
+    so every Database and User coroutine reuses already authenticated connections instead
+    of paying a new handshake per operation. Motor is only imported here, on first use.
+
+    Returns:
+    - AsyncIOMotorClient: The shared client.
+    """
+    global _client
+    if _client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        _client = AsyncIOMotorClient(
+            settings.mongo_connection_string,
+            maxPoolSize=settings.mongo_max_pool_size,
+            minPoolSize=settings.mongo_min_pool_size,
+            maxIdleTimeMS=settings.mongo_max_idle_time_ms
+        )
+        connection_logger.info(f"MongoDB client created (maxPoolSize={settings.mongo_max_pool_size}, "
+                               f"minPoolSize={settings.mongo_min_pool_size}).")
+    return _client
+
+def close_client():
+    """
+    Close the shared MongoDB client and release its connection pool.
+
+    Safe to call more than once; the next call to get_client() creates a fresh client.
+    """
+    global _client
+    if _client is None:
+        return
+    try:
+        _client.close()
+        connection_logger.info("MongoDB client closed successfully.")
+    except Exception as close_error:
+        connection_logger.error(f"Error closing MongoDB client: {close_error}")
+    finally:
+        _client = None
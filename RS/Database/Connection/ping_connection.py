@@ -1,65 +1,108 @@
-import os
+import time
+import asyncio
 import logging
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-
-# Load environment variables from the .env file
-load_dotenv()
-
-# Retrieve MongoDB connection string from environment variables
-uri = os.getenv("MONGO_CONNECTION_STRING")
+from Config.settings import settings
+from Database.Connection.client import get_client, close_client
 
 # Initialize a logger for the connection module
 connection_logger = logging.getLogger("connection_logger")
 connection_logger.setLevel(logging.DEBUG)
 
-async def connect_to_database():
+# Cached {database: [collections]} summary and the background task building it
+_topology = None
+_inventory_task = None
+
+async def connect_to_database(fast_start=None):
     """
     Connect to the MongoDB server, retrieve and log information about databases and collections.
 
-    This coroutine establishes a connection to the MongoDB server using the specified URI.
-    It then logs information about available databases and collections.
+    This coroutine creates the shared, pooled MongoDB client used by every Database and User
+    module and verifies it with a cheap ping. The database and collection inventory is
+    gathered concurrently; in fast-start mode (the default, MONGO_FAST_START) it runs in the
+    background so the menu appears as soon as the ping returns. The client stays open until
+    disconnect_from_database() is called on exit.
 
-    Note: The asyncio.run() function is used to run this coroutine, assuming it is the entry point.
+    Args:
+    - fast_start (bool): Whether to build the inventory in the background.
+                         Default is None to use MONGO_FAST_START.
 
-    Raises:
-    - Exception: If an error occurs during the connection or database information retrieval process.
+    Returns:
+    - float: The time taken to connect, in milliseconds, or None if the server could not be reached.
     """
+    global _inventory_task
+    started = time.perf_counter()
+    if fast_start is None:
+        fast_start = settings.mongo_fast_start
 
     try:
         # Log connection attempt
         connection_logger.info("Connecting to MongoDB.....")
 
-        # Establish a connection to the MongoDB server
-        client = AsyncIOMotorClient(uri)
+        # Create (or reuse) the shared MongoDB client
+        client = get_client()
+
+        # Ping the server to verify the connection
+        await client.admin.command("ping")
 
-        # Check server info to verify the connection
-        await client.server_info()
+        # Retrieve and log information about databases and collections
+        if fast_start:
+            _inventory_task = asyncio.create_task(_load_inventory(client))
+        else:
+            await _load_inventory(client)
+
+    except Exception as e:
+        # Log error if an exception occurs during the connection process
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        connection_logger.error(f"Error connecting to MongoDB after {elapsed_ms:.1f} ms: {e}")
+        return None
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    connection_logger.info(f"Connected to MongoDB in {elapsed_ms:.1f} ms (fast start: {fast_start}).")
+    return elapsed_ms
+
+async def get_topology():
+    """
+    Return the cached database and collection inventory, waiting for it if it is still loading.
+
+    Returns:
+    - dict: Collection names keyed by database name, or None if the inventory failed.
+    """
+    if _topology is None and _inventory_task is not None:
+        await asyncio.shield(_inventory_task)
+    return _topology
 
-        # Retrieve and log information about available databases
+async def _load_inventory(client):
+    """
+    Retrieve the databases and, concurrently, the collections in each, then cache and log them.
+
+    Args:
+    - client (AsyncIOMotorClient): The shared client.
+    """
+    global _topology
+    try:
         databases = await client.list_database_names()
-        for db_name in databases:
-            connection_logger.info(f" - {db_name}")
+        collections = await asyncio.gather(
+            *(client[db_name].list_collection_names() for db_name in databases)
+        )
+        _topology = dict(zip(databases, collections))
 
-        # Retrieve and log information about collections in each database
-        for db_name in databases:
-            database = client[db_name]
-            collections = await database.list_collection_names()
+        for db_name, col_names in _topology.items():
+            connection_logger.info(f" - {db_name}")
             connection_logger.info(f"\nCollections in '{db_name}':")
-            for col_name in collections:
+            for col_name in col_names:
                 connection_logger.info(f" - {col_name}")
 
     except Exception as e:
-        # Log error if an exception occurs during the connection process
-        connection_logger.error(f"Error connecting to MongoDB: {e}")
-
-    finally:
-        # Close the MongoDB client, log closure attempt, and handle potential errors
-        if client is not None:
-            try:
-                client.close()
-                connection_logger.info("MongoDB client closed successfully.")
-            except Exception as close_error:
-                connection_logger.error(f"Error closing MongoDB client: {close_error}")
-        else:
-            connection_logger.warning("MongoDB client was not initialized.")
+        # Log error if the inventory cannot be retrieved
+        connection_logger.error(f"Error retrieving MongoDB inventory: {e}")
+
+def disconnect_from_database():
+    """
+    Close the shared MongoDB client and its connection pool.
+
+    Called once when the application exits. A background inventory that is still
+    running is canceled first.
+    """
+    if _inventory_task is not None and not _inventory_task.done():
+        _inventory_task.cancel()
+    close_client()
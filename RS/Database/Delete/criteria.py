@@ -0,0 +1,117 @@
+import re
+from Database.Migration.status import legacy_pending
+from Database.Model.store import TAIL_LIFT_FIELD, POSTCODE_FIELD, KILOMETERS_FIELD, LEGACY_FIELDS
+
+# Comparison operators accepted for kilometers, longest first so '>=' wins over '>'
+_COMPARISONS = {">=": "$gte", "<=": "$lte", ">": "$gt", "<": "$lt", "=": "$eq"}
+
+_TERM_PATTERN = re.compile(r"^\s*(tail_lift|postcode|km)\s*(>=|<=|>|<|=)\s*(.+?)\s*$", re.IGNORECASE)
+
+CRITERIA_HELP = (
+    "Criteria are comma separated terms, all of which must match:\n"
+    "  tail_lift=true|false   stores that do or do not need a tail lift\n"
+    "  postcode=AB1 2CD       stores with this exact postcode\n"
+    "  postcode=AB*           stores whose postcode starts with AB\n"
+    "  km<10, km>=5, ...      stores by kilometers (>, >=, <, <=, =)\n"
+    "  km=5..20               stores with kilometers between 5 and 20 inclusive\n"
+    "Example: tail_lift=true, postcode=AB*, km=0..50"
+)
+
+def parse_criteria(criteria, legacy=None):
+    """
+    Compile a criteria string into a MongoDB filter for the 'Stores' collection.
+
+    See CRITERIA_HELP for the syntax. Until the compact store migration has finished,
+    each term also matches the legacy field, so stores that have not been migrated yet
+    are found, exported and deleted too. ensure_indexes() keeps the legacy indexes that
+    serve those branches while legacy_pending(), and mark_migrated() drops them.
+
+    Args:
+    - criteria (str): The criteria, e.g. "tail_lift=true, postcode=AB*, km=0..50".
+    - legacy (bool): Whether to match the legacy fields as well. Default is None to
+                     match them while legacy_pending() says stores may still use them.
+
+    Returns:
+    - dict: The MongoDB filter.
+
+    Raises:
+    - ValueError: If a term is not recognised or has an invalid value.
+    """
+    if legacy is None:
+        legacy = legacy_pending()
+
+    filter_query = {}
+    terms = [term for term in criteria.split(",") if term.strip()]
+    if not terms:
+        raise ValueError("No criteria given.\n" + CRITERIA_HELP)
+
+    for term in terms:
+        match = _TERM_PATTERN.match(term)
+        if not match:
+            raise ValueError(f"Invalid criteria term '{term.strip()}'.\n" + CRITERIA_HELP)
+        field, operator, value = match.group(1).lower(), match.group(2), match.group(3)
+
+        if field == "tail_lift":
+            if operator != "=" or value.lower() not in ("true", "false"):
+                raise ValueError("tail_lift must be given as tail_lift=true or tail_lift=false.")
+            filter_query[TAIL_LIFT_FIELD] = value.lower() == "true"
+
+        elif field == "postcode":
+            if operator != "=":
+                raise ValueError("postcode only supports '=', with an optional trailing '*' for a prefix.")
+            if value.endswith("*"):
+                # Anchored, case-sensitive prefix regexes can use the postcode index
+                filter_query[POSTCODE_FIELD] = {"$regex": "^" + re.escape(value[:-1])}
+            else:
+                filter_query[POSTCODE_FIELD] = value
+
+        else:
+            condition = filter_query.setdefault(KILOMETERS_FIELD, {})
+            if operator == "=" and ".." in value:
+                lower, upper = value.split("..", 1)
+                condition["$gte"] = _to_number(lower)
+                condition["$lte"] = _to_number(upper)
+            else:
+                condition[_COMPARISONS[operator]] = _to_number(value)
+
+    if not legacy:
+        return filter_query
+    clauses = [{"$or": [{field: condition}, {LEGACY_FIELDS[field]: _legacy_condition(field, condition)}]}
+               for field, condition in filter_query.items()]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def _legacy_condition(field, condition):
+    """
+    Adapt a condition on a compact field to the values stored under its legacy field.
+
+    Imports before the compact schema stored the tail lift flag unchecked, so it may be
+    text as well as a bool.
+
+    Args:
+    - field (str): The compact field.
+    - condition: The condition on the compact field.
+
+    Returns:
+    - The condition for the legacy field.
+    """
+    if field == TAIL_LIFT_FIELD:
+        return {"$in": [condition, str(condition), str(condition).lower()]}
+    return condition
+
+def _to_number(value):
+    """
+    Convert a kilometers value from the criteria string to a float.
+
+    Args:
+    - value (str): The value as written.
+
+    Returns:
+    - float: The parsed value.
+
+    Raises:
+    - ValueError: If the value is not a number.
+    """
+    try:
+        return float(value.strip())
+    except ValueError:
+        raise ValueError(f"Invalid kilometers value '{value.strip()}'.")
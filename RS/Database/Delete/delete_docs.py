@@ -1,20 +1,21 @@
-import os
-from bson import ObjectId
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import PyMongoError
+from Database.Cache.store_cache import store_cache
+from Database.Connection.client import get_client
+from Database.Delete.criteria import parse_criteria
+from Metrics.metrics import instrument
+from WorkPool.work_pool import WorkPool
 import logging
 
-# Load environment variables from the .env file
-load_dotenv()
-
-# Retrieve MongoDB connection string from environment variables
-uri = os.getenv("MONGO_CONNECTION_STRING")
-
 # Initialize a logger for the delete module
 delete_logger = logging.getLogger("delete_logger")
 delete_logger.setLevel(logging.DEBUG)
 
+# Maximum number of IDs per delete_many call when deleting by ID list
+DEFAULT_BATCH_SIZE = 1000
+
+# Number of delete_many calls in flight at once when deleting by ID list
+DEFAULT_CONCURRENCY = 4
+
+@instrument("delete_one_document", delete_logger)
 async def delete_one_document(document_id):
     """
     Delete a single document from the 'Stores' collection based on the provided document ID.
@@ -22,16 +23,22 @@ async def delete_one_document(document_id):
     Args:
     - document_id (str): The ID of the document to be deleted.
 
+    Returns:
+    - bool: True if a document was deleted, False if there is no such document.
+
     Raises:
     - PyMongoError: If an error occurs during the MongoDB operation.
     - Exception: For unexpected errors during the process.
     """
+    from bson import ObjectId
+    from pymongo.errors import PyMongoError
+
     try:
         # Log the start of the document deletion process
         delete_logger.info("Searching for document.....")
 
-        # Establish a connection to the MongoDB server
-        client = AsyncIOMotorClient(uri)
+        # Use the shared MongoDB client
+        client = get_client()
         db = client["StoreInformation"]
         collection = db["Stores"]
 
@@ -49,68 +56,155 @@ async def delete_one_document(document_id):
 
         # Perform the delete operation and log the result
         result = await collection.delete_one(filter_query)
+        store_cache.invalidate(document_id)
         if result.deleted_count == 1:
             delete_logger.info(f"Document with ID {document_id} deleted successfully.")
+            return True
         else:
             delete_logger.warning(f"No document found with ID {document_id}.")
 
     except PyMongoError as pe:
-        # Log MongoDB-specific errors
+        # Log MongoDB-specific errors and raise them, so a failed delete is not taken for a missing store
         delete_logger.error(f"MongoDB error: {pe}")
+        raise
     except Exception as e:
         # Log unexpected errors
         delete_logger.error(f"Unexpected error: {e}")
+    return False
 
-    finally:
-        # Close the MongoDB client and log closure attempt
-        if client:
-            client.close()
-            delete_logger.info("MongoDB client closed successfully.")
-
-async def delete_many_documents(criteria='all'):
+@instrument("delete_many_documents", delete_logger, documents=lambda deleted: deleted or 0)
+async def delete_many_documents(criteria='all', dry_run=False, confirmed=False):
     """
     Delete multiple documents from the 'Stores' collection based on the provided criteria.
 
     Args:
-    - criteria (str): The criteria for deletion. Default is 'all' to delete all documents.
+    - criteria (str): The criteria for deletion, e.g. "tail_lift=true, postcode=AB*, km=0..50"
+                      (see Database.Delete.criteria). Default is 'all' to delete all documents.
+    - dry_run (bool): Only count the matching documents without deleting them.
+    - confirmed (bool): Skip the confirmation prompt before deleting all documents,
+                        for non-interactive callers.
+
+    Returns:
+    - int: The number of documents deleted, or matched when dry_run is set.
+           None if the deletion was canceled or failed.
 
     Raises:
+    - ValueError: If the criteria cannot be parsed.
     - PyMongoError: If an error occurs during the MongoDB operation.
     - Exception: For unexpected errors during the process.
     """
+    from pymongo.errors import PyMongoError
+
     try:
-        # Establish a connection to the MongoDB server
-        client = AsyncIOMotorClient(uri)
+        # Use the shared MongoDB client
+        client = get_client()
         db = client["StoreInformation"]
         collection = db["Stores"]
 
         if criteria.lower() == 'all':
+            if dry_run:
+                return await collection.count_documents({})
+
             # Ask for confirmation before deleting all documents
-            confirm_delete = input("Are you sure you want to delete all documents in the Stores collection? (y/n): ").lower()
+            confirm_delete = 'y' if confirmed else input("Are you sure you want to delete all documents in the Stores collection? (y/n): ").lower()
 
             if confirm_delete == 'y':
                 # Delete all documents in the collection
                 result = await collection.delete_many({})
+                store_cache.clear()
 
                 # Log the result of the delete operation
                 if result.deleted_count > 0:
                     delete_logger.info(f"{result.deleted_count} documents deleted successfully.")
                 else:
                     delete_logger.warning("No documents found in the 'Stores' collection.")
+                return result.deleted_count
             else:
                 delete_logger.info("Deletion canceled. No documents were deleted.")
+                return None
+
+        # Compile the criteria into a MongoDB filter
+        filter_query = parse_criteria(criteria)
+
+        if dry_run:
+            count = await collection.count_documents(filter_query)
+            delete_logger.info(f"Dry run: {count} documents match criteria '{criteria}'.")
+            return count
+
+        # Delete every matching document in one round trip
+        result = await collection.delete_many(filter_query)
+        store_cache.clear()
+
+        if result.deleted_count > 0:
+            delete_logger.info(f"{result.deleted_count} documents matching '{criteria}' deleted successfully.")
         else:
-            delete_logger.warning("Invalid option. Please enter 'all' to delete all documents.")
+            delete_logger.warning(f"No documents match criteria '{criteria}'.")
+        return result.deleted_count
 
+    except ValueError as ve:
+        # Log invalid criteria
+        delete_logger.error(f"Invalid criteria: {ve}")
     except PyMongoError as pe:
         # Log MongoDB-specific errors
         delete_logger.error(f"MongoDB error: {pe}")
     except Exception as e:
         # Log unexpected errors
         delete_logger.error(f"Unexpected error: {e}")
+    return None
+
+@instrument("delete_documents_by_ids", delete_logger, documents=lambda deleted: deleted)
+async def delete_documents_by_ids(ids, batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY, progress=None):
+    """
+    Delete documents from the 'Stores' collection by a list of IDs.
+
+    The IDs are deleted in batches with one $in delete_many call per batch, rather
+    than one round trip per store, and a WorkPool keeps up to concurrency batches
+    in flight at once.
+
+    Args:
+    - ids (list): The IDs of the stores to delete.
+    - batch_size (int): The maximum number of IDs per delete_many call.
+    - concurrency (int): The number of delete_many calls in flight at once.
+    - progress (callable): Called as progress(completed, total) after each batch is deleted.
+
+    Returns:
+    - int: The number of documents deleted.
+
+    Raises:
+    - PyMongoError: If an error occurs during the MongoDB operation. The batches deleted
+                    before it are logged, not returned.
+    - Exception: For unexpected errors during the process.
+    """
+    from pymongo.errors import PyMongoError
+
+    deleted = 0
+    try:
+        # Use the shared MongoDB client
+        client = get_client()
+        db = client["StoreInformation"]
+        collection = db["Stores"]
+
+        async def delete_batch(batch):
+            nonlocal deleted
+            result = await collection.delete_many({"_id": {"$in": batch}})
+            store_cache.invalidate(*batch)
+            deleted += result.deleted_count
+
+        ids = list(dict.fromkeys(int(store_id) for store_id in ids))
+        batches = [ids[start:start + batch_size] for start in range(0, len(ids), batch_size)]
+        await WorkPool(concurrency, progress=progress).map(delete_batch, batches)
+
+        delete_logger.info(f"{deleted} of {len(ids)} requested documents deleted successfully.")
+        if deleted < len(ids):
+            delete_logger.warning(f"{len(ids) - deleted} requested IDs were not found.")
+
+    except PyMongoError as pe:
+        # Log MongoDB-specific errors and raise them, so a partial delete is not reported as finished
+        delete_logger.error(f"MongoDB error after {deleted} documents were deleted: {pe}")
+        raise
+    except Exception as e:
+        # Log unexpected errors
+        delete_logger.error(f"Unexpected error after {deleted} documents were deleted: {e}")
+        raise
 
-    finally:
-        # Close the MongoDB client and log closure attempt
-        if client:
-            client.close()
-            delete_logger.info("MongoDB client closed successfully.")
+    return deleted
@@ -0,0 +1,244 @@
+import os
+import csv
+import asyncio
+import logging
+from Database.InsertMany.file_reader import EXCEL_EXTENSIONS, CSV_EXTENSIONS, PARQUET_EXTENSIONS
+from Database.Model.store import Store, WEEKDAYS, projection
+from Database.SearchAll.search_all import iter_stores
+from Metrics.metrics import instrument
+
+# Initialize a logger for the export module
+export_logger = logging.getLogger("export_logger")
+export_logger.setLevel(logging.DEBUG)
+
+# Number of documents fetched and written per batch
+DEFAULT_BATCH_SIZE = 1000
+
+# Export column -> Store attribute, or weekday for that day's opening hours. The columns
+# are the ones insert_documents and modify_documents read, so an export can be imported again unchanged.
+EXPORT_COLUMNS = {
+    "ID": "id",
+    "Store Name": "name",
+    "Store Address": "address",
+    "Store Postcode": "postcode",
+    "Kilometers": "kilometers",
+    "Tail Lift": "tail_lift",
+    **{day: day for day in WEEKDAYS},
+}
+
+# Parquet column types; every other column is written as a string
+_PARQUET_TYPES = {"ID": "int64", "Kilometers": "float64", "Tail Lift": "bool"}
+
+@instrument("export_documents", export_logger, documents=lambda exported: exported)
+async def export_documents(file_path, filter_query=None, columns=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Export stores from the 'Stores' collection to a CSV, Excel or Parquet file.
+
+    Documents are streamed from the search_all cursor with only the exported fields
+    projected, decoded with the Store model and written batch_size rows at a time in a
+    worker thread, so memory stays bounded by the batch size however many stores are
+    exported. Excel files are written with openpyxl's write-only mode. If the export
+    fails part way, the partial file is deleted and the error is raised.
+
+    Args:
+    - file_path (str): The .csv, .xlsx or .parquet file to write.
+    - filter_query (dict): A MongoDB filter, e.g. from parse_criteria. Default is None for every store.
+    - columns (list): The EXPORT_COLUMNS to write, in order. Default is None for all of them.
+    - batch_size (int): The number of stores fetched and written per batch.
+
+    Returns:
+    - int: The number of stores exported.
+
+    Raises:
+    - ValueError: If the file type or a column is not supported.
+    - OSError: If the file cannot be written.
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    from pymongo.errors import PyMongoError
+
+    columns = list(columns or EXPORT_COLUMNS)
+    unknown = [column for column in columns if column not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown)}. Choose from {', '.join(EXPORT_COLUMNS)}.")
+
+    try:
+        writer = _open_writer(file_path, columns)
+    except OSError as oe:
+        # Log file errors, such as a missing directory or no permission to write
+        export_logger.error(f"Cannot write {file_path}: {oe}")
+        raise
+
+    exported = 0
+    finished = False
+    try:
+        fields = projection([EXPORT_COLUMNS[column] for column in columns])
+
+        rows = []
+        async for document in iter_stores(filter_query, fields, batch_size=batch_size):
+            store = Store.from_document(document)
+            rows.append([_column_value(store, EXPORT_COLUMNS[column]) for column in columns])
+            if len(rows) >= batch_size:
+                await asyncio.to_thread(writer.write, rows)
+                exported += len(rows)
+                rows = []
+        if rows:
+            await asyncio.to_thread(writer.write, rows)
+            exported += len(rows)
+
+        await asyncio.to_thread(writer.close)
+        finished = True
+        export_logger.info(f"Exported {exported} stores to {file_path}")
+
+    except PyMongoError as pe:
+        # Log MongoDB-specific errors
+        export_logger.error(f"MongoDB error after exporting {exported} stores: {pe}")
+        raise
+    except Exception as e:
+        # Log unexpected errors
+        export_logger.error(f"Unexpected error after exporting {exported} stores: {e}")
+        raise
+    finally:
+        if not finished:
+            # Never leave a truncated file behind that looks like a complete export
+            await asyncio.to_thread(_discard, writer, file_path)
+
+    return exported
+
+def _column_value(store, attribute):
+    """
+    Read one export column from a store.
+
+    Args:
+    - store (Store): The decoded store.
+    - attribute (str): A Store attribute, or a weekday for that day's opening hours.
+
+    Returns:
+    - The value, or None if the store does not have it.
+    """
+    if attribute in WEEKDAYS:
+        return (store.restrictions or {}).get(attribute)
+    return getattr(store, attribute)
+
+def _discard(writer, file_path):
+    """
+    Close the writer of a failed export and delete its partial file.
+
+    Args:
+    - writer: The writer from _open_writer().
+    - file_path (str): The file it was writing.
+    """
+    try:
+        writer.close()
+    except Exception as e:
+        export_logger.warning(f"Could not close the partial export {file_path}: {e}")
+    try:
+        os.remove(file_path)
+        export_logger.warning(f"Deleted the partial export {file_path}")
+    except FileNotFoundError:
+        pass
+    except OSError as oe:
+        export_logger.error(f"Could not delete the partial export {file_path}: {oe}")
+
+def _open_writer(file_path, columns):
+    """
+    Open the writer for a file, picked from its extension.
+
+    Args:
+    - file_path (str): The file to write.
+    - columns (list): The column headers.
+
+    Returns:
+    - The writer, with write(rows) and close() methods.
+
+    Raises:
+    - ValueError: If the file type is not supported.
+    - OSError: If the file cannot be created.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in CSV_EXTENSIONS:
+        return _CsvWriter(file_path, columns)
+    if extension in EXCEL_EXTENSIONS:
+        return _ExcelWriter(file_path, columns)
+    if extension in PARQUET_EXTENSIONS:
+        return _ParquetWriter(file_path, columns)
+    raise ValueError(f"Unsupported file type '{extension}'. Use .xlsx, .csv or .parquet.")
+
+class _CsvWriter:
+    """
+    Write rows to a CSV file as they arrive.
+    """
+
+    def __init__(self, file_path, columns):
+        self._file = open(file_path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+class _ExcelWriter:
+    """
+    Write rows to an .xlsx workbook with openpyxl's write-only mode, which streams
+    rows to disk instead of keeping every cell in memory.
+    """
+
+    def __init__(self, file_path, columns):
+        from openpyxl import Workbook
+
+        self._file_path = file_path
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Stores")
+        self._sheet.append(columns)
+
+    def write(self, rows):
+        for row in rows:
+            self._sheet.append(row)
+
+    def close(self):
+        self._workbook.save(self._file_path)
+        self._workbook.close()
+
+class _ParquetWriter:
+    """
+    Write rows to a Parquet file, one row group per batch.
+    """
+
+    def __init__(self, file_path, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._columns = columns
+        self._schema = pa.schema([(column, _PARQUET_TYPES.get(column, "string")) for column in columns])
+        self._writer = pq.ParquetWriter(file_path, self._schema)
+
+    def write(self, rows):
+        data = {
+            column: [_parquet_value(row[index], self._schema.field(column).type) for row in rows]
+            for index, column in enumerate(self._columns)
+        }
+        self._writer.write_table(self._pa.Table.from_pydict(data, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+def _parquet_value(value, arrow_type):
+    """
+    Convert a value to fit its Parquet column, turning unexpected types into strings.
+
+    Args:
+    - value: The document value.
+    - arrow_type: The pyarrow type of the column.
+
+    Returns:
+    - The value to write.
+    """
+    if value is None:
+        return None
+    if str(arrow_type) == "string" and not isinstance(value, str):
+        return str(value)
+    return value
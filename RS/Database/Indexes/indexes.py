@@ -0,0 +1,234 @@
+from Database.Connection.client import get_client
+from Database.Model.store import POSTCODE_FIELD, TAIL_LIFT_FIELD, KILOMETERS_FIELD, WINDOWS_FIELD, LEGACY_FIELDS
+import logging
+
+# Ascending index direction, pymongo.ASCENDING
+ASCENDING = 1
+
+# Initialize a logger for the indexes module
+indexes_logger = logging.getLogger("indexes_logger")
+indexes_logger.setLevel(logging.DEBUG)
+
+# Indexes each collection needs, keyed by (database, collection), as (keys, options) pairs
+# that _index_models() turns into IndexModels so pymongo is only imported when they are created
+INDEXES = {
+    ("UserInformation", "Users"): [
+        # login and registration look users up by username, which must be unique
+        ([("username", ASCENDING)], {"name": "username_unique", "unique": True}),
+    ],
+    ("StoreInformation", "Stores"): [
+        # Criteria-based searches and deletes filter on these fields
+        ([(POSTCODE_FIELD, ASCENDING)], {"name": "postcode"}),
+        ([(TAIL_LIFT_FIELD, ASCENDING)], {"name": "tail_lift_required"}),
+        ([(KILOMETERS_FIELD, ASCENDING)], {"name": "km"}),
+        # Opening hours queries match a window by its start and end minute
+        ([(f"{WINDOWS_FIELD}.s", ASCENDING), (f"{WINDOWS_FIELD}.e", ASCENDING)], {"name": "opening_windows"}),
+    ],
+}
+
+# Set once the username_unique index has been confirmed, see require_unique_usernames()
+_usernames_unique = False
+
+# Indexes on the field names used before the compact store schema. They serve the legacy
+# branches parse_criteria adds while legacy_pending(), and are dropped by mark_migrated()
+LEGACY_INDEXES = {
+    ("StoreInformation", "Stores"): [
+        ([(LEGACY_FIELDS[POSTCODE_FIELD], ASCENDING)], {"name": "store_postcode"}),
+        ([(LEGACY_FIELDS[TAIL_LIFT_FIELD], ASCENDING)], {"name": "tail_lift"}),
+        ([(LEGACY_FIELDS[KILOMETERS_FIELD], ASCENDING)], {"name": "kilometers"}),
+    ],
+}
+
+# Query shapes the application issues, as (database, collection, description, filter)
+QUERY_SHAPES = [
+    ("UserInformation", "Users", "login/registration by username", {"username": "example"}),
+    ("StoreInformation", "Stores", "search_one by ID", {"_id": 1}),
+    ("StoreInformation", "Stores", "search_many by ID list", {"_id": {"$in": [1, 2, 3]}}),
+    ("StoreInformation", "Stores", "search_page after ID", {"_id": {"$gt": 1}}),
+    ("StoreInformation", "Stores", "stores by postcode prefix", {POSTCODE_FIELD: {"$regex": "^AB"}}),
+    ("StoreInformation", "Stores", "stores requiring a tail lift", {TAIL_LIFT_FIELD: True}),
+    ("StoreInformation", "Stores", "stores within a kilometers range", {KILOMETERS_FIELD: {"$gte": 0, "$lte": 50}}),
+    ("StoreInformation", "Stores", "stores open at a time",
+     {WINDOWS_FIELD: {"$elemMatch": {"s": {"$lte": 600}, "e": {"$gt": 600}}}}),
+    # The $or shapes parse_criteria emits while legacy_pending(), served by the LEGACY_INDEXES
+    ("StoreInformation", "Stores", "stores by postcode prefix, compact or legacy",
+     {"$or": [{POSTCODE_FIELD: {"$regex": "^AB"}}, {LEGACY_FIELDS[POSTCODE_FIELD]: {"$regex": "^AB"}}]}),
+    ("StoreInformation", "Stores", "stores requiring a tail lift, compact or legacy",
+     {"$or": [{TAIL_LIFT_FIELD: True}, {LEGACY_FIELDS[TAIL_LIFT_FIELD]: {"$in": [True, "True", "true"]}}]}),
+    ("StoreInformation", "Stores", "stores within a kilometers range, compact or legacy",
+     {"$or": [{KILOMETERS_FIELD: {"$gte": 0, "$lte": 50}}, {LEGACY_FIELDS[KILOMETERS_FIELD]: {"$gte": 0, "$lte": 50}}]}),
+    ("StoreInformation", "Stores", "stores requiring a tail lift within a kilometers range, compact or legacy",
+     {"$and": [
+         {"$or": [{TAIL_LIFT_FIELD: True}, {LEGACY_FIELDS[TAIL_LIFT_FIELD]: {"$in": [True, "True", "true"]}}]},
+         {"$or": [{KILOMETERS_FIELD: {"$lt": 10}}, {LEGACY_FIELDS[KILOMETERS_FIELD]: {"$lt": 10}}]},
+     ]}),
+]
+
+async def ensure_indexes(legacy=False):
+    """
+    Create every index declared in INDEXES that does not already exist.
+
+    create_indexes is a no-op for indexes that already exist with the same definition,
+    so this is safe to run on every startup.
+
+    Args:
+    - legacy (bool): Whether to also create the LEGACY_INDEXES, for as long as
+                     load_migration_status() reports stores in the legacy layout.
+
+    Raises:
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    from pymongo.errors import PyMongoError
+
+    # Use the shared MongoDB client
+    client = get_client()
+
+    wanted = {key: list(specs) for key, specs in INDEXES.items()}
+    if legacy:
+        for key, specs in LEGACY_INDEXES.items():
+            wanted.setdefault(key, []).extend(specs)
+
+    for (db_name, collection_name), specs in wanted.items():
+        try:
+            collection = client[db_name][collection_name]
+            names = await collection.create_indexes(_index_models(specs))
+            indexes_logger.info(f"Indexes ensured on {db_name}.{collection_name}: {', '.join(names)}")
+
+        except PyMongoError as pe:
+            # Log MongoDB-specific errors, such as existing duplicates blocking a unique index
+            indexes_logger.error(f"MongoDB error creating indexes on {db_name}.{collection_name}: {pe}")
+        except Exception as e:
+            # Log unexpected errors
+            indexes_logger.error(f"Unexpected error creating indexes on {db_name}.{collection_name}: {e}")
+
+async def require_unique_usernames():
+    """
+    Make sure the username_unique index exists before any user is written, creating it if needed.
+
+    Registration relies on the index alone to reject duplicate usernames, so callers must
+    not insert users when this fails. The check runs once per process.
+
+    Raises:
+    - RuntimeError: If the index is missing and cannot be created, e.g. because duplicate
+                    usernames already exist or an index of that name is not unique.
+    """
+    global _usernames_unique
+    if _usernames_unique:
+        return
+
+    from pymongo.errors import PyMongoError
+
+    # Use the shared MongoDB client
+    client = get_client()
+    try:
+        await client["UserInformation"]["Users"].create_indexes(_index_models(INDEXES[("UserInformation", "Users")]))
+    except PyMongoError as pe:
+        # Log MongoDB-specific errors and refuse to go on without the index
+        indexes_logger.error(f"MongoDB error ensuring the username_unique index: {pe}")
+        raise RuntimeError(
+            f"Usernames cannot be kept unique without the username_unique index: {pe}"
+        ) from pe
+    _usernames_unique = True
+
+async def drop_legacy_indexes():
+    """
+    Drop the indexes declared in LEGACY_INDEXES, skipping any that no longer exist.
+
+    Raises:
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    from pymongo.errors import OperationFailure, PyMongoError
+
+    # Use the shared MongoDB client
+    client = get_client()
+
+    for (db_name, collection_name), specs in LEGACY_INDEXES.items():
+        collection = client[db_name][collection_name]
+        for _, options in specs:
+            name = options["name"]
+            try:
+                await collection.drop_index(name)
+                indexes_logger.info(f"Legacy index {name} dropped from {db_name}.{collection_name}.")
+            except OperationFailure:
+                # The index was already dropped
+                pass
+            except PyMongoError as pe:
+                # Log MongoDB-specific errors
+                indexes_logger.error(f"MongoDB error dropping index {name} on {db_name}.{collection_name}: {pe}")
+
+async def check_query_plans():
+    """
+    Run explain() on each query shape in QUERY_SHAPES and flag any that scan the whole collection.
+
+    Returns:
+    - list: One dict per query shape with its description, the stages of the winning plan
+            and whether the plan contains a COLLSCAN.
+
+    Raises:
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    from pymongo.errors import PyMongoError
+
+    # Use the shared MongoDB client
+    client = get_client()
+
+    results = []
+    for db_name, collection_name, description, filter_query in QUERY_SHAPES:
+        try:
+            collection = client[db_name][collection_name]
+            explanation = await collection.find(filter_query).explain()
+            stages = _plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+            collscan = "COLLSCAN" in stages
+            results.append({"query": description, "stages": stages, "collscan": collscan})
+
+            if collscan:
+                indexes_logger.warning(f"Query '{description}' on {db_name}.{collection_name} uses a COLLSCAN.")
+            else:
+                indexes_logger.info(f"Query '{description}' on {db_name}.{collection_name} uses {' > '.join(stages)}.")
+
+        except PyMongoError as pe:
+            # Log MongoDB-specific errors
+            indexes_logger.error(f"MongoDB error explaining '{description}': {pe}")
+        except Exception as e:
+            # Log unexpected errors
+            indexes_logger.error(f"Unexpected error explaining '{description}': {e}")
+
+    return results
+
+def _index_models(specs):
+    """
+    Build the IndexModels for a collection's entry in INDEXES.
+
+    Args:
+    - specs (list): (keys, options) pairs.
+
+    Returns:
+    - list: The IndexModels.
+    """
+    from pymongo import IndexModel
+
+    return [IndexModel(keys, **options) for keys, options in specs]
+
+def _plan_stages(plan):
+    """
+    Flatten a query plan tree into the list of its stage names, outermost first.
+
+    Args:
+    - plan (dict): A winningPlan from explain() output.
+
+    Returns:
+    - list: The stage names in the plan.
+    """
+    stages = []
+    # Newer servers nest the classic plan under queryPlan
+    plan = plan.get("queryPlan", plan)
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    if "inputStage" in plan:
+        stages.extend(_plan_stages(plan["inputStage"]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
@@ -0,0 +1,184 @@
+import os
+import asyncio
+import logging
+
+# Share the insert_many logger so reader events land in the import log
+insert_many_logger = logging.getLogger("insert_many_logger")
+
+# Spreadsheet row of the first data row (row 1 holds the headers)
+FIRST_DATA_ROW = 2
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+LEGACY_EXCEL_EXTENSIONS = (".xls",)
+CSV_EXTENSIONS = (".csv",)
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+
+def iter_row_batches(file_path, batch_size):
+    """
+    Stream an import file as batches of rows.
+
+    Only one batch is held in memory at a time, so peak memory is bounded by batch_size
+    rather than by the size of the file. The reader is picked from the file extension:
+    .xlsx/.xlsm use openpyxl in read-only mode, .csv uses chunked pandas parsing and
+    .parquet streams record batches with pyarrow. Legacy .xls files cannot be streamed
+    and are read in full before being split into batches.
+
+    Args:
+    - file_path (str): The path to the import file.
+    - batch_size (int): The maximum number of rows per batch.
+
+    Yields:
+    - list: (row, values) pairs, where row is the spreadsheet row number and values is
+            a dict keyed by column header.
+
+    Raises:
+    - ValueError: If the file type is not supported.
+    - FileNotFoundError: If the file does not exist.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"No such file: '{file_path}'")
+
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in EXCEL_EXTENSIONS:
+        return _iter_excel(file_path, batch_size)
+    if extension in CSV_EXTENSIONS:
+        return _iter_csv(file_path, batch_size)
+    if extension in PARQUET_EXTENSIONS:
+        return _iter_parquet(file_path, batch_size)
+    if extension in LEGACY_EXCEL_EXTENSIONS:
+        return _iter_legacy_excel(file_path, batch_size)
+    raise ValueError(f"Unsupported file type '{extension}'. Use .xlsx, .csv or .parquet.")
+
+async def read_row_batches(file_path, batch_size):
+    """
+    Stream an import file in batches like iter_row_batches, parsing each batch in a
+    worker thread so the event loop keeps serving writes while the file is read.
+
+    Args:
+    - file_path (str): The path to the import file.
+    - batch_size (int): The maximum number of rows per batch.
+
+    Yields:
+    - list: (row, values) pairs.
+
+    Raises:
+    - ValueError: If the file type is not supported.
+    - FileNotFoundError: If the file does not exist.
+    """
+    batches = iter_row_batches(file_path, batch_size)
+    while True:
+        rows = await asyncio.to_thread(next, batches, None)
+        if rows is None:
+            return
+        yield rows
+
+def _iter_excel(file_path, batch_size):
+    """
+    Stream rows from an .xlsx workbook using openpyxl's read-only mode.
+
+    Args:
+    - file_path (str): The path to the workbook.
+    - batch_size (int): The maximum number of rows per batch.
+
+    Yields:
+    - list: (row, values) pairs from the first worksheet.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = next(rows, None)
+        if headers is None:
+            return
+        headers = [str(header).strip() if header is not None else None for header in headers]
+
+        batch = []
+        for row_number, values in enumerate(rows, start=FIRST_DATA_ROW):
+            # Skip completely empty rows, as pandas does
+            if all(value is None for value in values):
+                continue
+            batch.append((row_number, {header: value for header, value in zip(headers, values) if header is not None}))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        workbook.close()
+
+def _iter_csv(file_path, batch_size):
+    """
+    Stream rows from a CSV file in chunks of batch_size rows.
+
+    Args:
+    - file_path (str): The path to the CSV file.
+    - batch_size (int): The maximum number of rows per batch.
+
+    Yields:
+    - list: (row, values) pairs.
+    """
+    import pandas as pd
+
+    row_number = FIRST_DATA_ROW
+    with pd.read_csv(file_path, chunksize=batch_size) as chunks:
+        for chunk in chunks:
+            batch = []
+            for values in _records(chunk):
+                batch.append((row_number, values))
+                row_number += 1
+            yield batch
+
+def _iter_parquet(file_path, batch_size):
+    """
+    Stream rows from a Parquet file one record batch at a time.
+
+    Args:
+    - file_path (str): The path to the Parquet file.
+    - batch_size (int): The maximum number of rows per batch.
+
+    Yields:
+    - list: (row, values) pairs, numbered as if the file had a header row.
+    """
+    import pyarrow.parquet as pq
+
+    row_number = FIRST_DATA_ROW
+    parquet_file = pq.ParquetFile(file_path)
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+        batch = []
+        for values in record_batch.to_pylist():
+            batch.append((row_number, values))
+            row_number += 1
+        yield batch
+
+def _iter_legacy_excel(file_path, batch_size):
+    """
+    Read a legacy .xls workbook with pandas and split it into batches.
+
+    Args:
+    - file_path (str): The path to the workbook.
+    - batch_size (int): The maximum number of rows per batch.
+
+    Yields:
+    - list: (row, values) pairs.
+    """
+    import pandas as pd
+
+    insert_many_logger.warning(f"{file_path} is a legacy .xls file and is read in full; convert it to .xlsx or .csv to stream it.")
+    df = pd.read_excel(file_path)
+    for start in range(0, len(df), batch_size):
+        chunk = df.iloc[start:start + batch_size]
+        yield [(FIRST_DATA_ROW + start + offset, values) for offset, values in enumerate(_records(chunk))]
+
+def _records(chunk):
+    """
+    Convert a DataFrame chunk to a list of dicts with native Python values and None for blanks.
+
+    Args:
+    - chunk (pd.DataFrame): The chunk to convert.
+
+    Returns:
+    - list: One dict per row.
+    """
+    chunk = chunk.astype(object).where(chunk.notna(), None)
+    return chunk.to_dict("records")
@@ -1,96 +1,398 @@
-import os
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import PyMongoError
+from dataclasses import dataclass, field
+from Database.Cache.store_cache import store_cache
+from Database.Connection.client import get_client
+from Database.InsertMany.file_reader import read_row_batches
+from Database.Model.store import Store, CONTENT_HASH_FIELD, RESTRICTIONS_FIELD, LEGACY_FIELDS, to_bool
+from Metrics.metrics import ROW_ERROR, instrument
+from WorkPool.work_pool import WorkPool
 import logging
-import pandas as pd
-
-# Load environment variables from the .env file
-load_dotenv()
-
-# Retrieve MongoDB connection string from environment variables
-uri = os.getenv("MONGO_CONNECTION_STRING")
 
 # Initialize a logger for the insert_many module
 insert_many_logger = logging.getLogger("insert_many_logger")
 insert_many_logger.setLevel(logging.DEBUG)
 
-async def insert_documents(file_path):
+# Number of documents sent to MongoDB per insert_many call
+DEFAULT_BATCH_SIZE = 1000
+
+# Number of batches (bulk mode) or rows (row-by-row mode) being written at once
+DEFAULT_CONCURRENCY = 4
+
+# MongoDB error code for a duplicate key violation
+DUPLICATE_KEY_ERROR = 11000
+
+# Columns every row of the import file must provide
+REQUIRED_COLUMNS = ("ID", "Store Name", "Store Address", "Store Postcode", "Kilometers", "Tail Lift")
+
+# Legacy copies of the imported fields, removed when sync_documents rewrites a store
+_LEGACY_IMPORTED = {legacy: "" for field, legacy in LEGACY_FIELDS.items() if field != RESTRICTIONS_FIELD}
+
+@dataclass
+class ImportReport:
+    """
+    Data class collecting the per-row outcome of an import.
+
+    Attributes:
+    - inserted (list): IDs of the documents that were inserted.
+    - duplicates (list): (row, ID) pairs rejected because the ID already exists.
+    - invalid (list): (row, reason) pairs that failed validation and were not sent.
+    - failed (list): (row, reason) pairs rejected by MongoDB for any other reason.
+    - error (str): The error that stopped the import part way, such as a missing file, or None.
     """
-    Insert multiple documents into the 'Stores' collection based on data from an Excel file.
+    inserted: list = field(default_factory=list)
+    duplicates: list = field(default_factory=list)
+    invalid: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+    error: str = None
+
+    def summary(self):
+        """
+        Return a one-line summary of the import.
+
+        Returns:
+        - str: Counts for each outcome.
+        """
+        return (f"{len(self.inserted)} inserted, {len(self.duplicates)} duplicates, "
+                f"{len(self.invalid)} invalid, {len(self.failed)} failed")
+
+@dataclass
+class SyncReport:
+    """
+    Data class collecting the outcome of a diff-sync import.
+
+    Attributes:
+    - inserted (list): IDs of stores that were new in the file.
+    - updated (list): IDs of stores whose imported fields changed.
+    - deleted (list): IDs of stores missing from the file that were removed.
+    - unchanged (int): The number of stores that were already up to date.
+    - invalid (list): (row, reason) pairs that failed validation and were skipped.
+    """
+    inserted: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    deleted: list = field(default_factory=list)
+    unchanged: int = 0
+    invalid: list = field(default_factory=list)
+
+    def summary(self):
+        """
+        Return a one-line summary of the sync.
+
+        Returns:
+        - str: Counts for each outcome.
+        """
+        return (f"{len(self.inserted)} inserted, {len(self.updated)} updated, {len(self.deleted)} deleted, "
+                f"{self.unchanged} unchanged, {len(self.invalid)} invalid")
+
+@instrument("insert_documents", insert_many_logger, documents=lambda report: len(report.inserted))
+async def insert_documents(file_path, batch_size=DEFAULT_BATCH_SIZE, bulk=True, concurrency=DEFAULT_CONCURRENCY, progress=None):
+    """
+    Insert multiple documents into the 'Stores' collection based on data from an Excel, CSV or Parquet file.
+
+    The file is streamed in batches of batch_size rows, parsed in a worker thread, and
+    written through a WorkPool, so parsing and up to concurrency writes overlap. The pool
+    only reads ahead as far as the writes keep up, so at most concurrency batches are
+    held in memory.
+
+    In bulk mode (the default) each batch is validated and sent with one unordered insert_many
+    call, so the import costs one round trip per batch instead of one per row.
+    With bulk=False each row is inserted with its own insert_one call, with concurrency
+    rows in flight at once.
 
     Args:
-    - file_path (str): The path to the Excel file containing store information.
+    - file_path (str): The path to the .xlsx, .csv or .parquet file containing store information.
+    - batch_size (int): The number of rows read and inserted per batch.
+    - bulk (bool): Whether to use the batched insert_many path.
+    - concurrency (int): The number of batches, or rows with bulk=False, written at once.
+    - progress (callable): Called as progress(completed, None) after each batch or row is written.
+
+    Returns:
+    - ImportReport: The per-row result of the import.
 
     Raises:
     - PyMongoError: If an error occurs during the MongoDB operation.
     - Exception: For unexpected errors during the process.
     """
+    from pymongo.errors import PyMongoError
+
+    report = ImportReport()
     try:
-        # Establish a connection to the MongoDB server
-        client = AsyncIOMotorClient(uri)
+        # Use the shared MongoDB client
+        client = get_client()
         db = client["StoreInformation"]
         collection = db["Stores"]
 
-        # Read data from the Excel file into a DataFrame
-        df = pd.read_excel(file_path)
+        pool = WorkPool(concurrency, progress=progress)
+        if bulk:
+            await pool.map(
+                lambda rows: _validate_and_insert_batch(collection, rows, report),
+                read_row_batches(file_path, batch_size)
+            )
+        else:
+            # Insert the rows individually, with several in flight at once
+            await pool.map(
+                lambda numbered_row: _validate_and_insert(collection, numbered_row[1], numbered_row[0], report),
+                _read_rows(file_path, batch_size)
+            )
 
-        # Iterate over each row in the DataFrame and insert documents
-        for _, row in df.iterrows():
-            await _validate_and_insert(collection, row)
+        insert_many_logger.info(f"Import of {file_path} finished: {report.summary()}")
 
     except PyMongoError as pe:
         # Log MongoDB-specific errors
         insert_many_logger.error(f"MongoDB error: {pe}")
+        report.error = f"MongoDB error: {pe}"
     except Exception as e:
         # Log unexpected errors
         insert_many_logger.error(f"Unexpected error: {e}")
+        report.error = f"Unexpected error: {e}"
 
-    finally:
-        # Close the MongoDB client and log closure attempt
-        if client:
-            client.close()
-            insert_many_logger.info("MongoDB client closed successfully.")
+    # Drop any cached copies of the stores that were written
+    store_cache.invalidate(*report.inserted)
+
+    return report
+
+async def _read_rows(file_path, batch_size):
+    """
+    Stream the rows of the import file, parsing them a batch at a time in a worker thread.
+
+    Args:
+    - file_path (str): The path to the import file.
+    - batch_size (int): The number of rows parsed per batch.
+
+    Yields:
+    - tuple: (row, values).
+    """
+    async for rows in read_row_batches(file_path, batch_size):
+        for numbered_row in rows:
+            yield numbered_row
+
+async def _validate_and_insert_batch(collection, rows, report):
+    """
+    Validate a batch of rows and insert the valid ones with a single insert_many call.
+
+    Args:
+    - collection: The MongoDB collection to insert the documents into.
+    - rows (list): (row, values) pairs read from the import file.
+    - report (ImportReport): The report to record each row's outcome in.
+    """
+    batch = []
+    for row_number, row in rows:
+        try:
+            batch.append((row_number, _build_document(row)))
+        except ValueError as ve:
+            insert_many_logger.error(f"Validation error on row {row_number}: {ve}", extra=ROW_ERROR)
+            report.invalid.append((row_number, str(ve)))
+
+    if batch:
+        await _insert_batch(collection, batch, report)
+
+def _build_document(row):
+    """
+    Validate a row from the import file and build the store document for it.
+
+    Args:
+    - row (dict): A row from the import file containing store information.
+
+    Returns:
+    - dict: The store document.
+
+    Raises:
+    - ValueError: If a required column is missing from the row, or the ID, kilometers
+                  or tail lift value cannot be converted to its type.
+    """
+    for column in REQUIRED_COLUMNS:
+        if column not in row:
+            raise ValueError(f"Column '{column}' not found in the row.")
 
-async def _validate_and_insert(collection, row):
+    # Extract typed values from the row and encode them as a compact document
+    try:
+        store = Store(
+            id=int(row["ID"]),
+            name=row["Store Name"],
+            address=row["Store Address"],
+            postcode=row["Store Postcode"],
+            kilometers=float(row["Kilometers"]) if row["Kilometers"] is not None else None,
+            tail_lift=to_bool(row["Tail Lift"])
+        )
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid value: {e}")
+    store.content_hash = store.imported_hash()
+    return store.to_document()
+
+async def _insert_batch(collection, batch, report):
+    """
+    Insert a batch of documents with one unordered insert_many call and record the outcome.
+
+    Because the insert is unordered, a failing document does not stop the rest of the batch.
+
+    Args:
+    - collection: The MongoDB collection to insert the documents into.
+    - batch (list): (row, document) pairs to insert.
+    - report (ImportReport): The report to record each row's outcome in.
+    """
+    from pymongo.errors import BulkWriteError, PyMongoError
+
+    documents = [document for _, document in batch]
+    try:
+        await collection.insert_many(documents, ordered=False)
+        report.inserted.extend(document["_id"] for document in documents)
+        insert_many_logger.info(f"Inserted batch of {len(documents)} documents.")
+
+    except BulkWriteError as bwe:
+        # Record the rows MongoDB rejected; every other row in the batch was inserted
+        rejected = set()
+        for error in bwe.details.get("writeErrors", []):
+            row_number, document = batch[error["index"]]
+            rejected.add(error["index"])
+            if error.get("code") == DUPLICATE_KEY_ERROR:
+                report.duplicates.append((row_number, document["_id"]))
+            else:
+                report.failed.append((row_number, error.get("errmsg", "Unknown error")))
+
+        report.inserted.extend(document["_id"] for index, (_, document) in enumerate(batch) if index not in rejected)
+        insert_many_logger.warning(f"Batch of {len(documents)} documents inserted with {len(rejected)} rejected rows.")
+
+    except PyMongoError as pe:
+        # The batch could not be written at all
+        insert_many_logger.error(f"MongoDB error: {pe}")
+        report.failed.extend((row_number, str(pe)) for row_number, _ in batch)
+
+async def _validate_and_insert(collection, row, row_number, report):
     """
     Validate and insert a single document into the 'Stores' collection.
 
     Args:
     - collection: The MongoDB collection to insert the document into.
-    - row (pd.Series): A row from the DataFrame containing store information.
+    - row (dict): A row from the import file containing store information.
+    - row_number (int): The spreadsheet row the data came from.
+    - report (ImportReport): The report to record the row's outcome in.
 
     Raises:
     - ValueError: If a validation error occurs, such as a missing column.
     - PyMongoError: If an error occurs during the MongoDB operation.
     - Exception: For unexpected errors during the process.
     """
+    from pymongo.errors import DuplicateKeyError, PyMongoError
+
     try:
-        # Validate that the 'Tail Lift' column is present in the row
-        if 'Tail Lift' not in row:
-            raise ValueError("Column 'Tail Lift' not found in the row.")
-
-        # Extract values from the row and create a document
-        tail_lift = bool(row["Tail Lift"])
-        document = {
-            "_id": row["ID"],
-            "Store name": row["Store Name"],
-            "Store Address": row["Store Address"],
-            "Store Postcode": row["Store Postcode"],
-            "Kilometers": row["Kilometers"],
-            "Does the store require a tail lift? (True/False)": tail_lift
-        }
+        document = _build_document(row)
 
         # Insert the document into the collection and log the result
         result = await collection.insert_one(document)
         insert_many_logger.info(f"Document inserted with ID: {result.inserted_id}")
+        report.inserted.append(result.inserted_id)
 
     except ValueError as ve:
         # Log validation errors
-        insert_many_logger.error(f"Validation error: {ve}")
+        insert_many_logger.error(f"Validation error on row {row_number}: {ve}", extra=ROW_ERROR)
+        report.invalid.append((row_number, str(ve)))
+    except DuplicateKeyError:
+        # Log duplicate IDs
+        insert_many_logger.error(f"Duplicate ID on row {row_number}: {row.get('ID')}", extra=ROW_ERROR)
+        report.duplicates.append((row_number, row.get("ID")))
     except PyMongoError as pe:
         # Log MongoDB-specific errors
         insert_many_logger.error(f"MongoDB error: {pe}")
+        report.failed.append((row_number, str(pe)))
     except Exception as e:
         # Log unexpected errors
         insert_many_logger.error(f"Unexpected error: {e}")
+        report.failed.append((row_number, str(e)))
+
+@instrument("sync_documents", insert_many_logger, documents=lambda report: len(report.inserted) + len(report.updated) + len(report.deleted))
+async def sync_documents(file_path, batch_size=DEFAULT_BATCH_SIZE, delete_missing=False):
+    """
+    Re-import a store master file, writing only the stores that changed.
+
+    The current IDs and content hashes are loaded from the 'Stores' collection with one
+    projected query. The file is then streamed and compared against them, and the delta is
+    applied with a single unordered bulk_write of upserts (plus one delete for stores missing
+    from the file when delete_missing is set). Running the same file twice writes nothing.
+
+    Only the imported columns are written, so fields managed elsewhere, such as the
+    store restrictions, are left untouched. Any legacy copies of the imported fields
+    are removed as the store is rewritten.
+
+    With delete_missing, the sync is refused before anything is written if any row is
+    invalid: the stores on those rows are missing from the valid rows too, so a wrong
+    header would otherwise delete the whole collection. Write failures are raised
+    rather than reported as a successful sync.
+
+    Args:
+    - file_path (str): The path to the .xlsx, .csv or .parquet file containing store information.
+    - batch_size (int): The number of rows read per batch.
+    - delete_missing (bool): Whether to delete stores that are not in the file.
+
+    Returns:
+    - SyncReport: The outcome of the sync.
+
+    Raises:
+    - ValueError: If delete_missing is set and the file has invalid rows, or the file type is not supported.
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    from pymongo import DeleteMany, UpdateOne
+    from pymongo.errors import PyMongoError
+
+    report = SyncReport()
+    written = []
+    try:
+        # Use the shared MongoDB client
+        client = get_client()
+        db = client["StoreInformation"]
+        collection = db["Stores"]
+
+        # Load the current IDs and content hashes in a single projected query
+        existing = {}
+        async for document in collection.find({}, {CONTENT_HASH_FIELD: 1}):
+            existing[document["_id"]] = document.get(CONTENT_HASH_FIELD)
+
+        # Compare the file against the collection and queue only the changes
+        operations = []
+        seen = set()
+        async for rows in read_row_batches(file_path, batch_size):
+            for row_number, row in rows:
+                try:
+                    document = _build_document(row)
+                except ValueError as ve:
+                    insert_many_logger.error(f"Validation error on row {row_number}: {ve}", extra=ROW_ERROR)
+                    report.invalid.append((row_number, str(ve)))
+                    continue
+
+                document_id = document.pop("_id")
+                seen.add(document_id)
+                if document_id not in existing:
+                    report.inserted.append(document_id)
+                elif existing[document_id] != document[CONTENT_HASH_FIELD]:
+                    report.updated.append(document_id)
+                else:
+                    report.unchanged += 1
+                    continue
+                operations.append(UpdateOne({"_id": document_id}, {"$set": document, "$unset": _LEGACY_IMPORTED}, upsert=True))
+
+        if delete_missing:
+            missing = [document_id for document_id in existing if document_id not in seen]
+            if missing and report.invalid:
+                raise ValueError(f"Refusing to delete {len(missing)} stores missing from {file_path}: "
+                                 f"{len(report.invalid)} rows are invalid and their stores would be deleted too.")
+            report.deleted = missing
+            if report.deleted:
+                operations.append(DeleteMany({"_id": {"$in": report.deleted}}))
+
+        # Apply the delta in one round trip
+        if operations:
+            written = [*report.inserted, *report.updated, *report.deleted]
+            await collection.bulk_write(operations, ordered=False)
+        insert_many_logger.info(f"Sync of {file_path} finished: {report.summary()}")
+
+    except PyMongoError as pe:
+        # Log MongoDB-specific errors and fail the sync, as part of the delta may not have been applied
+        insert_many_logger.error(f"MongoDB error: {pe}")
+        raise
+    except Exception as e:
+        # Log unexpected errors
+        insert_many_logger.error(f"Sync error: {e}")
+        raise
+    finally:
+        # Drop any cached copies of the stores that were sent, even if the write failed part way
+        store_cache.invalidate(*written)
+
+    return report
@@ -1,15 +1,9 @@
-import os
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import PyMongoError
+from Database.Cache.store_cache import store_cache
+from Database.Connection.client import get_client
+from Database.Model.store import Store
+from Metrics.metrics import instrument
 import logging
 
-# Load environment variables from the .env file
-load_dotenv()
-
-# Retrieve MongoDB connection string from environment variables
-uri = os.getenv("MONGO_CONNECTION_STRING")
-
 # Initialize a logger for the insert_one module
 insert_one_logger = logging.getLogger("insert_one_logger")
 insert_one_logger.setLevel(logging.DEBUG)
@@ -35,6 +29,7 @@ def validate_tail_lift(tail_lift):
         return False
     return True
 
+@instrument("insert_document", insert_one_logger)
 async def insert_document(id, store_name, store_address, store_postcode, kms, tail_lift, store_restrictions):
     """
     Insert a single document into the 'Stores' collection.
@@ -48,44 +43,52 @@ async def insert_document(id, store_name, store_address, store_postcode, kms, ta
     - tail_lift (bool): The tail lift requirement (True or False).
     - store_restrictions (dict): Store restrictions for each day of the week.
 
+    Returns:
+    - int: The ID of the inserted document, or None if it was not inserted because the
+           tail lift value is invalid or a store with that ID already exists.
+
     Raises:
-    - PyMongoError: If an error occurs during the MongoDB operation.
+    - PyMongoError: If any other error occurs during the MongoDB operation.
     - Exception: For unexpected errors during the process.
     """
+    from pymongo.errors import DuplicateKeyError, PyMongoError
+
     if not validate_tail_lift(tail_lift):
-        return
+        return None
 
-    client = None
     try:
-        # Connect to the MongoDB database
-        client = AsyncIOMotorClient(uri)
+        # Use the shared MongoDB client
+        client = get_client()
         db = client["StoreInformation"]
         collection = db["Stores"]
 
-        # Create a document to insert
-        document = {
-            "_id": int(id),
-            "Store name": store_name,
-            "Store Address": store_address,
-            "Store Postcode": store_postcode,
-            "Kilometers": kms,
-            "Does the store require a tail lift? (True/False)": bool(tail_lift),
-            "Store Restrictions": store_restrictions
-        }
+        # Create a compact document to insert
+        store = Store(
+            id=int(id),
+            name=store_name,
+            address=store_address,
+            postcode=store_postcode,
+            kilometers=float(kms),
+            tail_lift=bool(tail_lift),
+            restrictions=store_restrictions
+        )
+        store.content_hash = store.imported_hash()
+        document = store.to_document()
 
         # Insert the document
         result = await collection.insert_one(document)
+        store_cache.invalidate(result.inserted_id)
         insert_one_logger.info(f"Document inserted with ID: {result.inserted_id}")
+        return result.inserted_id
 
+    except DuplicateKeyError:
+        # The store already exists
+        insert_one_logger.warning(f"A store with ID {id} already exists. Not inserted.")
     except PyMongoError as pe:
-        # Log MongoDB-specific errors
+        # Log MongoDB-specific errors and raise them, so a failed write is not taken for a duplicate
         insert_one_logger.error(f"MongoDB error: {pe}")
+        raise
     except Exception as e:
         # Log unexpected errors
         insert_one_logger.error(f"Unexpected error: {e}")
-
-    finally:
-        # Close the MongoDB client and log closure attempt
-        if client:
-            client.close()
-            insert_one_logger.info("MongoDB client closed successfully.")
+    return None
@@ -0,0 +1,187 @@
+from dataclasses import dataclass
+from Database.Cache.store_cache import store_cache
+from Database.Connection.client import get_client
+from Database.Migration.status import mark_migrated
+from Database.Model.store import (Store, ID_FIELD, RESTRICTIONS_FIELD, WINDOWS_FIELD, ATTRIBUTE_FIELDS,
+                                  LEGACY_FIELDS, LEGACY_FILTER)
+from Database.SearchAll.search_all import iter_stores
+from Metrics.metrics import instrument
+from WorkPool.work_pool import WorkPool
+import logging
+
+# Initialize a logger for the migration module
+migration_logger = logging.getLogger("migration_logger")
+migration_logger.setLevel(logging.DEBUG)
+
+# Number of stores rewritten per bulk_write
+DEFAULT_BATCH_SIZE = 500
+
+# Number of bulk_writes in flight at once
+DEFAULT_CONCURRENCY = 4
+
+# Passes over the collection to pick up stores that changed while they were being migrated
+DEFAULT_MAX_PASSES = 3
+
+# Stores still carrying legacy fields, or with restrictions written before opening windows existed
+MIGRATION_FILTER = {"$or": [
+    *LEGACY_FILTER["$or"],
+    {RESTRICTIONS_FIELD: {"$exists": True}, WINDOWS_FIELD: {"$exists": False}},
+]}
+
+# Fields the Store model owns, in either layout; every other field is carried over as is
+_MODEL_FIELDS = {*ATTRIBUTE_FIELDS.values(), *LEGACY_FIELDS.values(), WINDOWS_FIELD}
+
+@dataclass
+class MigrationReport:
+    """
+    Data class collecting the outcome of a store schema migration.
+
+    Attributes:
+    - scanned (int): The number of documents read for migration, over all passes.
+    - migrated (int): The number of documents rewritten in the compact layout.
+    - conflicts (int): The number of rewrites skipped because the store changed after it
+                       was read; they are retried on the next pass.
+    - skipped (int): The number of documents left as they are, over all passes, because a
+                     value such as the kilometers could not be decoded; fix them by hand.
+    - remaining (int): The number of documents left to migrate after the last pass, or None
+                       if the migration failed before they were counted.
+    - passes (int): The number of passes made.
+    """
+    scanned: int = 0
+    migrated: int = 0
+    conflicts: int = 0
+    skipped: int = 0
+    remaining: int = None
+    passes: int = 0
+
+    def summary(self):
+        """
+        Return a one-line summary of the migration.
+
+        Returns:
+        - str: Counts for each outcome.
+        """
+        return (f"{self.migrated} migrated, {self.conflicts} conflicts, {self.skipped} skipped, {self.remaining} remaining "
+                f"after {self.passes} passes ({self.scanned} scanned)")
+
+@instrument("migrate_stores", migration_logger, documents=lambda report: report.migrated)
+async def migrate_stores(batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY,
+                         max_passes=DEFAULT_MAX_PASSES, drop_legacy=True, progress=None):
+    """
+    Rewrite stores that still use the long legacy field names in the compact layout, and
+    add the opening windows to stores whose restrictions were written before them.
+
+    The migration runs online: the application keeps reading and writing while it runs,
+    as the Store model reads both layouts. Each store is replaced with a filter on its
+    full original contents, so a store changed by another writer after it was read is
+    left alone and picked up by the next pass instead of having that change overwritten.
+    Fields the model does not know about are carried over unchanged. Stores with values
+    the model cannot decode, such as "N/A" kilometers, are counted and skipped rather than
+    rewritten without them, so the migration is not recorded as finished until they are fixed.
+
+    Once no legacy stores remain, the migration is recorded as finished, so criteria stop
+    matching the legacy fields, and the indexes on the legacy field names are dropped.
+
+    Args:
+    - batch_size (int): The number of stores rewritten per bulk_write.
+    - concurrency (int): The number of bulk_writes in flight at once.
+    - max_passes (int): The maximum number of passes over the collection.
+    - drop_legacy (bool): Whether to drop the legacy indexes once every store is migrated.
+    - progress (callable): Called as progress(completed, None) after each batch is written.
+
+    Returns:
+    - MigrationReport: The outcome of the migration.
+
+    Raises:
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    from pymongo import ReplaceOne
+    from pymongo.errors import PyMongoError
+
+    report = MigrationReport()
+    try:
+        # Use the shared MongoDB client
+        client = get_client()
+        db = client["StoreInformation"]
+        collection = db["Stores"]
+
+        async def write_batch(documents):
+            report.scanned += len(documents)
+            operations = []
+            for document in documents:
+                try:
+                    operations.append(ReplaceOne(document, _compact(document)))
+                except ValueError as ve:
+                    migration_logger.warning(f"Skipping store {document.get(ID_FIELD)}: {ve}")
+                    report.skipped += 1
+            if not operations:
+                return
+            result = await collection.bulk_write(operations, ordered=False)
+            report.migrated += result.modified_count
+            report.conflicts += len(operations) - result.matched_count
+            store_cache.invalidate(*(document[ID_FIELD] for document in documents))
+
+        for _ in range(max_passes):
+            report.passes += 1
+            migrated_before = report.migrated
+            await WorkPool(concurrency, progress=progress).map(write_batch, _pending_batches(batch_size))
+
+            report.remaining = await collection.count_documents(MIGRATION_FILTER)
+            migration_logger.info(f"Migration pass {report.passes} finished: {report.remaining} stores remaining.")
+            if report.remaining == 0 or report.migrated == migrated_before:
+                break
+
+        if report.remaining == 0:
+            # Record the migration, which also drops the indexes the legacy criteria branches used
+            await mark_migrated(drop_legacy=drop_legacy)
+
+        migration_logger.info(f"Store migration finished: {report.summary()}")
+
+    except PyMongoError as pe:
+        # Log MongoDB-specific errors
+        migration_logger.error(f"MongoDB error: {pe}")
+    except Exception as e:
+        # Log unexpected errors
+        migration_logger.error(f"Unexpected error: {e}")
+
+    return report
+
+async def _pending_batches(batch_size):
+    """
+    Stream the stores still to be migrated in batches.
+
+    Args:
+    - batch_size (int): The number of stores per batch.
+
+    Yields:
+    - list: The documents in the batch.
+    """
+    batch = []
+    async for document in iter_stores(MIGRATION_FILTER, batch_size=batch_size):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _compact(document):
+    """
+    Build the compact replacement for a store document, with its opening windows.
+
+    Args:
+    - document (dict): The document as read.
+
+    Returns:
+    - dict: The replacement, with the content hash recomputed for the compact layout.
+
+    Raises:
+    - ValueError: If a value of the store cannot be decoded.
+    """
+    store = Store.from_document(document, strict=True)
+    store.content_hash = store.imported_hash()
+    replacement = store.to_document()
+    replacement.pop(ID_FIELD)
+    replacement.update({field: value for field, value in document.items() if field not in _MODEL_FIELDS})
+    return replacement
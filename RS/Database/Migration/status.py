@@ -0,0 +1,76 @@
+from Database.Connection.client import get_client
+from Database.Indexes.indexes import drop_legacy_indexes
+from Database.Model.store import LEGACY_FILTER
+import logging
+
+# Share the migration module's logger so status checks land next to the migration runs
+migration_logger = logging.getLogger("migration_logger")
+
+# Collection recording finished migrations, and the record for the compact store schema
+MIGRATIONS_COLLECTION = "Migrations"
+COMPACT_STORES_MIGRATION = "compact_stores"
+
+# Whether stores may still use the legacy field names; assumed until the database says otherwise
+_legacy_pending = True
+
+def legacy_pending():
+    """
+    Return whether stores may still use the legacy field names.
+
+    Returns:
+    - bool: True until load_migration_status() has found the compact store migration
+            finished or no store in the legacy layout, or mark_migrated() has run.
+    """
+    return _legacy_pending
+
+async def load_migration_status():
+    """
+    Read whether the compact store migration has finished, with one lookup by ID.
+
+    Called at startup. Without a finished record, one store still in the legacy layout is
+    looked for, so an empty or newly created database never matches the legacy fields.
+    If the status cannot be read, legacy stores are assumed to remain, which keeps
+    queries correct at the cost of also matching the legacy fields.
+
+    Returns:
+    - bool: Whether stores may still use the legacy field names.
+    """
+    global _legacy_pending
+    from pymongo.errors import PyMongoError
+
+    try:
+        client = get_client()
+        db = client["StoreInformation"]
+        record = await db[MIGRATIONS_COLLECTION].find_one({"_id": COMPACT_STORES_MIGRATION})
+        if record and record.get("completed"):
+            _legacy_pending = False
+        else:
+            _legacy_pending = await db["Stores"].find_one(LEGACY_FILTER, {"_id": 1}) is not None
+    except PyMongoError as pe:
+        # Log MongoDB-specific errors
+        migration_logger.error(f"MongoDB error reading the migration status: {pe}")
+        _legacy_pending = True
+    return _legacy_pending
+
+async def mark_migrated(drop_legacy=True):
+    """
+    Record that no store uses the legacy field names any more, then drop the legacy indexes.
+
+    The record is written first, so criteria stop matching the legacy fields before the
+    indexes serving those branches go.
+
+    Args:
+    - drop_legacy (bool): Whether to drop the LEGACY_INDEXES. Default is True.
+
+    Raises:
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    """
+    global _legacy_pending
+    client = get_client()
+    await client["StoreInformation"][MIGRATIONS_COLLECTION].update_one(
+        {"_id": COMPACT_STORES_MIGRATION}, {"$set": {"completed": True}}, upsert=True
+    )
+    _legacy_pending = False
+    migration_logger.info("Compact store migration recorded as finished.")
+    if drop_legacy:
+        await drop_legacy_indexes()
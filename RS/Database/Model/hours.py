@@ -0,0 +1,178 @@
+import re
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Opening hours text meaning the store takes no deliveries that day
+CLOSED = ("closed", "shut", "none", "n/a", "-")
+
+# Opening hours text meaning the store takes deliveries all day
+ALL_DAY = ("24 hours", "24h", "24hrs", "24/7", "open 24 hours", "all day")
+
+# One time of day: "9", "09:00", "9.30", "9am", "05:00 PM"
+_TIME = r"(\d{1,2})(?:[:.](\d{2}))?\s*([ap])?\.?(?:m\.?)?"
+_TIME_PATTERN = re.compile(_TIME, re.IGNORECASE)
+_RANGE_PATTERN = re.compile(rf"{_TIME}\s*(?:-|–|to|until)\s*{_TIME}", re.IGNORECASE)
+
+# Separators between the ranges of a split day, e.g. "09:00 - 12:00, 13:00 - 17:00"
+_SEPARATOR_PATTERN = re.compile(r"\s*(?:,|;|&|\band\b)\s*", re.IGNORECASE)
+
+def parse_time(text):
+    """
+    Parse a time of day into minutes after midnight.
+
+    Args:
+    - text (str): A time such as "10:30", "9am" or "05:00 PM". "24:00" is the end of the day.
+
+    Returns:
+    - int: Minutes after midnight, from 0 to MINUTES_PER_DAY.
+
+    Raises:
+    - ValueError: If the text is not a time.
+    """
+    match = _TIME_PATTERN.fullmatch(str(text).strip())
+    if not match:
+        raise ValueError(f"'{text}' is not a time. Use e.g. 10:30 or 10:30 AM.")
+    return _minutes(*match.groups(), text=text)
+
+def parse_hours(text):
+    """
+    Parse one day's opening hours into minute ranges.
+
+    Accepts the "09:00 AM - 05:00 PM" form the application prompts for, 24-hour times,
+    several ranges separated by commas, "Closed" and "24 hours". When only one end of a
+    range has AM/PM the other end shares it, so "9am - 5" is 9am to 5pm. A range ending at
+    or before its start runs past midnight into the next day, except that one without
+    AM/PM between hours 1 and 12, such as "9 - 5", is rejected as ambiguous.
+
+    Args:
+    - text (str): The opening hours text.
+
+    Returns:
+    - list: (start, end) pairs in minutes after midnight, end exclusive; end is above
+            MINUTES_PER_DAY for ranges running past midnight. Empty when closed.
+
+    Raises:
+    - ValueError: If the text cannot be read as opening hours.
+    """
+    normalized = str(text).strip().lower()
+    if not normalized or normalized in CLOSED:
+        return []
+    if normalized in ALL_DAY:
+        return [(0, MINUTES_PER_DAY)]
+
+    ranges = []
+    for part in _SEPARATOR_PATTERN.split(normalized):
+        match = _RANGE_PATTERN.fullmatch(part)
+        if not match:
+            raise ValueError(f"Cannot read opening hours '{text}'. Use e.g. 09:00 AM - 05:00 PM.")
+        start_hour, start_minute, start_meridiem, end_hour, end_minute, end_meridiem = match.groups()
+
+        if start_meridiem is None and end_meridiem is not None:
+            # "9 - 5pm": the start shares the end's meridiem unless that puts it after the end
+            end = _minutes(end_hour, end_minute, end_meridiem, text=text)
+            start = _minutes(start_hour, start_minute, end_meridiem, text=text)
+            if start >= end:
+                start = _minutes(start_hour, start_minute, _other_meridiem(end_meridiem), text=text)
+        elif end_meridiem is None and start_meridiem is not None:
+            # "9am - 5": the end shares the start's meridiem unless that puts it before the start
+            start = _minutes(start_hour, start_minute, start_meridiem, text=text)
+            end = _minutes(end_hour, end_minute, start_meridiem, text=text)
+            if end <= start:
+                end = _minutes(end_hour, end_minute, _other_meridiem(start_meridiem), text=text)
+        else:
+            start = _minutes(start_hour, start_minute, start_meridiem, text=text)
+            end = _minutes(end_hour, end_minute, end_meridiem, text=text)
+            if start_meridiem is None and end <= start and 1 <= int(start_hour) <= 12 and 1 <= int(end_hour) <= 12:
+                # "9 - 5" is almost always 9am to 5pm, not an overnight 24-hour range, so make it explicit
+                raise ValueError(f"Cannot read opening hours '{text}': add AM/PM, e.g. 9am - 5pm, "
+                                 f"or use 24-hour times, e.g. 21:00 - 05:00.")
+
+        if start == MINUTES_PER_DAY:
+            raise ValueError(f"Cannot read opening hours '{text}': a range cannot start at 24:00.")
+        if end <= start:
+            # Equal times mean open around the clock, earlier ones run past midnight
+            end += MINUTES_PER_DAY
+        ranges.append((start, end))
+    return sorted(ranges)
+
+def day_windows(day_index, text):
+    """
+    Parse one day's opening hours into minute-of-week windows.
+
+    Minute 0 is Monday 00:00. A Sunday range running past midnight is split at the end
+    of the week, so every window lies within 0 and MINUTES_PER_WEEK.
+
+    Args:
+    - day_index (int): The weekday, 0 for Monday to 6 for Sunday.
+    - text (str): The opening hours text.
+
+    Returns:
+    - list: (start, end) minute-of-week pairs, end exclusive.
+
+    Raises:
+    - ValueError: If the text cannot be read as opening hours.
+    """
+    offset = day_index * MINUTES_PER_DAY
+    windows = []
+    for start, end in parse_hours(text):
+        windows.extend(week_ranges(offset + start, offset + end))
+    return windows
+
+def week_ranges(start, end):
+    """
+    Wrap a minute range onto the week, splitting it where it crosses Sunday midnight.
+
+    Args:
+    - start (int): The first minute, counted from Monday 00:00.
+    - end (int): The minute after the last, at most one week after start.
+
+    Returns:
+    - list: One or two (start, end) pairs within 0 and MINUTES_PER_WEEK.
+    """
+    length = end - start
+    start %= MINUTES_PER_WEEK
+    end = start + length
+    if end <= MINUTES_PER_WEEK:
+        return [(start, end)]
+    return [(start, MINUTES_PER_WEEK), (0, end - MINUTES_PER_WEEK)]
+
+def _other_meridiem(meridiem):
+    """
+    Return the opposite meridiem.
+
+    Args:
+    - meridiem (str): "a" or "p", in either case.
+
+    Returns:
+    - str: "p" for "a" and "a" for "p".
+    """
+    return "p" if meridiem.lower() == "a" else "a"
+
+def _minutes(hour, minute, meridiem, text):
+    """
+    Convert the parts of a parsed time to minutes after midnight.
+
+    Args:
+    - hour (str): The hour digits.
+    - minute (str): The minute digits, or None.
+    - meridiem (str): "a", "p" or None for a 24-hour time.
+    - text (str): The original text, for error messages.
+
+    Returns:
+    - int: Minutes after midnight.
+
+    Raises:
+    - ValueError: If the hour or minute is out of range.
+    """
+    hour = int(hour)
+    minute = int(minute or 0)
+    if minute > 59:
+        raise ValueError(f"Invalid minutes in '{text}'.")
+    if meridiem is not None:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"Invalid hour in '{text}': use 1-12 with AM/PM.")
+        hour = hour % 12 + (12 if meridiem.lower() == "p" else 0)
+    elif hour > 24 or (hour == 24 and minute):
+        raise ValueError(f"Invalid hour in '{text}'.")
+    return hour * 60 + minute
@@ -0,0 +1,303 @@
+import json
+import hashlib
+import logging
+from dataclasses import dataclass, asdict
+from Database.Model.hours import day_windows
+
+# Initialize a logger for the store model
+store_model_logger = logging.getLogger("store_model_logger")
+store_model_logger.setLevel(logging.DEBUG)
+
+# Days of the week a store can have restrictions for
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# Two-letter keys the restrictions are stored under
+DAY_CODES = {"Monday": "mo", "Tuesday": "tu", "Wednesday": "we", "Thursday": "th",
+             "Friday": "fr", "Saturday": "sa", "Sunday": "su"}
+
+# Compact on-disk field names
+ID_FIELD = "_id"
+NAME_FIELD = "n"
+ADDRESS_FIELD = "a"
+POSTCODE_FIELD = "p"
+KILOMETERS_FIELD = "km"
+TAIL_LIFT_FIELD = "tl"
+RESTRICTIONS_FIELD = "r"
+CONTENT_HASH_FIELD = "h"
+
+# Opening hours as minute-of-week windows, derived from the restrictions on every write:
+# [{"d": day code, "s": first minute, "e": minute after the last}], minute 0 being Monday 00:00
+WINDOWS_FIELD = "w"
+
+# Store attribute -> on-disk field
+ATTRIBUTE_FIELDS = {
+    "id": ID_FIELD,
+    "name": NAME_FIELD,
+    "address": ADDRESS_FIELD,
+    "postcode": POSTCODE_FIELD,
+    "kilometers": KILOMETERS_FIELD,
+    "tail_lift": TAIL_LIFT_FIELD,
+    "restrictions": RESTRICTIONS_FIELD,
+    "content_hash": CONTENT_HASH_FIELD,
+}
+
+# Field names used before the compact schema, so documents that have not been
+# migrated yet can still be read
+LEGACY_FIELDS = {
+    NAME_FIELD: "Store name",
+    ADDRESS_FIELD: "Store Address",
+    POSTCODE_FIELD: "Store Postcode",
+    KILOMETERS_FIELD: "Kilometers",
+    TAIL_LIFT_FIELD: "Does the store require a tail lift? (True/False)",
+    RESTRICTIONS_FIELD: "Store Restrictions",
+    CONTENT_HASH_FIELD: "Content Hash",
+}
+
+# Matches documents that still carry any legacy field
+LEGACY_FILTER = {"$or": [{field: {"$exists": True}} for field in LEGACY_FIELDS.values()]}
+
+@dataclass(slots=True)
+class Store:
+    """
+    Data class holding one store, independent of how it is stored.
+
+    Attributes:
+    - id (int): The store ID.
+    - name (str): The store name.
+    - address (str): The store address.
+    - postcode (str): The store postcode.
+    - kilometers (float): The distance to the store.
+    - tail_lift (bool): Whether deliveries to the store need a tail lift.
+    - restrictions (dict): Opening hours text per weekday. None when the store has no
+                           restrictions recorded, so a write leaves existing ones alone.
+    - content_hash (str): The hash of the imported fields, used by sync_documents.
+    """
+    id: int
+    name: str = None
+    address: str = None
+    postcode: str = None
+    kilometers: float = None
+    tail_lift: bool = None
+    restrictions: dict = None
+    content_hash: str = None
+
+    def to_document(self):
+        """
+        Encode the store as a compact MongoDB document.
+
+        Fields that are None are left out, and so are weekdays without opening hours.
+        Whenever the restrictions are written, their opening windows are written with them.
+
+        Returns:
+        - dict: The document.
+        """
+        document = {ID_FIELD: self.id}
+        for attribute, value in (("name", self.name), ("address", self.address), ("postcode", self.postcode),
+                                 ("kilometers", self.kilometers), ("tail_lift", self.tail_lift),
+                                 ("content_hash", self.content_hash)):
+            if value is not None:
+                document[ATTRIBUTE_FIELDS[attribute]] = value
+        if self.restrictions is not None:
+            document[RESTRICTIONS_FIELD] = encode_restrictions(self.restrictions)
+            document[WINDOWS_FIELD] = encode_windows(self.restrictions)
+        return document
+
+    @classmethod
+    def from_document(cls, document, strict=False):
+        """
+        Decode a store document, in the compact or the legacy layout or a mix of both.
+
+        Legacy documents may hold values such as "N/A" for the kilometers or tail lift.
+        By default these are decoded as None with a warning, so one bad store cannot break
+        a search or an export.
+
+        Args:
+        - document (dict): The document, possibly with only some fields projected.
+        - strict (bool): Raise on values that cannot be decoded instead, for callers
+                         that must not drop them, such as the migration. Default is False.
+
+        Returns:
+        - Store: The store.
+
+        Raises:
+        - ValueError: If strict and the kilometers or tail lift cannot be decoded.
+        """
+        def read(field):
+            value = document.get(field)
+            return document.get(LEGACY_FIELDS[field]) if value is None else value
+
+        restrictions = None
+        legacy_restrictions = document.get(LEGACY_FIELDS[RESTRICTIONS_FIELD])
+        compact_restrictions = document.get(RESTRICTIONS_FIELD)
+        if legacy_restrictions is not None or compact_restrictions is not None:
+            # Days written since the store was last migrated win over its legacy days
+            restrictions = {day: hours for day, hours in (legacy_restrictions or {}).items() if hours}
+            restrictions.update(decode_restrictions(compact_restrictions or {}))
+
+        def decode(field, name, convert):
+            value = read(field)
+            if value is None:
+                return None
+            try:
+                return convert(value)
+            except (TypeError, ValueError):
+                if strict:
+                    raise ValueError(f"Store {document.get(ID_FIELD)} has an invalid {name} value '{value}'.")
+                store_model_logger.warning(f"Store {document.get(ID_FIELD)} has an invalid {name} value '{value}'; read as None.")
+                return None
+
+        return cls(
+            id=document.get(ID_FIELD),
+            name=read(NAME_FIELD),
+            address=read(ADDRESS_FIELD),
+            postcode=read(POSTCODE_FIELD),
+            kilometers=decode(KILOMETERS_FIELD, "kilometers", float),
+            tail_lift=decode(TAIL_LIFT_FIELD, "tail lift", to_bool),
+            restrictions=restrictions,
+            content_hash=read(CONTENT_HASH_FIELD),
+        )
+
+    def to_dict(self):
+        """
+        Return the store as a plain dict with readable keys, for JSON output.
+
+        Returns:
+        - dict: The store's attributes, without the content hash.
+        """
+        values = asdict(self)
+        values.pop("content_hash")
+        return values
+
+    def imported_hash(self):
+        """
+        Hash the fields an import file sets, so sync_documents can skip unchanged stores.
+
+        Returns:
+        - str: A hex digest that changes whenever any imported field changes.
+        """
+        imported = [self.id, self.name, self.address, self.postcode, self.kilometers, self.tail_lift]
+        return hashlib.sha1(json.dumps(imported, default=str).encode("utf-8")).hexdigest()
+
+def encode_restrictions(restrictions):
+    """
+    Encode opening hours per weekday under the two-letter day keys, dropping empty days.
+
+    Args:
+    - restrictions (dict): Opening hours keyed by weekday name.
+
+    Returns:
+    - dict: Opening hours keyed by DAY_CODES.
+
+    Raises:
+    - ValueError: If a key is not a weekday.
+    """
+    encoded = {}
+    for day, hours in restrictions.items():
+        if day not in DAY_CODES:
+            raise ValueError(f"'{day}' is not a weekday.")
+        if hours is not None and str(hours).strip():
+            encoded[DAY_CODES[day]] = str(hours).strip()
+    return encoded
+
+def decode_restrictions(encoded):
+    """
+    Decode opening hours stored under the two-letter day keys.
+
+    Args:
+    - encoded (dict): Opening hours keyed by DAY_CODES.
+
+    Returns:
+    - dict: Opening hours keyed by weekday name, in weekday order.
+    """
+    return {day: encoded[code] for day, code in DAY_CODES.items() if encoded.get(code)}
+
+def encode_windows(restrictions):
+    """
+    Encode opening hours per weekday as the minute-of-week windows stored under WINDOWS_FIELD.
+
+    Days whose text cannot be read as opening hours keep their text in the restrictions
+    but get no windows, so they never match an opening hours query.
+
+    Args:
+    - restrictions (dict): Opening hours keyed by weekday name.
+
+    Returns:
+    - list: {"d", "s", "e"} windows, in weekday order.
+    """
+    windows = []
+    for index, day in enumerate(WEEKDAYS):
+        hours = restrictions.get(day)
+        if hours is None or not str(hours).strip():
+            continue
+        try:
+            spans = day_windows(index, hours)
+        except ValueError:
+            continue
+        windows.extend({"d": DAY_CODES[day], "s": start, "e": end} for start, end in spans)
+    return windows
+
+def restriction_field(day):
+    """
+    Return the on-disk field holding one weekday's opening hours.
+
+    Args:
+    - day (str): The weekday name, e.g. "Monday".
+
+    Returns:
+    - str: The dotted field, e.g. "r.mo".
+    """
+    return f"{RESTRICTIONS_FIELD}.{DAY_CODES[day]}"
+
+def projection(attributes):
+    """
+    Build a projection returning the given store attributes.
+
+    The legacy field of each attribute is included too, so stores that have not been
+    migrated yet come back complete; absent fields cost nothing. The ID is always
+    returned, as range-based paging relies on it.
+
+    Args:
+    - attributes (list): Attribute names from ATTRIBUTE_FIELDS, or weekday names for a
+                         single day's opening hours.
+
+    Returns:
+    - dict: The MongoDB projection.
+
+    Raises:
+    - ValueError: If an attribute is not known.
+    """
+    fields = {}
+    for attribute in attributes:
+        if attribute in DAY_CODES:
+            fields[restriction_field(attribute)] = 1
+            fields[f"{LEGACY_FIELDS[RESTRICTIONS_FIELD]}.{attribute}"] = 1
+        elif attribute in ATTRIBUTE_FIELDS:
+            field = ATTRIBUTE_FIELDS[attribute]
+            fields[field] = 1
+            if field in LEGACY_FIELDS:
+                fields[LEGACY_FIELDS[field]] = 1
+        else:
+            raise ValueError(f"Unknown store field '{attribute}'. Choose from {', '.join(ATTRIBUTE_FIELDS)}.")
+    return fields
+
+def to_bool(value):
+    """
+    Convert a tail lift value from a file or form to a bool.
+
+    Args:
+    - value: A bool, number, or text such as "True", "yes" or "0".
+
+    Returns:
+    - bool: The value.
+
+    Raises:
+    - ValueError: If text is not a recognised true/false value.
+    """
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ("true", "yes", "y", "1"):
+            return True
+        if text in ("false", "no", "n", "0", ""):
+            return False
+        raise ValueError(f"Invalid tail lift value '{value}'. Use True or False.")
+    return bool(value)
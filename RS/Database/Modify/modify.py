@@ -1,61 +1,244 @@
-import os
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import PyMongoError
+from dataclasses import dataclass, field
+from Database.Cache.store_cache import store_cache
+from Database.Connection.client import get_client
+from Database.InsertMany.file_reader import read_row_batches
+from Database.Model.store import (WEEKDAYS, DAY_CODES, RESTRICTIONS_FIELD, WINDOWS_FIELD, LEGACY_FIELDS,
+                                  encode_restrictions, encode_windows, restriction_field)
+from Metrics.metrics import ROW_ERROR, instrument
+from WorkPool.work_pool import WorkPool
 import logging
 
-# Load environment variables from the .env file
-load_dotenv()
-
-# Retrieve MongoDB connection string from environment variables
-uri = os.getenv("MONGO_CONNECTION_STRING")
-
 # Initialize a logger for the modify module
 modify_logger = logging.getLogger("modify_logger")
 modify_logger.setLevel(logging.DEBUG)
 
+# Number of rows read from the restrictions file, and written with one bulk_write, per batch
+DEFAULT_BATCH_SIZE = 1000
+
+# Number of batches written at once
+DEFAULT_CONCURRENCY = 4
+
+@dataclass
+class ModifyReport:
+    """
+    Data class collecting the outcome of a bulk restrictions update.
+
+    Attributes:
+    - requested (int): The number of stores in the file with at least one day to update.
+    - matched (int): The number of those stores that exist.
+    - modified (int): The number of stores whose restrictions actually changed.
+    - invalid (list): (row, reason) pairs that were skipped.
+    - error (str): The error that stopped the update part way, such as a missing file, or None.
+    """
+    requested: int = 0
+    matched: int = 0
+    modified: int = 0
+    invalid: list = field(default_factory=list)
+    error: str = None
+
+    def summary(self):
+        """
+        Return a one-line summary of the update.
+
+        Returns:
+        - str: Counts for each outcome.
+        """
+        return (f"{self.requested} requested, {self.matched} matched, {self.modified} modified, "
+                f"{self.requested - self.matched} not found, {len(self.invalid)} invalid")
+
+@instrument("modify_document", modify_logger, documents=lambda modified: 1 if modified else 0)
 async def modify_document(document_id, store_restrictions):
     """
     Modify an existing document in the 'Stores' collection.
 
+    The existence check is folded into the update itself: a matched_count of 0 means
+    there is no store with that ID, so each change costs a single round trip.
+
     Args:
     - document_id: The ID of the document to modify.
     - store_restrictions: The store restrictions to add or update.
 
+    Returns:
+    - bool: True if the store exists and was updated, False if there is no such store.
+
     Raises:
     - PyMongoError: If an error occurs during the MongoDB operation.
     - Exception: For unexpected errors during the process.
     """
-    client = None
+    from pymongo.errors import PyMongoError
+
     try:
-        # Connect to the MongoDB database
-        client = AsyncIOMotorClient(uri)
+        # Use the shared MongoDB client
+        client = get_client()
         db = client["StoreInformation"]
         collection = db["Stores"]
 
-        # Check if the document exists
-        existing_document = await collection.find_one({"_id": int(document_id)})
-        if not existing_document:
-            modify_logger.warning(f"No document found with ID {document_id}. Cannot modify.")
-            return
-
-        # Update the store restrictions in the existing document
-        await collection.update_one(
+        # Replace the store restrictions and their opening windows if the document exists, dropping any legacy copy
+        result = await collection.update_one(
             {"_id": int(document_id)},
-            {"$set": {"Store Restrictions": store_restrictions}}
+            {"$set": {RESTRICTIONS_FIELD: encode_restrictions(store_restrictions),
+                      WINDOWS_FIELD: encode_windows(store_restrictions)},
+             "$unset": {LEGACY_FIELDS[RESTRICTIONS_FIELD]: ""}}
         )
+        if result.matched_count == 0:
+            modify_logger.warning(f"No document found with ID {document_id}. Cannot modify.")
+            return False
 
+        store_cache.invalidate(document_id)
         modify_logger.info(f"Document with ID {document_id} modified successfully.")
+        return True
+
+    except PyMongoError as pe:
+        # Log MongoDB-specific errors and raise them, so a failed write is not taken for a missing store
+        modify_logger.error(f"MongoDB error: {pe}")
+        raise
+    except Exception as e:
+        # Log unexpected errors
+        modify_logger.error(f"Unexpected error: {e}")
+    return False
+
+@instrument("modify_documents", modify_logger, documents=lambda report: report.modified)
+async def modify_documents(file_path, batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY, progress=None):
+    """
+    Modify the store restrictions of many stores from a spreadsheet.
+
+    The file needs an 'ID' column and one column per weekday ('Monday' ... 'Sunday').
+    Only the days with a value are updated, along with their opening windows, so a file
+    can change a single day across thousands of stores; a store not yet migrated keeps the
+    other days from its legacy restrictions. Stores written before opening windows existed
+    only get them once migrate_stores has built them from every day.
+    Each batch of rows is sent with
+    one unordered bulk_write, and a WorkPool keeps up to concurrency batches in flight at once.
+
+    Args:
+    - file_path (str): The path to the .xlsx, .csv or .parquet file of restrictions.
+    - batch_size (int): The number of rows read and written per batch.
+    - concurrency (int): The number of batches written at once.
+    - progress (callable): Called as progress(completed, None) after each batch is written.
+
+    Returns:
+    - ModifyReport: The outcome of the update.
+
+    Raises:
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    from pymongo.errors import BulkWriteError, PyMongoError
+
+    report = ModifyReport()
+    store_ids = []
+    try:
+        # Use the shared MongoDB client
+        client = get_client()
+        db = client["StoreInformation"]
+        collection = db["Stores"]
+
+        async def write_batch(rows):
+            # Build one update per store, setting only the days given in the file
+            operations = []
+            row_numbers = []
+            for row_number, row in rows:
+                try:
+                    operation, store_id = _build_update(row)
+                except ValueError as ve:
+                    modify_logger.error(f"Validation error on row {row_number}: {ve}", extra=ROW_ERROR)
+                    report.invalid.append((row_number, str(ve)))
+                    continue
+                operations.append(operation)
+                store_ids.append(store_id)
+                row_numbers.append(row_number)
+
+            report.requested += len(operations)
+            if not operations:
+                return
+            try:
+                result = await collection.bulk_write(operations, ordered=False)
+                report.matched += result.matched_count
+                report.modified += result.modified_count
+            except BulkWriteError as bwe:
+                # Unordered writes carry on past failures; record what succeeded
+                report.matched += bwe.details.get("nMatched", 0)
+                report.modified += bwe.details.get("nModified", 0)
+                for error in bwe.details.get("writeErrors", []):
+                    report.invalid.append((row_numbers[error["index"]], error.get("errmsg", "Unknown error")))
+
+        await WorkPool(concurrency, progress=progress).map(write_batch, read_row_batches(file_path, batch_size))
+
+        modify_logger.info(f"Bulk restrictions update from {file_path} finished: {report.summary()}")
 
     except PyMongoError as pe:
         # Log MongoDB-specific errors
         modify_logger.error(f"MongoDB error: {pe}")
+        report.error = f"MongoDB error: {pe}"
     except Exception as e:
         # Log unexpected errors
         modify_logger.error(f"Unexpected error: {e}")
+        report.error = f"Unexpected error: {e}"
+
+    # Drop any cached copies of the stores that may have been written
+    store_cache.invalidate(*store_ids)
+
+    return report
+
+def _build_update(row):
+    """
+    Build the restrictions update for one row of a restrictions file.
+
+    Args:
+    - row (dict): A row with an 'ID' column and weekday columns.
+
+    Returns:
+    - tuple: (UpdateOne, store ID).
+
+    Raises:
+    - ValueError: If the ID is missing or not a number, or the row has no days to set.
+    """
+    from pymongo import UpdateOne
+
+    if row.get("ID") is None:
+        raise ValueError("Column 'ID' not found in the row.")
+    try:
+        store_id = int(row["ID"])
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid store ID '{row['ID']}'.")
+
+    days = {
+        day: str(row[day]).strip()
+        for day in WEEKDAYS
+        if row.get(day) is not None and str(row[day]).strip()
+    }
+    if not days:
+        raise ValueError(f"No restrictions given for store {store_id}.")
+
+    # Start from the days already stored. A store not yet migrated keeps them under the legacy
+    # field, keyed by weekday name, so they are carried into the compact field first, with the
+    # compact days winning as in Store.from_document, rather than dropped by the merge below
+    legacy_days = {"$arrayToObject": {"$map": {
+        "input": {"$filter": {
+            "input": {"$objectToArray": {"$ifNull": [f"${LEGACY_FIELDS[RESTRICTIONS_FIELD]}", {}]}},
+            "cond": {"$and": [{"$in": ["$$this.k", list(DAY_CODES)]}, {"$ne": [{"$ifNull": ["$$this.v", ""]}, ""]}]},
+        }},
+        "in": {"k": {"$arrayElemAt": [list(DAY_CODES.values()), {"$indexOfArray": [list(DAY_CODES), "$$this.k"]}]},
+               "v": "$$this.v"},
+    }}}
+    stored = {RESTRICTIONS_FIELD: {"$mergeObjects": [legacy_days, {"$ifNull": [f"${RESTRICTIONS_FIELD}", {}]}]}}
+
+    # Set the given days; $literal stops hours text starting with '$' being read as a field
+    codes = [DAY_CODES[day] for day in days]
+    restrictions = {restriction_field(day): {"$literal": hours} for day, hours in days.items()}
+
+    # Then swap the given days' opening windows for the new ones, keeping the other days'.
+    # A store written before windows existed has none to keep, so it only gets windows when
+    # the merged restrictions hold no other days; otherwise it is left without them, still
+    # matching MIGRATION_FILTER, and migrate_stores builds them from every day
+    merged_days = {"$map": {"input": {"$objectToArray": {"$ifNull": [f"${RESTRICTIONS_FIELD}", {}]}}, "in": "$$this.k"}}
+    windows = {WINDOWS_FIELD: {"$cond": [
+        {"$or": [{"$isArray": f"${WINDOWS_FIELD}"}, {"$setIsSubset": [merged_days, codes]}]},
+        {"$concatArrays": [
+            {"$filter": {"input": {"$ifNull": [f"${WINDOWS_FIELD}", []]}, "cond": {"$not": [{"$in": ["$$this.d", codes]}]}}},
+            {"$literal": encode_windows(days)},
+        ]},
+        "$$REMOVE",
+    ]}}
 
-    finally:
-        # Close the MongoDB client and log closure attempt
-        if client:
-            client.close()
-            modify_logger.info("MongoDB client closed successfully.")
+    return UpdateOne({"_id": store_id}, [{"$set": stored}, {"$set": restrictions}, {"$set": windows}]), store_id
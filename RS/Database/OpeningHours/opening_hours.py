@@ -0,0 +1,302 @@
+from Database.Model.hours import MINUTES_PER_DAY, parse_time, week_ranges
+from Database.Model.store import WEEKDAYS, DAY_CODES, ID_FIELD, WINDOWS_FIELD
+from Database.SearchAll.search_all import iter_stores
+from Metrics.metrics import instrument
+import logging
+
+# Initialize a logger for the opening hours module
+opening_hours_logger = logging.getLogger("opening_hours_logger")
+opening_hours_logger.setLevel(logging.DEBUG)
+
+# Number of documents fetched per cursor round trip
+DEFAULT_BATCH_SIZE = 1000
+
+def open_at_filter(day, time):
+    """
+    Build a filter matching the stores open at a time of day.
+
+    The $elemMatch on the window start and end is answered from the opening_windows
+    index, so the query never loads stores that are closed at that time.
+
+    Args:
+    - day (str): The weekday, e.g. "Monday" or "mo".
+    - time: The time of day, e.g. "10:30" or "10:30 AM", or minutes after midnight.
+
+    Returns:
+    - dict: The MongoDB filter.
+
+    Raises:
+    - ValueError: If the day or time cannot be read.
+    """
+    minute = minute_of_week(day, time)
+    return {WINDOWS_FIELD: {"$elemMatch": {"s": {"$lte": minute}, "e": {"$gt": minute}}}}
+
+def open_during_filter(day, start, end):
+    """
+    Build a filter matching the stores open for at least part of a time window.
+
+    A window ending at or before its start runs past midnight into the next day.
+
+    Args:
+    - day (str): The weekday the window starts on.
+    - start: The start of the window, as for open_at_filter.
+    - end: The end of the window, exclusive.
+
+    Returns:
+    - dict: The MongoDB filter.
+
+    Raises:
+    - ValueError: If the day or a time cannot be read.
+    """
+    clauses = [
+        {WINDOWS_FIELD: {"$elemMatch": {"s": {"$lt": window_end}, "e": {"$gt": window_start}}}}
+        for window_start, window_end in _window(day, start, end)
+    ]
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+@instrument("stores_open_at", opening_hours_logger, documents=lambda result: len(result))
+async def stores_open_at(day, time, filter_query=None, projection=None):
+    """
+    Search for the stores open at a time of day, with one indexed query.
+
+    Args:
+    - day (str): The weekday, e.g. "Monday" or "mo".
+    - time: The time of day, e.g. "10:30" or "10:30 AM", or minutes after midnight.
+    - filter_query (dict): A further MongoDB filter, e.g. from parse_criteria. Default is None.
+    - projection (dict): The fields to return. Default is None to return every field.
+
+    Returns:
+    - list: The matching documents, in ID order.
+
+    Raises:
+    - ValueError: If the day or time cannot be read.
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    return await _search(open_at_filter(day, time), filter_query, projection, f"open on {day} at {time}")
+
+@instrument("stores_open_during", opening_hours_logger, documents=lambda result: len(result))
+async def stores_open_during(day, start, end, filter_query=None, projection=None):
+    """
+    Search for the stores open for at least part of a time window, with one indexed query.
+
+    Args:
+    - day (str): The weekday the window starts on.
+    - start: The start of the window, e.g. "09:00".
+    - end: The end of the window, exclusive; at or before start for a window past midnight.
+    - filter_query (dict): A further MongoDB filter, e.g. from parse_criteria. Default is None.
+    - projection (dict): The fields to return. Default is None to return every field.
+
+    Returns:
+    - list: The matching documents, in ID order.
+
+    Raises:
+    - ValueError: If the day or a time cannot be read.
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    return await _search(open_during_filter(day, start, end), filter_query, projection,
+                         f"open on {day} between {start} and {end}")
+
+async def _search(hours_filter, filter_query, projection, description):
+    """
+    Run an opening hours filter, combined with an optional further filter.
+
+    Args:
+    - hours_filter (dict): The filter from open_at_filter or open_during_filter.
+    - filter_query (dict): A further MongoDB filter, or None.
+    - projection (dict): The fields to return, or None.
+    - description (str): What is searched for, for the log.
+
+    Returns:
+    - list: The matching documents, in ID order.
+
+    Raises:
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    from pymongo.errors import PyMongoError
+
+    query = {"$and": [hours_filter, filter_query]} if filter_query else hours_filter
+    try:
+        stores = [
+            document async for document in iter_stores(
+                query, projection, sort=[(ID_FIELD, 1)], batch_size=DEFAULT_BATCH_SIZE
+            )
+        ]
+        opening_hours_logger.info(f"Found {len(stores)} stores {description}")
+        return stores
+
+    except PyMongoError as pe:
+        # Log MongoDB-specific errors and raise them, so a failed query is not taken for no stores open
+        opening_hours_logger.error(f"MongoDB error: {pe}")
+        raise
+    except Exception as e:
+        # Log unexpected errors
+        opening_hours_logger.error(f"Unexpected error: {e}")
+        raise
+
+class HoursTable:
+    """
+    The opening windows of many stores held in NumPy arrays, for slotting many delivery
+    times against the same stores without a query per time.
+
+    Each lookup is one vectorized comparison over every window.
+
+    Attributes:
+    - ids: The store ID of each window.
+    - starts: The first minute of each window, counted from Monday 00:00.
+    - ends: The minute after the last of each window.
+    """
+
+    def __init__(self, ids, starts, ends):
+        import numpy as np
+
+        self.ids = np.asarray(ids)
+        self.starts = np.asarray(starts, dtype=np.int32)
+        self.ends = np.asarray(ends, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def open_at(self, day, time):
+        """
+        Return the IDs of the stores open at a time of day.
+
+        Args:
+        - day (str): The weekday, e.g. "Monday" or "mo".
+        - time: The time of day, e.g. "10:30", or minutes after midnight.
+
+        Returns:
+        - numpy.ndarray: The sorted, unique store IDs.
+
+        Raises:
+        - ValueError: If the day or time cannot be read.
+        """
+        import numpy as np
+
+        minute = minute_of_week(day, time)
+        return np.unique(self.ids[(self.starts <= minute) & (self.ends > minute)])
+
+    def open_during(self, day, start, end):
+        """
+        Return the IDs of the stores open for at least part of a time window.
+
+        Args:
+        - day (str): The weekday the window starts on.
+        - start: The start of the window, e.g. "09:00".
+        - end: The end of the window, exclusive; at or before start for a window past midnight.
+
+        Returns:
+        - numpy.ndarray: The sorted, unique store IDs.
+
+        Raises:
+        - ValueError: If the day or a time cannot be read.
+        """
+        import numpy as np
+
+        mask = np.zeros(len(self.ids), dtype=bool)
+        for window_start, window_end in _window(day, start, end):
+            mask |= (self.starts < window_end) & (self.ends > window_start)
+        return np.unique(self.ids[mask])
+
+@instrument("load_hours_table", opening_hours_logger, documents=lambda table: len(table))
+async def load_hours_table(filter_query=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Load the opening windows of the matching stores into a HoursTable.
+
+    Only the ID and window fields are fetched.
+
+    Args:
+    - filter_query (dict): A MongoDB filter, e.g. from parse_criteria. Default is None for every store.
+    - batch_size (int): The number of documents fetched per round trip.
+
+    Returns:
+    - HoursTable: The windows of the matching stores.
+
+    Raises:
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    from pymongo.errors import PyMongoError
+
+    ids, starts, ends = [], [], []
+    try:
+        async for document in iter_stores(filter_query, {WINDOWS_FIELD: 1}, batch_size=batch_size):
+            for window in document.get(WINDOWS_FIELD) or []:
+                ids.append(document[ID_FIELD])
+                starts.append(window["s"])
+                ends.append(window["e"])
+        opening_hours_logger.info(f"Loaded {len(ids)} opening windows")
+
+    except PyMongoError as pe:
+        # Log MongoDB-specific errors and raise them, so a failed load is not taken for no store being open
+        opening_hours_logger.error(f"MongoDB error: {pe}")
+        raise
+    except Exception as e:
+        # Log unexpected errors
+        opening_hours_logger.error(f"Unexpected error: {e}")
+        raise
+
+    return HoursTable(ids, starts, ends)
+
+def minute_of_week(day, time):
+    """
+    Convert a weekday and time of day to minutes after Monday 00:00.
+
+    Args:
+    - day (str): The weekday, e.g. "Monday" or "mo".
+    - time: The time of day, e.g. "10:30" or "10:30 AM", or minutes after midnight.
+
+    Returns:
+    - int: The minute of the week.
+
+    Raises:
+    - ValueError: If the day or time cannot be read.
+    """
+    minutes = time if isinstance(time, int) else parse_time(time)
+    if not 0 <= minutes < MINUTES_PER_DAY:
+        raise ValueError(f"'{time}' is not a time of day.")
+    return _day_index(day) * MINUTES_PER_DAY + minutes
+
+def _window(day, start, end):
+    """
+    Convert a time window on a weekday to minute-of-week ranges.
+
+    Args:
+    - day (str): The weekday the window starts on.
+    - start: The start of the window.
+    - end: The end of the window, exclusive; at or before start for a window past midnight.
+
+    Returns:
+    - list: One or two (start, end) ranges, split where the window crosses Sunday midnight.
+
+    Raises:
+    - ValueError: If the day or a time cannot be read.
+    """
+    window_start = minute_of_week(day, start)
+    length = (end if isinstance(end, int) else parse_time(end)) - window_start % MINUTES_PER_DAY
+    if length <= 0:
+        length += MINUTES_PER_DAY
+    return week_ranges(window_start, window_start + length)
+
+def _day_index(day):
+    """
+    Look up a weekday by name or two-letter code.
+
+    Args:
+    - day (str): The weekday, e.g. "Monday", "monday" or "mo".
+
+    Returns:
+    - int: 0 for Monday to 6 for Sunday.
+
+    Raises:
+    - ValueError: If the day is not a weekday.
+    """
+    name = str(day).strip().capitalize()
+    codes = list(DAY_CODES.values())
+    if name in WEEKDAYS:
+        return WEEKDAYS.index(name)
+    if name.lower() in codes:
+        return codes.index(name.lower())
+    raise ValueError(f"'{day}' is not a weekday. Use e.g. Monday or mo.")
@@ -1,19 +1,18 @@
-import os
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import PyMongoError
+from Database.Connection.client import get_client
+from Metrics.metrics import instrument
 import logging
 
-# Load environment variables from the .env file
-load_dotenv()
-
-# Retrieve MongoDB connection string from environment variables
-uri = os.getenv("MONGO_CONNECTION_STRING")
-
 # Initialize a logger for the search module
 search_all_logger = logging.getLogger("search_all_logger")
 search_all_logger.setLevel(logging.DEBUG)
 
+# Number of documents fetched from the server per cursor round trip
+DEFAULT_BATCH_SIZE = 100
+
+# Number of stores shown per page in the CLI pager
+DEFAULT_PAGE_SIZE = 20
+
+@instrument("search_all", search_all_logger, documents=lambda result: len(result) if result else 0)
 async def search_all():
     """
     Search for all documents in the 'Stores' collection.
@@ -26,10 +25,11 @@ async def search_all():
     - PyMongoError: If an error occurs during the MongoDB operation.
     - Exception: For unexpected errors during the process.
     """
-    client = None
+    from pymongo.errors import PyMongoError
+
     try:
-        # Connect to the MongoDB database
-        client = AsyncIOMotorClient(uri)
+        # Use the shared MongoDB client
+        client = get_client()
         db = client["StoreInformation"]
         collection = db["Stores"]
 
@@ -53,8 +53,86 @@ async def search_all():
         search_all_logger.error(f"Unexpected error: {e}")
         return None
 
+async def iter_stores(filter_query=None, projection=None, sort=None, skip=0, limit=0, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream documents from the 'Stores' collection without loading them all into memory.
+
+    Documents are fetched from the server batch_size at a time as the caller iterates.
+
+    Args:
+    - filter_query (dict): A MongoDB filter. Default is None to match every store.
+    - projection (dict or list): The fields to return. Default is None to return every field.
+    - sort (list): (field, direction) pairs to sort by. Default is None for natural order.
+    - skip (int): The number of matching documents to skip.
+    - limit (int): The maximum number of documents to return. Default is 0 for no limit.
+    - batch_size (int): The number of documents fetched per round trip.
+
+    Yields:
+    - dict: Each matching document.
+
+    Raises:
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    """
+    # Use the shared MongoDB client
+    client = get_client()
+    db = client["StoreInformation"]
+    collection = db["Stores"]
+
+    cursor = collection.find(filter_query or {}, projection, skip=skip, limit=limit, batch_size=batch_size)
+    if sort:
+        cursor = cursor.sort(sort)
+
+    try:
+        async for document in cursor:
+            yield document
     finally:
-        # Close the MongoDB client and log closure attempt
-        if client:
-            client.close()
-            search_all_logger.info("MongoDB client closed successfully.")
+        # Release the server-side cursor if the caller stops early
+        await cursor.close()
+
+@instrument("search_page", search_all_logger, documents=lambda result: len(result[0]))
+async def search_page(page_size=DEFAULT_PAGE_SIZE, after_id=None, filter_query=None, projection=None):
+    """
+    Fetch one page of the 'Stores' collection using range-based paging on '_id'.
+
+    Unlike skip/limit, each page is an indexed '_id > after_id' range scan, so later
+    pages cost the same as the first.
+
+    Args:
+    - page_size (int): The maximum number of documents on the page.
+    - after_id: The '_id' of the last document on the previous page. Default is None for the first page.
+    - filter_query (dict): A MongoDB filter. Default is None to match every store.
+    - projection (dict or list): The fields to return. Default is None to return every field.
+
+    Returns:
+    - tuple: (documents, last_id), where last_id is passed as after_id to fetch the next page
+             and is None once there are no more documents.
+
+    Raises:
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    from pymongo.errors import PyMongoError
+
+    try:
+        query = dict(filter_query or {})
+        if after_id is not None:
+            query = {"$and": [query, {"_id": {"$gt": after_id}}]} if query else {"_id": {"$gt": after_id}}
+
+        documents = [
+            document async for document in iter_stores(
+                query, projection, sort=[("_id", 1)], limit=page_size, batch_size=page_size
+            )
+        ]
+        search_all_logger.info(f"Fetched page of {len(documents)} documents after ID {after_id}")
+
+        last_id = documents[-1]["_id"] if len(documents) == page_size else None
+        return documents, last_id
+
+    except PyMongoError as pe:
+        # Log MongoDB-specific errors and raise them, so a failed query is not taken for an empty page
+        search_all_logger.error(f"MongoDB error: {pe}")
+        raise
+    except Exception as e:
+        # Log unexpected errors
+        search_all_logger.error(f"Unexpected error: {e}")
+        raise
@@ -0,0 +1,124 @@
+import os
+import re
+from Database.Cache.store_cache import store_cache
+from Database.Connection.client import get_client
+from Metrics.metrics import instrument
+import logging
+
+# Initialize a logger for the search_many module
+search_many_logger = logging.getLogger("search_many_logger")
+search_many_logger.setLevel(logging.DEBUG)
+
+# Maximum number of IDs sent in a single $in query
+DEFAULT_CHUNK_SIZE = 1000
+
+def read_ids(value):
+    """
+    Parse store IDs from a comma/whitespace separated list or from a file containing one.
+
+    Args:
+    - value (str): Either IDs such as "101, 102 103" or the path to a text file of IDs.
+
+    Returns:
+    - list: The IDs in input order without duplicates, as ints.
+
+    Raises:
+    - ValueError: If any token is not a number, naming the bad tokens.
+    """
+    if os.path.isfile(value):
+        with open(value, encoding="utf-8") as id_file:
+            value = id_file.read()
+
+    ids = []
+    seen = set()
+    invalid = []
+    for token in re.split(r"[,\s]+", value.strip()):
+        if not token:
+            continue
+        if not token.lstrip("-").isdigit():
+            invalid.append(token)
+            continue
+        store_id = int(token)
+        if store_id not in seen:
+            seen.add(store_id)
+            ids.append(store_id)
+    if invalid:
+        raise ValueError(f"Store IDs are numbers; not valid: {', '.join(invalid)}.")
+    return ids
+
+@instrument("search_many", search_many_logger, documents=lambda result: len(result[0]))
+async def search_many(ids, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Search for many documents in the 'Stores' collection by ID.
+
+    Stores already in the store cache are served from it; the rest are fetched with
+    one $in query per chunk of chunk_size IDs instead of one round trip per store.
+
+    Args:
+    - ids (list): The IDs of the stores to search for.
+    - chunk_size (int): The maximum number of IDs per $in query.
+
+    Returns:
+    - tuple: (found, missing), where found is a dict of documents keyed by ID and
+             missing is a list of the IDs that do not exist, each listed once, including
+             any that are not numbers and so cannot be store IDs.
+
+    Raises:
+    - PyMongoError: If an error occurs during the MongoDB operation.
+    - Exception: For unexpected errors during the process.
+    """
+    from pymongo.errors import PyMongoError
+
+    found = {}
+
+    # Store IDs are ints, so anything else is reported as missing rather than failing the search.
+    # Each ID is looked up and reported once, however often it was requested
+    numeric, invalid = [], []
+    for store_id in ids:
+        try:
+            numeric.append(int(store_id))
+        except (TypeError, ValueError):
+            if store_id not in invalid:
+                invalid.append(store_id)
+    if invalid:
+        search_many_logger.warning(f"Invalid store IDs {invalid}")
+    ids = list(dict.fromkeys(numeric))
+
+    try:
+        # Serve what we can from the cache
+        to_fetch = []
+        for store_id in ids:
+            cached = store_cache.get(store_id)
+            if cached is not None:
+                found[store_id] = cached
+            else:
+                to_fetch.append(store_id)
+
+        # Use the shared MongoDB client
+        client = get_client()
+        db = client["StoreInformation"]
+        collection = db["Stores"]
+
+        # Fetch the remaining stores in chunks of $in queries
+        for start in range(0, len(to_fetch), chunk_size):
+            chunk = to_fetch[start:start + chunk_size]
+            # Skip caching the chunk if a store is written while it is being read
+            generation = store_cache.generation()
+            async for document in collection.find({"_id": {"$in": chunk}}, batch_size=len(chunk)):
+                found[document["_id"]] = document
+                store_cache.put(document["_id"], document, generation)
+
+        missing = invalid + [store_id for store_id in ids if store_id not in found]
+        search_many_logger.info(f"Found {len(found)} of {len(ids)} requested documents")
+        if missing:
+            search_many_logger.warning(f"No documents found with IDs {missing}")
+        return found, missing
+
+    except PyMongoError as pe:
+        # Log MongoDB-specific errors and raise them, so a failed query is not taken for missing stores
+        search_many_logger.error(f"MongoDB error: {pe}")
+        raise
+    except Exception as e:
+        # Log unexpected errors
+        search_many_logger.error(f"Unexpected error: {e}")
+        raise
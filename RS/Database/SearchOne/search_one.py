@@ -1,23 +1,21 @@
-import os
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import PyMongoError
+from Database.Cache.store_cache import store_cache
+from Database.Connection.client import get_client
+from Metrics.metrics import instrument
 import logging
 
-# Load environment variables from the .env file
-load_dotenv()
-
-# Retrieve MongoDB connection string from environment variables
-uri = os.getenv("MONGO_CONNECTION_STRING")
-
 # Initialize a logger for the search module
 search_one_logger = logging.getLogger("search_one_logger")
 search_one_logger.setLevel(logging.DEBUG)
 
+@instrument("search_one", search_one_logger, documents=lambda result: 1 if result else 0)
 async def search_one(document_id):
     """
     Search for a document in the 'Stores' collection by ID.
 
+    Lookups are served from the in-process store cache when possible and only go to
+    MongoDB on a miss, after which the document is cached unless a store was written
+    while it was being read.
+
     Args:
     - document_id (int): The ID of the document to search for.
 
@@ -28,37 +26,42 @@ async def search_one(document_id):
     - PyMongoError: If an error occurs during the MongoDB operation.
     - Exception: For unexpected errors during the process.
     """
-    client = None
+    from pymongo.errors import PyMongoError
+
     try:
-        # Connect to the MongoDB database
-        client = AsyncIOMotorClient(uri)
+        # Convert the document_id to an int
+        document_id = int(document_id)
+
+        # Serve the document from the cache if it is there
+        cached = store_cache.get(document_id)
+        if cached is not None:
+            search_one_logger.debug(f"Document found in cache with ID {document_id}")
+            return cached
+
+        # Note the cache generation so a write that lands during the query is not undone by caching
+        generation = store_cache.generation()
+
+        # Use the shared MongoDB client
+        client = get_client()
         db = client["StoreInformation"]
         collection = db["Stores"]
 
-        # Convert the document_id to ObjectId
-        document_id = int(document_id)
-
         # Search for the document by ID
         result = await collection.find_one({"_id": document_id})
 
         if result:
             search_one_logger.info(f"Document found with ID {document_id}")
+            store_cache.put(document_id, result, generation)
             return result
         else:
             search_one_logger.warning(f"No document found with ID {document_id}")
             return None
 
     except PyMongoError as pe:
-        # Log MongoDB-specific errors
+        # Log MongoDB-specific errors and raise them, so a failed query is not taken for a missing store
         search_one_logger.error(f"MongoDB error: {pe}")
-        return None
+        raise
     except Exception as e:
         # Log unexpected errors
         search_one_logger.error(f"Unexpected error: {e}")
-        return None
-
-    finally:
-        # Close the MongoDB client and log closure attempt
-        if client:
-            client.close()
-            search_one_logger.info("MongoDB client closed successfully.")
+        raise
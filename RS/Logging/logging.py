@@ -1,84 +1,140 @@
 import os
+import json
+import queue
 import logging
-from logging.handlers import RotatingFileHandler
-from Database.Connection.ping_connection import connection_logger
-from Database.Delete.delete_docs import delete_logger
-from Database.InsertOne.insert_one import insert_one_logger
-from Database.InsertMany.insert_many import insert_many_logger
-from Database.SearchOne.search_one import search_one_logger
-from Database.SearchAll.search_all import search_all_logger
-from Database.Modify.modify import modify_logger
-from User.Registration.register import registration_logger
-from User.Login.login import login_logger
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from Config.settings import settings
+
+# Names of the loggers used by the Route Solutions modules; each writes to <name>.log.
+# Loggers are looked up by name so that setting up logging does not import the
+# Database and User modules (and their MongoDB dependencies).
+LOGGER_NAMES = (
+    "connection_logger",
+    "cache_logger",
+    "store_model_logger",
+    "indexes_logger",
+    "delete_logger",
+    "insert_one_logger",
+    "insert_many_logger",
+    "search_one_logger",
+    "search_many_logger",
+    "search_all_logger",
+    "modify_logger",
+    "export_logger",
+    "opening_hours_logger",
+    "migration_logger",
+    "registration_logger",
+    "login_logger",
+    "api_logger",
+)
+
+# The listener writing queued records to the log files, while logging is set up
+_listener = None
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formatter writing each record as one JSON object per line.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """
+    Filter passing only one in every `rate` DEBUG/INFO records; warnings and errors always pass.
+
+    Attributes:
+    - rate (int): Keep one record in this many.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self._count = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        self._count += 1
+        return (self._count - 1) % self.rate == 0
 
 def setup_logging(log_dir):
     """
     Set up logging for different components of the Route Solutions application.
 
-    This function creates loggers and file handlers for connection, delete, insert_one,
-    insert_many, search_one, search_all, modify, registration, and login components,
+    This function creates loggers and file handlers for connection, cache, indexes, delete, insert_one,
+    insert_many, search_one, search_many, search_all, modify, export, registration, login, and api components,
     configuring them to write log messages to rotating log files.
 
+    Loggers only put records on an in-memory queue; a QueueListener thread does the file
+    writes, so logging never blocks the asyncio event loop. Levels, sampling and the
+    text/JSON lines format are taken from the LOG_* settings.
+
     Parameters:
     - log_dir (str): The directory where log files will be stored.
+
+    Returns:
+    - QueueListener: The running listener; stop it with shutdown_logging().
     """
+    global _listener
+
+    # Replace any previous set-up rather than writing every record twice
+    shutdown_logging()
 
     # Ensure the log directory exists
     os.makedirs(log_dir, exist_ok=True)
 
     # Define a common log message format
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-
-    # Configure connection logger
-    connection_log_file = os.path.join(log_dir, "connection_logger.log")
-    connection_handler = RotatingFileHandler(connection_log_file, maxBytes=1024 * 1024, backupCount=5)
-    connection_handler.setFormatter(formatter)
-    connection_logger.addHandler(connection_handler)
-
-    # Configure delete logger
-    delete_log_file = os.path.join(log_dir, "delete_logger.log")
-    delete_handler = RotatingFileHandler(delete_log_file, maxBytes=1024 * 1024, backupCount=5)
-    delete_handler.setFormatter(formatter)
-    delete_logger.addHandler(delete_handler)
-
-    # Configure insert_one logger
-    insert_one_logger_log_file = os.path.join(log_dir, "insert_one_logger.log")
-    insert_one_handler = RotatingFileHandler(insert_one_logger_log_file, maxBytes=1024 * 1024, backupCount=5)
-    insert_one_handler.setFormatter(formatter)
-    insert_one_logger.addHandler(insert_one_handler)
-
-    # Configure insert_many logger
-    insert_many_logger_log_file = os.path.join(log_dir, "insert_many_logger.log")
-    insert_many_handler = RotatingFileHandler(insert_many_logger_log_file, maxBytes=1024 * 1024, backupCount=5)
-    insert_many_handler.setFormatter(formatter)
-    insert_many_logger.addHandler(insert_many_handler)
-
-    # Configure search_one logger
-    search_log_file = os.path.join(log_dir, "search_one_logger.log")
-    search_handler = RotatingFileHandler(search_log_file, maxBytes=1024 * 1024, backupCount=5)
-    search_handler.setFormatter(formatter)
-    search_one_logger.addHandler(search_handler)
-
-    # Configure search_all logger
-    search_all_log_file = os.path.join(log_dir, "search_all_logger.log")
-    search_all_handler = RotatingFileHandler(search_all_log_file, maxBytes=1024 * 1024, backupCount=5)
-    search_all_handler.setFormatter(formatter)
-    search_all_logger.addHandler(search_all_handler)
-
-    # Configure modify logger
-    modify_log_file = os.path.join(log_dir, "modify_logger.log")
-    modify_handler = RotatingFileHandler(modify_log_file, maxBytes=1024 * 1024, backupCount=5)
-    modify_handler.setFormatter(formatter)
-    modify_logger.addHandler(modify_handler)
-
-    # Configure registration logger
-    registration_log_file = os.path.join(log_dir, "registration_logger.log")
-    registration_handler = RotatingFileHandler(registration_log_file, maxBytes=1024 * 1024, backupCount=5)
-    registration_handler.setFormatter(formatter)
-    registration_logger.addHandler(registration_handler)
-
-    # Configure login logger
-    login_log_file = os.path.join(log_dir, "login_logger.log")
-    login_handler = RotatingFileHandler(login_log_file, maxBytes=1024 * 1024, backupCount=5)
-    login_handler.setFormatter(formatter)
-    login_logger.addHandler(login_handler)
+    if settings.log_format == "json":
+        formatter = JsonLinesFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+    log_queue = queue.SimpleQueue()
+    file_handlers = []
+
+    for logger_name in LOGGER_NAMES:
+        # Configure the rotating log file, which only accepts this logger's records
+        log_file = os.path.join(log_dir, f"{logger_name}.log")
+        file_handler = RotatingFileHandler(log_file, maxBytes=1024 * 1024, backupCount=5)
+        file_handler.setFormatter(formatter)
+        file_handler.addFilter(logging.Filter(logger_name))
+        file_handlers.append(file_handler)
+
+        # Configure the queue handler, applying the level and sampling before the record is queued
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setLevel(settings.log_levels.get(logger_name, settings.log_level))
+        sample_rate = settings.log_sample_rates.get(logger_name, 1)
+        if sample_rate > 1:
+            queue_handler.addFilter(SamplingFilter(sample_rate))
+
+        logger = logging.getLogger(logger_name)
+        for handler in [h for h in logger.handlers if isinstance(h, QueueHandler)]:
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, *file_handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def shutdown_logging():
+    """
+    Flush the queued log records to the files and stop the listener.
+
+    Safe to call when logging has not been set up.
+    """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
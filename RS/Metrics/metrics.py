@@ -0,0 +1,284 @@
+import json
+import time
+import logging
+import functools
+import contextvars
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+# The instrumented call running in the current task, so error log records can be attributed to it
+_current_call = contextvars.ContextVar("current_call", default=None)
+
+# Pass as extra= when logging an error about one row of a file, so the call is counted as
+# having a row error rather than as failed, e.g. logger.error(message, extra=ROW_ERROR)
+ROW_ERROR = {"row_error": True}
+
+class OperationStats:
+    """
+    Latency histogram and counters for one operation.
+
+    Attributes:
+    - count (int): The number of calls.
+    - errors (int): The number of calls that raised or logged an error.
+    - row_errors (int): The number of rows the calls rejected, e.g. failing validation,
+                        without failing as a whole.
+    - documents (int): The number of documents the calls processed.
+    - total_seconds (float): The summed latency of all calls.
+    - max_seconds (float): The slowest call.
+    - buckets (list): Call counts per LATENCY_BUCKETS bucket (not cumulative).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.row_errors = 0
+        self.documents = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def record(self, seconds, error=False, documents=0, row_errors=0):
+        """
+        Record one call.
+
+        Args:
+        - seconds (float): The call's latency.
+        - error (bool): Whether the call failed.
+        - documents (int): The number of documents the call processed.
+        - row_errors (int): The number of rows the call rejected.
+        """
+        self.count += 1
+        self.errors += int(error)
+        self.row_errors += row_errors
+        self.documents += documents
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, fraction):
+        """
+        Estimate a latency percentile from the histogram.
+
+        Args:
+        - fraction (float): The percentile as a fraction, e.g. 0.99.
+
+        Returns:
+        - float: The upper bound of the bucket holding the percentile, capped at the slowest call.
+        """
+        if self.count == 0:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+    def snapshot(self):
+        """
+        Return the statistics as a plain dict.
+
+        Returns:
+        - dict: Counters, latency summary and throughput.
+        """
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "row_errors": self.row_errors,
+            "documents": self.documents,
+            "total_seconds": self.total_seconds,
+            "mean_ms": self.total_seconds / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max_seconds * 1000,
+            "documents_per_second": self.documents / self.total_seconds if self.total_seconds else 0.0,
+            "buckets": {_bucket_label(bound): count for bound, count in zip(LATENCY_BUCKETS, self.buckets)}
+        }
+
+class MetricsRegistry:
+    """
+    Process-wide collection of OperationStats keyed by operation name.
+    """
+
+    def __init__(self):
+        self.operations = {}
+        self.started = time.time()
+
+    def record(self, operation, seconds, error=False, documents=0, row_errors=0):
+        """
+        Record one call of an operation.
+
+        Args:
+        - operation (str): The operation name.
+        - seconds (float): The call's latency.
+        - error (bool): Whether the call failed.
+        - documents (int): The number of documents the call processed.
+        - row_errors (int): The number of rows the call rejected.
+        """
+        self.operations.setdefault(operation, OperationStats()).record(seconds, error, documents, row_errors)
+
+    def reset(self):
+        """
+        Drop all recorded statistics.
+        """
+        self.operations.clear()
+        self.started = time.time()
+
+    def snapshot(self):
+        """
+        Return every operation's statistics.
+
+        Returns:
+        - dict: The capture time, uptime and per-operation statistics.
+        """
+        return {
+            "timestamp": time.time(),
+            "uptime_seconds": time.time() - self.started,
+            "operations": {name: stats.snapshot() for name, stats in sorted(self.operations.items())}
+        }
+
+    def to_json(self):
+        """
+        Return the snapshot as a JSON document.
+
+        Returns:
+        - str: The JSON snapshot.
+        """
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """
+        Return the statistics in the Prometheus text exposition format.
+
+        Returns:
+        - str: The metrics, suitable for the node_exporter textfile collector.
+        """
+        lines = [
+            "# HELP rs_operation_duration_seconds Latency of Route Solutions operations.",
+            "# TYPE rs_operation_duration_seconds histogram",
+        ]
+        for name, stats in sorted(self.operations.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += bucket_count
+                lines.append(f'rs_operation_duration_seconds_bucket{{operation="{name}",le="{_bucket_label(bound)}"}} {cumulative}')
+            lines.append(f'rs_operation_duration_seconds_sum{{operation="{name}"}} {stats.total_seconds}')
+            lines.append(f'rs_operation_duration_seconds_count{{operation="{name}"}} {stats.count}')
+
+        lines += [
+            "# HELP rs_operation_errors_total Route Solutions operations that failed.",
+            "# TYPE rs_operation_errors_total counter",
+        ]
+        lines += [f'rs_operation_errors_total{{operation="{name}"}} {stats.errors}' for name, stats in sorted(self.operations.items())]
+
+        lines += [
+            "# HELP rs_operation_row_errors_total Rows rejected by Route Solutions operations that otherwise succeeded.",
+            "# TYPE rs_operation_row_errors_total counter",
+        ]
+        lines += [f'rs_operation_row_errors_total{{operation="{name}"}} {stats.row_errors}' for name, stats in sorted(self.operations.items())]
+
+        lines += [
+            "# HELP rs_operation_documents_total Documents processed by Route Solutions operations.",
+            "# TYPE rs_operation_documents_total counter",
+        ]
+        lines += [f'rs_operation_documents_total{{operation="{name}"}} {stats.documents}' for name, stats in sorted(self.operations.items())]
+        return "\n".join(lines) + "\n"
+
+    def export(self, file_path):
+        """
+        Write the statistics to a file, as Prometheus text for .prom files and JSON otherwise.
+
+        Args:
+        - file_path (str): The file to write.
+        """
+        content = self.to_prometheus() if file_path.endswith(".prom") else self.to_json()
+        with open(file_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(content)
+
+class _ErrorFlagHandler(logging.Handler):
+    """
+    Handler marking the current instrumented call as failed when its module logs an error.
+
+    The Database and User coroutines log errors instead of raising them, so this is how
+    their failures are counted. Records logged with extra=ROW_ERROR only count a rejected
+    row, so one bad row in a file does not fail the whole import.
+    """
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+
+    def emit(self, record):
+        call = _current_call.get()
+        if call is None:
+            return
+        if getattr(record, "row_error", False):
+            call["row_errors"] += 1
+        else:
+            call["error"] = True
+
+_error_flag_handler = _ErrorFlagHandler()
+
+def instrument(operation, logger, documents=None):
+    """
+    Decorator recording latency, call, error and document counts for a coroutine.
+
+    A call counts as an error if it raises or if it logs an ERROR record on logger, other
+    than one logged with extra=ROW_ERROR, which counts as a row error.
+
+    Args:
+    - operation (str): The name the statistics are recorded under.
+    - logger (logging.Logger): The module logger the coroutine reports errors on.
+    - documents (callable): Maps the coroutine's result to the number of documents processed.
+                            Default is None to count one document per successful call.
+
+    Returns:
+    - callable: The decorator.
+    """
+    if _error_flag_handler not in logger.handlers:
+        logger.addHandler(_error_flag_handler)
+
+    def decorator(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            call = {"error": False, "row_errors": 0}
+            token = _current_call.set(call)
+            started = time.perf_counter()
+            result = None
+            try:
+                result = await function(*args, **kwargs)
+                return result
+            except BaseException:
+                call["error"] = True
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                _current_call.reset(token)
+                if call["error"]:
+                    processed = 0
+                elif documents is None:
+                    processed = 1
+                else:
+                    processed = documents(result)
+                metrics.record(operation, elapsed, call["error"], processed, call["row_errors"])
+        return wrapper
+    return decorator
+
+def _bucket_label(bound):
+    """
+    Format a bucket bound the way Prometheus expects.
+
+    Args:
+    - bound (float): The bucket's upper bound.
+
+    Returns:
+    - str: The label, '+Inf' for the last bucket.
+    """
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+# The process-wide metrics registry
+metrics = MetricsRegistry()
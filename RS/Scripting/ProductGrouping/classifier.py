@@ -0,0 +1,152 @@
+import numpy as np
+from Scripting.ProductGrouping.product_grouping import GROUPING_FIELDS
+
+# Column of product group codes in order line files
+DEFAULT_CODE_COLUMN = "Product Group"
+
+class ProductClassifier:
+    """
+    Classify product group codes by grouping tag, warehouse area and temperature zone.
+
+    A dense table indexed by code is built once from GROUPING_FIELDS, so classifying any
+    number of codes is a handful of NumPy take operations rather than a lookup per line.
+    Every attribute table ends with a slot for unknown codes, which the -1 index of an
+    unknown code lands on.
+
+    Attributes:
+    - tags (numpy.ndarray): The grouping tags, e.g. "A" or "FRZ", then None.
+    - areas (numpy.ndarray): The warehouse area of each grouping, then None.
+    - area_names (list): The distinct warehouse areas.
+    - area_index (numpy.ndarray): The position in area_names of each grouping's area, then -1.
+    - temp_min (numpy.ndarray): The lowest temperature of each grouping's zone, then NaN.
+    - temp_max (numpy.ndarray): The highest temperature of each grouping's zone, then NaN.
+    - table (numpy.ndarray): The grouping index of every code from 0 to the highest known code; -1 if unknown.
+    """
+
+    def __init__(self, groupings=None):
+        groupings = GROUPING_FIELDS if groupings is None else groupings
+
+        tags, areas, temp_min, temp_max, codes = [], [], [], [], []
+        for tag, (grouping, code_field, area_field, (lower_field, upper_field)) in groupings.items():
+            lower = getattr(grouping.warehouse_temp_zones, lower_field)
+            upper = getattr(grouping.warehouse_temp_zones, upper_field)
+            tags.append(tag)
+            areas.append(getattr(grouping.warehouse_areas, area_field))
+            # Some zones are recorded warmest first, so order the limits here
+            temp_min.append(min(lower, upper))
+            temp_max.append(max(lower, upper))
+            codes.append(getattr(grouping.product_groups, code_field))
+
+        self.tags = np.array(tags + [None], dtype=object)
+        self.areas = np.array(areas + [None], dtype=object)
+        self.area_names = list(dict.fromkeys(areas))
+        self.area_index = np.array([self.area_names.index(area) for area in areas] + [-1], dtype=np.int16)
+        self.temp_min = np.array(temp_min + [np.nan])
+        self.temp_max = np.array(temp_max + [np.nan])
+
+        self.table = np.full(max(codes) + 1, -1, dtype=np.int16)
+        for index, code in enumerate(codes):
+            if self.table[code] != -1:
+                raise ValueError(f"Product group {code} is claimed by both {tags[self.table[code]]} and {tags[index]}.")
+            self.table[code] = index
+
+    def lookup(self, codes):
+        """
+        Return the grouping index of each product group code.
+
+        Args:
+        - codes: A sequence or NumPy array of codes. Integers, whole floats and numeric
+                 strings are accepted; anything else is unknown.
+
+        Returns:
+        - numpy.ndarray: The index into tags, areas and the temperature tables, -1 for unknown codes.
+        """
+        numbers = _as_numbers(codes)
+        known = (numbers >= 0) & (numbers < len(self.table))
+        indexes = np.full(numbers.shape, -1, dtype=np.int16)
+        indexes[known] = self.table[numbers[known]]
+        return indexes
+
+    def classify(self, codes):
+        """
+        Classify an array of product group codes in one vectorized pass.
+
+        Args:
+        - codes: A sequence or NumPy array of codes.
+
+        Returns:
+        - dict: NumPy arrays aligned with codes: "group", "area", "temp_min", "temp_max",
+                and "known", False for codes that are not a known product group.
+        """
+        indexes = self.lookup(codes)
+        return {
+            "group": self.tags.take(indexes),
+            "area": self.areas.take(indexes),
+            "temp_min": self.temp_min.take(indexes),
+            "temp_max": self.temp_max.take(indexes),
+            "known": indexes >= 0,
+        }
+
+    def classify_frame(self, frame, column=DEFAULT_CODE_COLUMN):
+        """
+        Add the classification of each order line to a DataFrame.
+
+        The group and area columns are categoricals sharing the classifier's small tables,
+        so they cost one small integer per line.
+
+        Args:
+        - frame (pandas.DataFrame): The order lines.
+        - column (str): The column holding the product group codes.
+
+        Returns:
+        - pandas.DataFrame: A copy of frame with "Group", "Area", "Temp Min", "Temp Max"
+                            and "Known Group" columns; unknown codes get missing values.
+
+        Raises:
+        - KeyError: If the frame has no such column.
+        """
+        import pandas as pd
+
+        indexes = self.lookup(frame[column].to_numpy())
+        return frame.assign(**{
+            "Group": pd.Categorical.from_codes(indexes, categories=list(self.tags[:-1])),
+            "Area": pd.Categorical.from_codes(self.area_index.take(indexes), categories=self.area_names),
+            "Temp Min": self.temp_min.take(indexes),
+            "Temp Max": self.temp_max.take(indexes),
+            "Known Group": indexes >= 0,
+        })
+
+    def unknown_codes(self, codes):
+        """
+        Return the distinct codes that are not a known product group, for reporting.
+
+        Args:
+        - codes: A sequence or NumPy array of codes.
+
+        Returns:
+        - list: The unknown values, as given.
+        """
+        values = np.asarray(codes).ravel()
+        unknown = values[self.lookup(values) < 0]
+        return list(dict.fromkeys(unknown.tolist()))
+
+def _as_numbers(codes):
+    """
+    Convert product group codes to integers, with -1 for values that are not whole numbers.
+
+    Args:
+    - codes: A sequence or NumPy array of codes.
+
+    Returns:
+    - numpy.ndarray: int64 codes.
+    """
+    values = np.asarray(codes)
+    if values.dtype.kind in "iu":
+        return values.astype(np.int64, copy=False)
+    if values.dtype.kind != "f":
+        import pandas as pd
+
+        # Strings, objects and mixed input, e.g. codes read from a CSV file
+        values = pd.to_numeric(pd.Series(values.ravel(), dtype=object), errors="coerce").to_numpy(dtype=float).reshape(values.shape)
+    whole = np.isfinite(values) & (values == np.floor(values)) & (np.abs(values) < 2 ** 31)
+    return np.where(whole, values, -1).astype(np.int64)
@@ -0,0 +1,238 @@
+import numpy as np
+from Scripting.ProductGrouping.product_grouping import Combinations, GROUPING_FIELDS, ProductGrouping
+
+# Bit of each grouping in an order mask, in GROUPING_FIELDS order; the same order as
+# ProductClassifier's grouping indexes, so classified order lines map straight to bits
+GROUPING_BITS = {tag: 1 << position for position, tag in enumerate(GROUPING_FIELDS)}
+
+# Product group code -> grouping tag
+_CODE_TAGS = {
+    getattr(grouping.product_groups, code_field): tag
+    for tag, (grouping, code_field, _, _) in GROUPING_FIELDS.items()
+}
+
+class LoadCompatibility:
+    """
+    Check which Combinations a set of product groups can be loaded under, with each
+    combination compiled to an integer bitmask of its groupings.
+
+    A set of groups fits a combination when its mask is a subset of the combination's,
+    a single AND and compare. The cheapest cover of every possible order mask is worked
+    out once when the engine is built, so covering an order is one table lookup, and
+    the batch methods do the same for thousands of orders in one NumPy pass.
+
+    Attributes:
+    - names (list): The combination names, e.g. "FL" or "AZ".
+    - masks (numpy.ndarray): The bitmask of each combination, aligned with names.
+    - cover_table (numpy.ndarray): For every order mask, the bitmask over names of its
+                                   cheapest cover, or -1 if no combinations cover it.
+    """
+
+    def __init__(self, names=None):
+        combinations = {
+            name: members for name, members in vars(Combinations).items()
+            if not name.startswith("_") and isinstance(members, tuple) and (names is None or name in names)
+        }
+        unknown = set(names or ()) - set(combinations)
+        if unknown:
+            raise ValueError(f"Unknown combinations: {', '.join(sorted(unknown))}.")
+
+        # Every grouping compares equal as a dataclass, so members are matched by identity
+        tags_by_instance = {id(grouping): tag for tag, (grouping, _, _, _) in GROUPING_FIELDS.items()}
+        self.names = list(combinations)
+        self.masks = np.array(
+            [_members_mask(members, tags_by_instance) for members in combinations.values()], dtype=np.int64
+        )
+        self.cover_table = self._build_cover_table()
+
+    def mask(self, groups):
+        """
+        Build the order mask of a set of product groups.
+
+        Args:
+        - groups: Grouping tags such as "A", ProductGrouping instances from
+                  product_grouping.py, or product group codes such as 10, in any mix.
+
+        Returns:
+        - int: The order mask.
+
+        Raises:
+        - ValueError: If a group is not a known grouping.
+        """
+        mask = 0
+        for group in groups:
+            mask |= GROUPING_BITS[_tag(group)]
+        return mask
+
+    def feasible(self, groups):
+        """
+        Return the combinations that can carry every one of the groups together.
+
+        Args:
+        - groups: The groups, as for mask().
+
+        Returns:
+        - list: The combination names, in Combinations order.
+
+        Raises:
+        - ValueError: If a group is not a known grouping.
+        """
+        mask = self.mask(groups)
+        return [name for name, combination in zip(self.names, self.masks.tolist()) if combination & mask == mask]
+
+    def can_share(self, groups):
+        """
+        Check whether the groups can share a trailer under at least one combination.
+
+        Args:
+        - groups: The groups, as for mask().
+
+        Returns:
+        - bool: True if any combination carries all of them.
+
+        Raises:
+        - ValueError: If a group is not a known grouping.
+        """
+        return bool(self.feasible(groups))
+
+    def minimal_cover(self, groups):
+        """
+        Return the fewest combinations that together carry every group of an order.
+
+        Ties are broken by the fewest groupings across the chosen combinations, so an
+        order of ambient and frozen goods gets AZ rather than FL.
+
+        Args:
+        - groups: The order's groups, as for mask().
+
+        Returns:
+        - list: The combination names, or None if the combinations cannot carry the order.
+
+        Raises:
+        - ValueError: If a group is not a known grouping.
+        """
+        return self.cover_names(int(self.cover_table[self.mask(groups)]))
+
+    def cover_names(self, cover):
+        """
+        Decode a cover from cover_table or cover_batch into combination names.
+
+        Args:
+        - cover (int): A bitmask over names, or -1 for no cover.
+
+        Returns:
+        - list: The combination names, or None for -1.
+        """
+        if cover < 0:
+            return None
+        return [name for position, name in enumerate(self.names) if cover >> position & 1]
+
+    def feasible_batch(self, masks):
+        """
+        Check many order masks against every combination at once.
+
+        Args:
+        - masks: An array of order masks, e.g. from order_masks().
+
+        Returns:
+        - numpy.ndarray: A (orders, combinations) bool matrix, True where the
+                         combination carries the whole order.
+        """
+        masks = np.asarray(masks, dtype=np.int64)[:, None]
+        return (self.masks[None, :] & masks) == masks
+
+    def cover_batch(self, masks):
+        """
+        Look up the cheapest cover of many order masks at once.
+
+        Args:
+        - masks: An array of order masks, e.g. from order_masks().
+
+        Returns:
+        - numpy.ndarray: The cover of each order as a bitmask over names, -1 where
+                         there is none; decode one with cover_names().
+        """
+        return self.cover_table.take(np.asarray(masks, dtype=np.int64))
+
+    def _build_cover_table(self):
+        """
+        Work out the cheapest cover of every possible order mask.
+
+        Every subset of the combinations is scored by its size, then by the number of
+        groupings it spans, and each order mask gets the lowest scoring subset whose
+        union contains it.
+
+        Returns:
+        - numpy.ndarray: The cover of each order mask, -1 where there is none.
+        """
+        subsets = np.arange(1 << len(self.names), dtype=np.int64)
+        unions = np.zeros(len(subsets), dtype=np.int64)
+        for position, mask in enumerate(self.masks.tolist()):
+            unions[(subsets >> position & 1).astype(bool)] |= mask
+        sizes = np.array([bin(subset).count("1") for subset in subsets.tolist()])
+        spans = np.array([bin(union).count("1") for union in unions.tolist()])
+        scores = sizes * (len(GROUPING_BITS) + 1) + spans
+
+        orders = np.arange(1 << len(GROUPING_BITS), dtype=np.int64)[:, None]
+        covering = (unions[None, :] & orders) == orders
+        best = np.where(covering, scores[None, :], np.iinfo(np.int64).max).argmin(axis=1)
+        return np.where(covering.any(axis=1), subsets[best], -1)
+
+def order_masks(store_ids, codes, classifier):
+    """
+    Build the order mask of every store from order lines in one vectorized pass.
+
+    Args:
+    - store_ids: The store of each order line.
+    - codes: The product group code of each order line.
+    - classifier (ProductClassifier): Classifies the codes; lines with unknown codes are
+                                      left out of the masks, see classifier.unknown_codes().
+
+    Returns:
+    - tuple: (stores, masks), the distinct stores in sorted order and the order mask of each.
+    """
+    indexes = classifier.lookup(codes).astype(np.int64)
+    stores, positions = np.unique(np.asarray(store_ids), return_inverse=True)
+    masks = np.zeros(len(stores), dtype=np.int64)
+    known = indexes >= 0
+    np.bitwise_or.at(masks, positions.ravel()[known], np.left_shift(1, indexes[known]))
+    return stores, masks
+
+def _members_mask(members, tags_by_instance):
+    """
+    Build the bitmask of a combination's groupings.
+
+    Args:
+    - members (tuple): ProductGrouping instances.
+    - tags_by_instance (dict): Grouping tag keyed by instance id().
+
+    Returns:
+    - int: The bitmask.
+    """
+    mask = 0
+    for member in members:
+        mask |= GROUPING_BITS[tags_by_instance[id(member)]]
+    return mask
+
+def _tag(group):
+    """
+    Resolve a group given as a tag, ProductGrouping instance or product group code.
+
+    Args:
+    - group: The group.
+
+    Returns:
+    - str: The grouping tag.
+
+    Raises:
+    - ValueError: If the group is not a known grouping.
+    """
+    if isinstance(group, ProductGrouping):
+        for tag, (grouping, _, _, _) in GROUPING_FIELDS.items():
+            if grouping is group:
+                return tag
+    elif isinstance(group, str) and group in GROUPING_BITS:
+        return group
+    elif isinstance(group, (int, np.integer)) and int(group) in _CODE_TAGS:
+        return _CODE_TAGS[int(group)]
+    raise ValueError(f"'{group}' is not a known product grouping.")
@@ -152,6 +152,24 @@ FP = ProductGrouping(
     warehouse_temp_zones=WarehouseTempZones(flowers_temp_lower=17.0, flowers_temp_upper=11.0)
 )
 
+# Every ProductGrouping carries full ProductGroups, WarehouseAreas and WarehouseTempZones
+# instances, so this records which fields each grouping is defined by:
+# tag -> (grouping, product group field, warehouse area field, (lower temp field, upper temp field))
+GROUPING_FIELDS = {
+    "A": (A, "ten", "ambient", ("ambient_temp_lower", "ambient_temp_upper")),
+    "B": (B, "twenty", "bulk", ("bulk_temp_lower", "bulk_temp_lower_temp_upper")),
+    "BRD": (BRD, "twenty_two", "bread", ("bread_temp_lower", "bread_temp_upper")),
+    "NF": (NF, "thirty", "non_food", ("non_food_temp_lower", "non_food_temp_upper")),
+    "LO": (LO, "thirty_one", "limited_offer", ("limited_offer_temp_lower", "limited_offer_temp_upper")),
+    "CH": (CH, "forty", "chilled", ("chilled_temp_lower", "chilled_temp_upper")),
+    "MILK": (MILK, "forty_one", "milk", ("milk_temp_lower", "milk_temp_upper")),
+    "CON": (CON, "forty_two", "chilled_con", ("chilled_con_temp_lower", "chilled_con_temp_upper")),
+    "MEAT": (MEAT, "fifty", "meat", ("meat_temp_lower", "meat_temp_upper")),
+    "FRZ": (FRZ, "sixty", "freezer", ("freezer_temp_lower", "freezer_temp_upper")),
+    "FV": (FV, "seventy", "fruit_veg", ("fruit_veg_temp_lower", "fruit_veg_temp_upper")),
+    "FP": (FP, "seventy_one", "flowers", ("flowers_temp_lower", "flowers_temp_upper")),
+}
+
 @dataclass
 class Combinations:
     """
@@ -1,23 +1,22 @@
-import os
 import logging
-import bcrypt
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-
-# Load environment variables from the .env file
-load_dotenv()
-
-# Retrieve MongoDB connection string from environment variables
-uri = os.getenv("MONGO_CONNECTION_STRING")
+from Database.Connection.client import get_client
+from Metrics.metrics import instrument
+from User.Passwords.passwords import check_password_async, hash_password_async, needs_rehash
+from User.Session.session import issue_token, verify_token, save_token, load_token
 
 # Initialize a logger for the login module
 login_logger = logging.getLogger("login_logger")
 login_logger.setLevel(logging.DEBUG)
 
+@instrument("login", login_logger)
 async def login(username, password):
     """
     Attempt to log in a user.
 
+    The bcrypt check runs in a worker thread so other requests keep being served
+    while it runs. If the stored hash was created with a lower work factor than
+    BCRYPT_ROUNDS, it is rehashed and saved now that the plain password is known.
+
     Parameters:
     - username (str): The username of the user.
     - password (str): The password entered by the user.
@@ -25,8 +24,8 @@ async def login(username, password):
     Returns:
     - bool: True if login is successful, False otherwise.
     """
-    # Connect to the UserInformation database
-    client = AsyncIOMotorClient(uri)
+    # Use the shared MongoDB client for the UserInformation database
+    client = get_client()
     db = client["UserInformation"]
     collection = db["Users"]
 
@@ -35,16 +34,74 @@ async def login(username, password):
     if user_data:
         # Check if the entered password matches the hashed password in the database
         hashed_password = user_data.get("password", "")
-        if bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8")):
+        if await check_password_async(password, hashed_password):
             # Log the successful login
             login_logger.info(f"User {username} successfully logged in.")
+            if needs_rehash(hashed_password):
+                await _upgrade_hash(collection, user_data["_id"], username, password)
             return True
         else:
             login_logger.error("Incorrect password.")
     else:
         login_logger.error("Username not found.")
 
-    # Close the database connection
-    client.close()
-
     return False
+
+async def login_session(username, password, remember=False):
+    """
+    Log in a user and issue a signed session token.
+
+    Parameters:
+    - username (str): The username of the user.
+    - password (str): The password entered by the user.
+    - remember (bool): Whether to store the token in SESSION_FILE for later invocations.
+
+    Returns:
+    - str: The session token, or None if login failed.
+    """
+    if not await login(username, password):
+        return None
+
+    token = issue_token(username)
+    if remember:
+        save_token(token)
+        login_logger.info(f"Session for user {username} saved.")
+    return token
+
+def resume_session(token=None):
+    """
+    Resume a session from a token without checking the password again.
+
+    Parameters:
+    - token (str): The session token. Default is None to use the one stored in SESSION_FILE.
+
+    Returns:
+    - str: The username of the session, or None if there is no valid session.
+    """
+    token = token or load_token()
+    if token is None:
+        return None
+
+    username = verify_token(token)
+    if username:
+        login_logger.info(f"User {username} resumed a session.")
+    return username
+
+async def _upgrade_hash(collection, user_id, username, password):
+    """
+    Rehash a password with the current work factor and save it.
+
+    A failure here does not fail the login; the upgrade is retried on the next one.
+
+    Parameters:
+    - collection: The Users collection.
+    - user_id: The _id of the user.
+    - username (str): The username, for logging.
+    - password (str): The verified plain password.
+    """
+    try:
+        new_hash = await hash_password_async(password)
+        await collection.update_one({"_id": user_id}, {"$set": {"password": new_hash}})
+        login_logger.info(f"Password hash for user {username} upgraded to the current work factor.")
+    except Exception as e:
+        login_logger.warning(f"Could not upgrade password hash for user {username}: {e}")
@@ -0,0 +1,97 @@
+import asyncio
+from Config.settings import settings
+
+def hash_password(password, rounds=None):
+    """
+    Hash a password with bcrypt.
+
+    This is CPU-bound and takes 100 ms or more at the default work factor, so coroutines
+    should use hash_password_async instead.
+
+    Parameters:
+    - password (str): The password to hash.
+    - rounds (int): The bcrypt work factor. Default is None to use BCRYPT_ROUNDS.
+
+    Returns:
+    - str: The hashed password.
+    """
+    # bcrypt is only needed once a password is actually hashed
+    import bcrypt
+
+    salt = bcrypt.gensalt(rounds=rounds or settings.bcrypt_rounds)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+def check_password(password, hashed_password):
+    """
+    Check a password against a bcrypt hash.
+
+    Parameters:
+    - password (str): The password entered by the user.
+    - hashed_password (str): The stored hash.
+
+    Returns:
+    - bool: True if the password matches.
+    """
+    # bcrypt is only needed once a password is actually checked
+    import bcrypt
+
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+    except ValueError:
+        # The stored value is not a valid bcrypt hash
+        return False
+
+def password_rounds(hashed_password):
+    """
+    Return the work factor a bcrypt hash was created with.
+
+    Parameters:
+    - hashed_password (str): A hash such as "$2b$12$...".
+
+    Returns:
+    - int: The work factor, or 0 if the hash cannot be parsed.
+    """
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+def needs_rehash(hashed_password):
+    """
+    Check whether a hash was created with a lower work factor than BCRYPT_ROUNDS.
+
+    Parameters:
+    - hashed_password (str): The stored hash.
+
+    Returns:
+    - bool: True if the hash should be upgraded.
+    """
+    return password_rounds(hashed_password) < settings.bcrypt_rounds
+
+async def hash_password_async(password, rounds=None):
+    """
+    Hash a password in a worker thread so the event loop keeps running.
+
+    bcrypt releases the GIL while hashing, so concurrent calls run in parallel.
+
+    Parameters:
+    - password (str): The password to hash.
+    - rounds (int): The bcrypt work factor. Default is None to use BCRYPT_ROUNDS.
+
+    Returns:
+    - str: The hashed password.
+    """
+    return await asyncio.to_thread(hash_password, password, rounds)
+
+async def check_password_async(password, hashed_password):
+    """
+    Check a password against a bcrypt hash in a worker thread so the event loop keeps running.
+
+    Parameters:
+    - password (str): The password entered by the user.
+    - hashed_password (str): The stored hash.
+
+    Returns:
+    - bool: True if the password matches.
+    """
+    return await asyncio.to_thread(check_password, password, hashed_password)
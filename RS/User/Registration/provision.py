@@ -0,0 +1,236 @@
+import os
+import csv
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from Config.settings import settings
+from Database.Connection.client import get_client
+from Database.Indexes.indexes import require_unique_usernames
+from Database.InsertMany.file_reader import CSV_EXTENSIONS
+from Metrics.metrics import ROW_ERROR, instrument
+from User.Passwords.passwords import hash_password
+
+# Share the registration module's logger so provisioning lands in the registration log
+registration_logger = logging.getLogger("registration_logger")
+
+# MongoDB error code for a duplicate key violation
+DUPLICATE_KEY_ERROR = 11000
+
+# Columns every row of the provisioning file must provide
+REQUIRED_COLUMNS = ("username", "password")
+
+# Number of rows read from the provisioning file per batch
+DEFAULT_BATCH_SIZE = 1000
+
+@dataclass
+class ProvisionReport:
+    """
+    Data class collecting the per-row outcome of a bulk user provisioning.
+
+    Attributes:
+    - created (list): Usernames of the users that were created.
+    - duplicates (list): (row, username) pairs rejected because the username already exists.
+    - invalid (list): (row, reason) pairs that failed validation and were not sent.
+    - failed (list): (row, reason) pairs rejected by MongoDB for any other reason.
+    - error (str): The error that stopped the provisioning, such as a missing or unsupported file, or None.
+    """
+    created: list = field(default_factory=list)
+    duplicates: list = field(default_factory=list)
+    invalid: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+    error: str = None
+
+    def summary(self):
+        """
+        Return a one-line summary of the provisioning.
+
+        Returns:
+        - str: Counts for each outcome.
+        """
+        return (f"{len(self.created)} created, {len(self.duplicates)} duplicates, "
+                f"{len(self.invalid)} invalid, {len(self.failed)} failed")
+
+@instrument("provision_users", registration_logger, documents=lambda report: len(report.created))
+async def provision_users(file_path, workers=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Create many users from a CSV file with 'username' and 'password' columns.
+
+    The file is read with the csv module rather than the store file reader, so every
+    value is kept exactly as written: pandas type inference would turn a password such
+    as "0123" into 123.0 and "NA" into a blank.
+
+    bcrypt is CPU-bound, so the passwords are hashed in parallel across cores with a
+    process pool while the event loop stays free. The users are then written with one
+    unordered insert_many; the username_unique index rejects names that are already taken
+    without stopping the rest of the file.
+
+    Parameters:
+    - file_path (str): The path to the file of users.
+    - workers (int): The number of hashing processes. Default is None for one per core.
+    - batch_size (int): The number of rows read per batch.
+
+    Returns:
+    - ProvisionReport: The per-row outcome of the provisioning, with error set if it stopped early.
+
+    Raises:
+    - RuntimeError: If the username_unique index is missing and cannot be created.
+    """
+    from pymongo.errors import PyMongoError
+
+    # Refuse to create anyone unless the unique index is in place to reject duplicates
+    await require_unique_usernames()
+
+    report = ProvisionReport()
+    try:
+        # Validate every row before any hashing work is spent on it
+        rows = []
+        seen = set()
+        for batch in _iter_credentials(file_path, batch_size):
+            for row_number, row in batch:
+                try:
+                    username, password = _validate_row(row)
+                except ValueError as ve:
+                    registration_logger.error(f"Validation error on row {row_number}: {ve}", extra=ROW_ERROR)
+                    report.invalid.append((row_number, str(ve)))
+                    continue
+                if username in seen:
+                    report.duplicates.append((row_number, username))
+                    continue
+                seen.add(username)
+                rows.append((row_number, username, password))
+
+        if not rows:
+            registration_logger.info(f"Provisioning from {file_path} finished: {report.summary()}")
+            return report
+
+        # Hash the passwords in chunks across the process pool; gather keeps the chunks in row order
+        passwords = [password for _, _, password in rows]
+        workers = workers or os.cpu_count() or 1
+        chunk_size = max(1, -(-len(passwords) // (workers * 4)))
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            hashed_chunks = await asyncio.gather(*(
+                loop.run_in_executor(pool, _hash_chunk, passwords[start:start + chunk_size], settings.bcrypt_rounds)
+                for start in range(0, len(passwords), chunk_size)
+            ))
+        hashes = [hashed for chunk in hashed_chunks for hashed in chunk]
+
+        documents = [{"username": username, "password": hashed}
+                     for (_, username, _), hashed in zip(rows, hashes)]
+        await _insert_users(documents, rows, report)
+
+        registration_logger.info(f"Provisioning from {file_path} finished: {report.summary()}")
+
+    except PyMongoError as pe:
+        # Log MongoDB-specific errors
+        registration_logger.error(f"MongoDB error: {pe}")
+        report.error = f"MongoDB error: {pe}"
+    except (OSError, ValueError) as e:
+        # Log a missing, unreadable or unsupported file
+        registration_logger.error(f"Cannot read {file_path}: {e}")
+        report.error = f"Cannot read {file_path}: {e}"
+    except Exception as e:
+        # Log unexpected errors
+        registration_logger.error(f"Unexpected error: {e}")
+        report.error = f"Unexpected error: {e}"
+
+    return report
+
+async def _insert_users(documents, rows, report):
+    """
+    Insert the users with one unordered insert_many call and record the outcome.
+
+    Parameters:
+    - documents (list): The user documents to insert.
+    - rows (list): (row, username, password) tuples, in the same order as documents.
+    - report (ProvisionReport): The report to record each row's outcome in.
+    """
+    from pymongo.errors import BulkWriteError
+
+    # Use the shared MongoDB client for the UserInformation database
+    client = get_client()
+    collection = client["UserInformation"]["Users"]
+
+    try:
+        await collection.insert_many(documents, ordered=False)
+        report.created.extend(username for _, username, _ in rows)
+
+    except BulkWriteError as bwe:
+        # Record the rows MongoDB rejected; every other user was created
+        rejected = set()
+        for error in bwe.details.get("writeErrors", []):
+            row_number, username, _ = rows[error["index"]]
+            rejected.add(error["index"])
+            if error.get("code") == DUPLICATE_KEY_ERROR:
+                report.duplicates.append((row_number, username))
+            else:
+                report.failed.append((row_number, error.get("errmsg", "Unknown error")))
+
+        report.created.extend(username for index, (_, username, _) in enumerate(rows) if index not in rejected)
+        registration_logger.warning(f"{len(rejected)} of {len(documents)} users were rejected.")
+
+def _iter_credentials(file_path, batch_size):
+    """
+    Stream a provisioning CSV file as batches of rows, with every value left as text.
+
+    Parameters:
+    - file_path (str): The path to the CSV file.
+    - batch_size (int): The maximum number of rows per batch.
+
+    Yields:
+    - list: (row, values) pairs, where row is the line number in the file and values is
+            a dict keyed by column header.
+
+    Raises:
+    - ValueError: If the file is not a CSV file.
+    - FileNotFoundError: If the file does not exist.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in CSV_EXTENSIONS:
+        raise ValueError(f"Unsupported file type '{extension}'. Provision users from a .csv file.")
+
+    with open(file_path, newline="", encoding="utf-8-sig") as csv_file:
+        reader = csv.DictReader(csv_file)
+        if reader.fieldnames:
+            reader.fieldnames = [name.strip() for name in reader.fieldnames]
+        batch = []
+        for values in reader:
+            # line_num counts physical lines, so blank lines keep the row numbers right
+            batch.append((reader.line_num, values))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+def _hash_chunk(passwords, rounds):
+    """
+    Hash a chunk of passwords in a worker process.
+
+    Parameters:
+    - passwords (list): The passwords to hash.
+    - rounds (int): The bcrypt work factor.
+
+    Returns:
+    - list: The hashed passwords, in the same order.
+    """
+    return [hash_password(password, rounds) for password in passwords]
+
+def _validate_row(row):
+    """
+    Check that a provisioning row has a username and a password.
+
+    Parameters:
+    - row (dict): A row from the provisioning file.
+
+    Returns:
+    - tuple: (username, password).
+
+    Raises:
+    - ValueError: If a column is missing or empty.
+    """
+    for column in REQUIRED_COLUMNS:
+        if row.get(column) is None or not str(row[column]).strip():
+            raise ValueError(f"Column '{column}' is missing or empty.")
+    return str(row["username"]).strip(), str(row["password"])
@@ -1,23 +1,22 @@
-import bcrypt
-import os
 import logging
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-
-# Load environment variables from the .env file
-load_dotenv()
-
-# Retrieve MongoDB connection string from environment variables
-uri = os.getenv("MONGO_CONNECTION_STRING")
+from Database.Connection.client import get_client
+from Database.Indexes.indexes import require_unique_usernames
+from Metrics.metrics import instrument
+from User.Passwords.passwords import hash_password, hash_password_async
 
 # Initialize a logger for the registration module
 registration_logger = logging.getLogger("registration_logger")
 registration_logger.setLevel(logging.DEBUG)
 
+@instrument("registration", registration_logger)
 async def registration(username, password, confirm_password):
     """
     Register a new user.
 
+    Usernames are kept unique by the username_unique index, so the user is written with
+    a single insert_one and a duplicate-key error means the name is taken. Two concurrent
+    registrations of the same username can no longer both succeed.
+
     Parameters:
     - username (str): The username for the new user.
     - password (str): The password for the new user.
@@ -25,43 +24,47 @@ async def registration(username, password, confirm_password):
 
     Returns:
     - str: The ID of the newly registered user.
+
+    Raises:
+    - ValueError: If the passwords do not match or the username is taken.
+    - RuntimeError: If the username_unique index is missing and cannot be created.
     """
+    from pymongo.errors import DuplicateKeyError
+
     # Check if passwords match
     if password != confirm_password:
         registration_logger.error("Password and confirm password do not match.")
         raise ValueError("Password and confirm password do not match.")
 
-    # Connect to the UserInformation database
-    client = AsyncIOMotorClient(uri)
+    # Refuse to register anyone unless the unique index is in place to reject duplicates
+    await require_unique_usernames()
+
+    # Use the shared MongoDB client for the UserInformation database
+    client = get_client()
     db = client["UserInformation"]
     collection = db["Users"]
 
-    # Check if the username already exists
-    existing_user = await collection.find_one({"username": username})
-    if existing_user:
+    # Hash the password with bcrypt in a worker thread so the event loop keeps running
+    hashed_password = await hash_password_async(password)
+
+    # Insert the new user into the Users collection; the unique index rejects taken usernames
+    try:
+        result = await collection.insert_one({
+            "username": username,
+            "password": hashed_password
+        })
+    except DuplicateKeyError:
         registration_logger.error("Username already exists.")
         raise ValueError("Username already exists. Please choose another username.")
 
-    # Hash the password (Note: You should use a secure password hashing library)
-    hashed_password = hash_password_function(password)
-
-    # Insert the new user into the Users collection
-    result = await collection.insert_one({
-        "username": username,
-        "password": hashed_password
-    })
-
     # Log the registration success
     registration_logger.info(f"User {username} successfully registered with ID: {result.inserted_id}")
 
-    # Close the database connection
-    client.close()
-
     return result.inserted_id
 
 def hash_password_function(password):
     """
-    Hash the given password using bcrypt.
+    Hash the given password using bcrypt with the BCRYPT_ROUNDS work factor.
 
     Parameters:
     - password (str): The password to be hashed.
@@ -69,7 +72,4 @@ def hash_password_function(password):
     Returns:
     - str: The hashed password.
     """
-    # Generate a salt and hash the password using bcrypt
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode("utf-8"), salt)
-    return hashed_password.decode("utf-8")
+    return hash_password(password)
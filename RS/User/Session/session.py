@@ -0,0 +1,148 @@
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import logging
+import secrets
+from Config.settings import settings
+
+# Share the login module's logger so session events land in the login log
+login_logger = logging.getLogger("login_logger")
+
+# Signing key used when SESSION_SECRET is not set; tokens then only last for this process
+_fallback_secret = None
+
+def issue_token(username, ttl=None):
+    """
+    Create a signed, expiring session token for a user.
+
+    The token is "<payload>.<signature>", where the payload is the base64url encoded
+    JSON {"sub": username, "iat": issued, "exp": expires} and the signature is an
+    HMAC-SHA256 of the payload with SESSION_SECRET.
+
+    Parameters:
+    - username (str): The user the token is for.
+    - ttl (int): How long the token is valid, in seconds. Default is None to use SESSION_TTL.
+
+    Returns:
+    - str: The token.
+    """
+    issued = int(time.time())
+    payload = {"sub": username, "iat": issued, "exp": issued + (ttl or settings.session_ttl)}
+    encoded = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return f"{encoded}.{_sign(encoded)}"
+
+def verify_token(token):
+    """
+    Check a session token's signature and expiry.
+
+    Parameters:
+    - token (str): The token from issue_token.
+
+    Returns:
+    - str: The username the token was issued to, or None if it is invalid or expired.
+    """
+    try:
+        encoded, signature = token.strip().split(".")
+        if not hmac.compare_digest(signature, _sign(encoded)):
+            login_logger.warning("Session token signature is invalid.")
+            return None
+        payload = json.loads(_b64decode(encoded))
+    except (ValueError, AttributeError):
+        login_logger.warning("Session token is malformed.")
+        return None
+
+    if payload.get("exp", 0) < time.time():
+        login_logger.info("Session token has expired.")
+        return None
+    return payload.get("sub")
+
+def save_token(token, file_path=None):
+    """
+    Store a session token so later invocations can reuse it.
+
+    The file is created readable by the current user only.
+
+    Parameters:
+    - token (str): The token to store.
+    - file_path (str): Where to store it. Default is None to use SESSION_FILE.
+    """
+    file_path = file_path or settings.session_file
+    descriptor = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(descriptor, "w", encoding="utf-8") as token_file:
+        token_file.write(token)
+
+def load_token(file_path=None):
+    """
+    Read a stored session token.
+
+    Parameters:
+    - file_path (str): Where it is stored. Default is None to use SESSION_FILE.
+
+    Returns:
+    - str: The token, or None if none is stored.
+    """
+    file_path = file_path or settings.session_file
+    try:
+        with open(file_path, encoding="utf-8") as token_file:
+            return token_file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def clear_token(file_path=None):
+    """
+    Delete a stored session token.
+
+    Parameters:
+    - file_path (str): Where it is stored. Default is None to use SESSION_FILE.
+    """
+    try:
+        os.remove(file_path or settings.session_file)
+    except FileNotFoundError:
+        pass
+
+def _sign(encoded):
+    """
+    Sign an encoded payload.
+
+    Parameters:
+    - encoded (str): The base64url encoded payload.
+
+    Returns:
+    - str: The base64url encoded HMAC-SHA256 signature.
+    """
+    global _fallback_secret
+    secret = settings.session_secret
+    if not secret:
+        if _fallback_secret is None:
+            login_logger.warning("SESSION_SECRET is not set; session tokens will only be valid in this process.")
+            _fallback_secret = secrets.token_hex(32)
+        secret = _fallback_secret
+    digest = hmac.new(secret.encode("utf-8"), encoded.encode("ascii"), hashlib.sha256).digest()
+    return _b64encode(digest)
+
+def _b64encode(data):
+    """
+    Encode bytes as unpadded base64url.
+
+    Parameters:
+    - data (bytes): The bytes to encode.
+
+    Returns:
+    - str: The encoded text.
+    """
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(text):
+    """
+    Decode unpadded base64url text.
+
+    Parameters:
+    - text (str): The encoded text.
+
+    Returns:
+    - bytes: The decoded bytes.
+    """
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
@@ -0,0 +1,128 @@
+import asyncio
+
+# Number of operations in flight at once when no concurrency is given
+DEFAULT_CONCURRENCY = 16
+
+class WorkPool:
+    """
+    Run a coroutine function over many items with a bounded number in flight.
+
+    A slot on a bounded semaphore is taken before the next item is pulled from the
+    input, so a slow database applies backpressure all the way to the file reader:
+    at most concurrency items are read ahead of the writes. Results are returned in
+    input order regardless of the order the operations finish in.
+
+    Attributes:
+    - concurrency (int): The maximum number of operations in flight.
+    - progress (callable): Called as progress(completed, total) after each operation;
+                           total is None when the input has no length.
+    - return_exceptions (bool): Whether a failing operation's exception is returned in
+                                its result slot instead of cancelling the rest and raising.
+    - completed (int): The number of operations finished by the last map() call.
+    - failed (int): The number of those that raised.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, progress=None, return_exceptions=False):
+        self.concurrency = max(1, concurrency)
+        self.progress = progress
+        self.return_exceptions = return_exceptions
+        self.completed = 0
+        self.failed = 0
+
+    async def map(self, function, items):
+        """
+        Await function(item) for every item, with at most concurrency calls in flight.
+
+        Args:
+        - function (callable): A coroutine function taking one item.
+        - items: A list, iterator or async iterator of items.
+
+        Returns:
+        - list: The results, in the same order as items.
+
+        Raises:
+        - Exception: The first exception raised by function, unless return_exceptions is set;
+                     the operations still in flight are cancelled and awaited first.
+        """
+        self.completed = 0
+        self.failed = 0
+        total = len(items) if hasattr(items, "__len__") else None
+        semaphore = asyncio.BoundedSemaphore(self.concurrency)
+        results = {}
+        pending = set()
+        first_error = None
+
+        async def run(index, item):
+            try:
+                results[index] = await function(item)
+            except Exception as e:
+                self.failed += 1
+                if not self.return_exceptions:
+                    raise
+                results[index] = e
+            finally:
+                self.completed += 1
+                if self.progress is not None:
+                    self.progress(self.completed, total)
+
+        def on_done(task):
+            nonlocal first_error
+            # Free the slot here rather than in run(), so tasks cancelled before they start free theirs too
+            semaphore.release()
+            pending.discard(task)
+            if task.cancelled() or task.exception() is None or first_error is not None:
+                return
+            first_error = task.exception()
+            for other in list(pending):
+                other.cancel()
+
+        index = 0
+        try:
+            iterator = _aiter(items)
+            while first_error is None:
+                # Wait for a free slot before reading the next item
+                await semaphore.acquire()
+                if first_error is not None:
+                    semaphore.release()
+                    break
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    semaphore.release()
+                    break
+                task = asyncio.create_task(run(index, item))
+                pending.add(task)
+                task.add_done_callback(on_done)
+                index += 1
+
+            while pending:
+                await asyncio.wait(list(pending))
+        finally:
+            # Do not leave operations running if the caller is cancelled, and wait for the
+            # cancelled ones to unwind so their cursors and writes are closed before returning
+            cancelled = list(pending)
+            for task in cancelled:
+                task.cancel()
+            await asyncio.gather(*cancelled, return_exceptions=True)
+            await iterator.aclose()
+
+        if first_error is not None:
+            raise first_error
+        return [results[position] for position in range(index) if position in results]
+
+async def _aiter(items):
+    """
+    Iterate a regular or async iterable asynchronously.
+
+    Args:
+    - items: A list, iterator or async iterator.
+
+    Yields:
+    - The items.
+    """
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
@@ -1,17 +1,97 @@
+import sys
+import time
 import asyncio
-from Logging.logging import setup_logging
-from Database.Connection.ping_connection import connect_to_database
-from Database.Delete.delete_docs import delete_one_document, delete_many_documents
+from Logging.logging import setup_logging, shutdown_logging
+from Database.Connection.ping_connection import connect_to_database, disconnect_from_database, connection_logger
+from Database.Indexes.indexes import ensure_indexes, check_query_plans
+from Database.Migration.status import load_migration_status
+from Database.Delete.delete_docs import delete_one_document, delete_many_documents, delete_documents_by_ids
+from Database.Delete.criteria import parse_criteria, CRITERIA_HELP
 from Database.InsertOne.insert_one import insert_document
-from Database.InsertMany.insert_many import insert_documents
+from Database.InsertMany.insert_many import insert_documents, sync_documents
 from Database.SearchOne.search_one import search_one
-from Database.SearchAll.search_all import search_all
-from Database.Modify.modify import modify_document
+from Database.SearchMany.search_many import search_many, read_ids
+from Database.SearchAll.search_all import search_page, DEFAULT_PAGE_SIZE
+from Database.Modify.modify import modify_document, modify_documents, WEEKDAYS
+from Database.Export.export import export_documents, EXPORT_COLUMNS
+from Database.Model.store import Store
+from Database.Model.hours import parse_hours
+from Database.OpeningHours.opening_hours import stores_open_at, stores_open_during
 from User.Registration.register import registration
-from User.Login.login import login
+from User.Registration.provision import provision_users
+from User.Login.login import login_session, resume_session
+from Database.Cache.store_cache import store_cache
+from Metrics.metrics import metrics
+from CLI.cli import run_cli
 
 log_dir = r"RS\Logging\Loggers"
 
+# Key that leaves the menu; fixed so adding options never moves it
+EXIT_CHOICE = "0"
+
+# Options shown to logged-in users, as (key, label), in display order
+MENU_OPTIONS = (
+    ("3", "Insert one store"),
+    ("4", "Insert many stores from Excel, CSV or Parquet"),
+    ("5", "Delete one store by ID"),
+    ("6", "Delete many stores based on criteria, a list of IDs, or all to remove all stores"),
+    ("7", "Search for a store by ID"),
+    ("8", "Search for all stores"),
+    ("9", "Modify store restrictions for an existing store"),
+    ("10", "Search for many stores by ID"),
+    ("11", "Check query plans for collection scans"),
+    ("12", "Show operation statistics"),
+    ("13", "Provision users from a CSV file"),
+    ("14", "Export stores to CSV, Excel or Parquet"),
+    ("15", "Find stores open at a time or during a delivery window"),
+    (EXIT_CHOICE, "Exit"),
+)
+
+# Every valid menu choice
+MENU_CHOICES = [key for key, _ in MENU_OPTIONS]
+
+def print_store(store):
+    """
+    Print a store document, showing None for any field that was not returned.
+
+    Parameters:
+    - store (dict): The store document, in the compact or legacy layout.
+    """
+    store = Store.from_document(store)
+    print(f"Store ID: {store.id}")
+    print(f"Store Name: {store.name}")
+    print(f"Store Address: {store.address}")
+    print(f"Store Postcode: {store.postcode}")
+    print(f"Kilometers: {store.kilometers}")
+    print(f"Does the store require a tail lift? {store.tail_lift}")
+
+    # Print Store Restrictions if present
+    if store.restrictions:
+        print("Store Restrictions:")
+        for day, hours in store.restrictions.items():
+            print(f"{day}: {hours}")
+
+    print("-" * 30)
+
+def read_restrictions():
+    """
+    Prompt for the opening hours of each weekday, asking again until they can be read.
+
+    Returns:
+    - dict: Opening hours per weekday; empty for days left blank.
+    """
+    store_restrictions = {}
+    for day in WEEKDAYS:
+        while True:
+            opening_hours = input(f"Enter opening hours for {day} (e.g., 09:00 AM - 05:00 PM, or Closed): ")
+            try:
+                parse_hours(opening_hours)
+                break
+            except ValueError as ve:
+                print(ve)
+        store_restrictions[day] = opening_hours
+    return store_restrictions
+
 async def main():
     """
     Main function for the Route Solutions application.
@@ -26,16 +106,34 @@ async def main():
     3. Insert one store
     4. Insert many stores from Excel
     5. Delete one store by ID
-    6. Delete many stores based on criteria or all to remove all stores
+    6. Delete many stores based on criteria, a list of IDs, or all to remove all stores
     7. Search for a store by ID
     8. Search for all stores
     9. Modify store restrictions for an existing store  # Added new option
+    10. Search for many stores by ID
+    11. Check query plans for collection scans
+    12. Show operation statistics
+    13. Provision users from a CSV file
+    14. Export stores to CSV, Excel or Parquet
+    15. Find stores open at a time or during a delivery window
+    0. Exit
     """
 
-    # Connect to the MongoDB database
-    await connect_to_database()
+    startup_started = time.perf_counter()
+
+    # Connect to the MongoDB database and, concurrently, find out whether criteria still need to match
+    # stores in the legacy layout, then make sure every index those criteria rely on exists
+    connect_ms, legacy = await asyncio.gather(connect_to_database(), load_migration_status())
+    await ensure_indexes(legacy=legacy)
+    if connect_ms is None:
+        print("Could not connect to MongoDB; see the connection log. Store operations will fail until it is reachable.")
+    connection_logger.info(f"Startup completed in {(time.perf_counter() - startup_started) * 1000:.1f} ms.")
     
-    is_user_logged_in = False
+    # Reuse a stored session token instead of asking for the password again
+    session_user = resume_session()
+    is_user_logged_in = session_user is not None
+    if is_user_logged_in:
+        print(f"Welcome back, {session_user}.")
 
     while True:
         try:
@@ -56,8 +154,8 @@ async def main():
                     try:
                         await registration(username, password, confirm_password)
                         print("Registration successful. Please login.")
-                    except ValueError as ve:
-                        print(f"Registration error: {ve}")
+                    except (ValueError, RuntimeError) as e:
+                        print(f"Registration error: {e}")
 
                 elif choice == '2':
                     # Login
@@ -65,8 +163,8 @@ async def main():
                     while login_attempts < 3:  # Allow three login attempts
                         username = input("Enter your username: ")
                         password = input("Enter your password: ")
-                        if await login(username, password):
-                            print("Login successful. You can now access options 3 to 9.")
+                        if await login_session(username, password, remember=True):
+                            print("Login successful. You can now access the store options.")
                             is_user_logged_in = True
                             break
                         else:
@@ -83,20 +181,14 @@ async def main():
             else:
                 # Show options for logged-in users
                 print("Choose an option:")
-                print("3. Insert one store")
-                print("4. Insert many stores from Excel")
-                print("5. Delete one store by ID")
-                print("6. Delete many stores based on criteria or all to remove all stores")
-                print("7. Search for a store by ID")
-                print("8. Search for all stores")
-                print("9. Modify store restrictions for an existing store")
-                print("10. Exit")
+                for key, label in MENU_OPTIONS:
+                    print(f"{key}. {label}")
 
                 # Get user choice
-                choice = input("Enter your choice (3 to 10): ")
+                choice = input(f"Enter your choice ({', '.join(MENU_CHOICES)}): ").strip()
 
-                if not choice.isdigit() or choice not in ['3', '4', '5', '6', '7', '8', '9', '10']:
-                    raise ValueError("Invalid input. Please enter a number between 3 and 10.")
+                if choice not in MENU_CHOICES:
+                    raise ValueError(f"Invalid input. Please enter one of {', '.join(MENU_CHOICES)}.")
 
                 if choice == '3':
                     # Insert one store
@@ -106,10 +198,7 @@ async def main():
                     store_postcode_value = input("Enter store postcode: ")
                     kms_value = float(input("Enter KMS: "))
                     tail_lift_value = input("Does the store require a tail lift? (True/False): ").lower() == "true"
-                    store_restrictions = {}
-                    for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]:
-                        opening_hours = input(f"Enter opening hours for {day} (e.g., 09:00 AM - 05:00 PM): ")
-                        store_restrictions[day] = opening_hours
+                    store_restrictions = read_restrictions()
 
                     await insert_document(
                         id=id_value,
@@ -124,11 +213,28 @@ async def main():
                 elif choice == '4':
                     # Insert many stores from Excel
                     # Get file path for Excel file
-                    file_path = input("Enter the path to the Excel file: ")
+                    file_path = input("Enter the path to the Excel, CSV or Parquet file: ")
+
+                    sync_mode = input("Sync with the existing stores and write only changes? (y/n): ").lower() == 'y'
 
                     try:
-                        # Create an instance of InsertMany using the file path
-                        await insert_documents(file_path)
+                        if sync_mode:
+                            # Apply only the inserts, updates and optional deletes the file implies
+                            delete_missing = input("Delete stores that are not in the file? (y/n): ").lower() == 'y'
+                            report = await sync_documents(file_path, delete_missing=delete_missing)
+                            print(f"Sync finished: {report.summary()}")
+                            for row_number, reason in report.invalid:
+                                print(f"Row {row_number}: {reason}")
+                        else:
+                            # Import the stores in batches and show the per-row outcome
+                            report = await insert_documents(file_path)
+                            if report.error:
+                                print(f"Import stopped: {report.error}")
+                            print(f"Import finished: {report.summary()}")
+                            for row_number, store_id in report.duplicates:
+                                print(f"Row {row_number}: duplicate store ID {store_id}")
+                            for row_number, reason in report.invalid + report.failed:
+                                print(f"Row {row_number}: {reason}")
 
                     except FileNotFoundError as e:
                         print(f"File not found: {file_path}")
@@ -143,16 +249,32 @@ async def main():
                     await delete_one_document(document_id)
 
                 elif choice == '6':
-                    # Delete many stores based on criteria or all to remove all stores
-                    criteria_or_all = input("Enter 'all' to delete all stores or provide criteria for deletion: ")
-                    delete_instance = delete_many_documents()
+                    # Delete many stores based on criteria, a list of IDs, or all to remove all stores
+                    print(CRITERIA_HELP)
+                    criteria_or_all = input("Enter 'all' to delete all stores, 'ids' to delete a list or file of IDs, or provide criteria for deletion: ").strip()
 
                     if criteria_or_all.lower() == 'all':
                         # Delete all documents in the "Stores" collection
-                        await delete_instance
+                        await delete_many_documents('all')
+
+                    elif criteria_or_all.lower() == 'ids':
+                        # Delete the listed stores in batched $in deletes
+                        ids_value = input("Enter store IDs separated by commas, or the path to a file of IDs: ")
+                        ids = read_ids(ids_value)
+                        if input(f"Delete {len(ids)} stores? (y/n): ").lower() == 'y':
+                            deleted = await delete_documents_by_ids(ids)
+                            print(f"{deleted} stores deleted.")
+
                     else:
-                        # Delete based on user-defined criteria
-                        await delete_instance.delete_many_documents(criteria_or_all)
+                        # Validate the criteria, show how many stores match, then confirm
+                        parse_criteria(criteria_or_all)
+                        matched = await delete_many_documents(criteria_or_all, dry_run=True)
+                        if matched:
+                            if input(f"{matched} stores match. Delete them? (y/n): ").lower() == 'y':
+                                deleted = await delete_many_documents(criteria_or_all)
+                                print(f"{deleted} stores deleted.")
+                        else:
+                            print("No stores match the criteria.")
 
                 elif choice == '7':
                     # Search for a store by ID
@@ -161,78 +283,189 @@ async def main():
                     if result:
                         print("-" * 30)
                         print("Store found:")
-                        print(f"Store ID: {result['_id']}")
-                        print(f"Store Name: {result['Store name']}")
-                        print(f"Store Address: {result['Store Address']}")
-                        print(f"Store Postcode: {result['Store Postcode']}")
-                        print(f"Kilometers: {result['Kilometers']}")
-                        print(f"Does the store require a tail lift? {result['Does the store require a tail lift? (True/False)']}")
-                        
-                        # Print Store Restrictions if present
-                        store_restrictions = result.get('Store Restrictions', {})
-                        if store_restrictions:
-                            print("Store Restrictions:")
-                            for day, hours in store_restrictions.items():
-                                print(f"{day}: {hours}")
-                        
-                        print("-" * 30)
+                        print_store(result)
                     else:
                         print(f"No store found with ID: {document_id}")
 
                 elif choice == '8':
-                    # Search for all stores
-                    results = await search_all()
-                    if results:
+                    # Search for all stores, one page at a time
+                    page_number = 0
+                    after_id = None
+                    while True:
+                        stores, after_id = await search_page(DEFAULT_PAGE_SIZE, after_id)
+                        if not stores:
+                            if page_number == 0:
+                                print("No stores found.")
+                            break
+
+                        page_number += 1
                         print("-" * 30)
-                        print("All stores found:")
-                        for store in results:
-                            print(f"Store ID: {store['_id']}")
-                            print(f"Store Name: {store['Store name']}")
-                            print(f"Store Address: {store['Store Address']}")
-                            print(f"Store Postcode: {store['Store Postcode']}")
-                            print(f"Kilometers: {store['Kilometers']}")
-                            print(f"Does the store require a tail lift? {store['Does the store require a tail lift? (True/False)']}")
-                            
-                            # Print Store Restrictions if present
-                            store_restrictions = store.get('Store Restrictions', {})
-                            if store_restrictions:
-                                print("Store Restrictions:")
-                                for day, hours in store_restrictions.items():
-                                    print(f"{day}: {hours}")
-                            
-                            print("-" * 30)
-                    else:
-                        print("No stores found.")
+                        print(f"Stores page {page_number}:")
+                        for store in stores:
+                            print_store(store)
+
+                        if after_id is None or input("Press Enter for the next page or 'q' to stop: ").lower() == 'q':
+                            break
 
                 elif choice == '9':
-                    # Modify store restrictions
-                    document_id = input("Enter the ID of the store to modify: ")
-                    store_restrictions = {}
-                    for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]:
-                        opening_hours = input(f"Enter opening hours for {day} (e.g., 09:00 AM - 05:00 PM): ")
-                        store_restrictions[day] = opening_hours
+                    # Modify store restrictions for one store, or many from a spreadsheet
+                    document_id = input("Enter the ID of the store to modify, or 'file' to update many stores from a spreadsheet: ").strip()
+
+                    if document_id.lower() == 'file':
+                        file_path = input("Enter the path to the restrictions file (columns: ID, Monday ... Sunday): ")
+                        report = await modify_documents(file_path)
+                        if report.error:
+                            print(f"Update stopped: {report.error}")
+                        print(f"Update finished: {report.summary()}")
+                        for row_number, reason in report.invalid:
+                            print(f"Row {row_number}: {reason}")
+                        continue
+
+                    store_restrictions = read_restrictions()
 
                     try:
-                        await modify_document(
+                        if not await modify_document(
                             document_id=document_id,
                             store_restrictions=store_restrictions
-                        )
+                        ):
+                            print(f"No store was modified with ID: {document_id}")
                     except Exception as e:
                         print(f"An error occurred: {e}")
 
                 elif choice == '10':
+                    # Search for many stores by ID in one round trip
+                    ids_value = input("Enter store IDs separated by commas, or the path to a file of IDs: ")
+                    try:
+                        found, missing = await search_many(read_ids(ids_value))
+                    except (OSError, ValueError) as e:
+                        print(f"Could not read store IDs: {e}")
+                        continue
+
+                    print("-" * 30)
+                    print(f"{len(found)} stores found:")
+                    for store in found.values():
+                        print_store(store)
+                    if missing:
+                        print(f"No stores found with IDs: {', '.join(str(store_id) for store_id in missing)}")
+
+                elif choice == '11':
+                    # Explain each query shape and flag collection scans
+                    results = await check_query_plans()
+                    print("-" * 30)
+                    for result in results:
+                        status = "COLLSCAN" if result["collscan"] else "OK"
+                        print(f"[{status}] {result['query']}: {' > '.join(result['stages'])}")
+                    print("-" * 30)
+
+                elif choice == '12':
+                    # Show latency, error and throughput statistics for each operation
+                    print("-" * 30)
+                    print(f"{'Operation':<25}{'Calls':>8}{'Errors':>8}{'Bad rows':>10}{'p50 ms':>10}{'p99 ms':>10}{'Docs/s':>12}")
+                    for name, stats in metrics.snapshot()["operations"].items():
+                        print(f"{name:<25}{stats['count']:>8}{stats['errors']:>8}{stats['row_errors']:>10}{stats['p50_ms']:>10.1f}"
+                              f"{stats['p99_ms']:>10.1f}{stats['documents_per_second']:>12.1f}")
+                    cache_stats = store_cache.stats()
+                    print(f"Store cache: {cache_stats['size']} entries, {cache_stats['hits']} hits, "
+                          f"{cache_stats['misses']} misses ({cache_stats['hit_ratio']:.0%} hit ratio)")
+                    print("-" * 30)
+
+                    export_path = input("Enter a file path to export the statistics (.prom for Prometheus, otherwise JSON), or press Enter to skip: ").strip()
+                    if export_path:
+                        try:
+                            metrics.export(export_path)
+                            print(f"Statistics exported to {export_path}")
+                        except OSError as oe:
+                            print(f"Could not export the statistics: {oe}")
+
+                elif choice == '13':
+                    # Create many user accounts from a file of usernames and passwords
+                    file_path = input("Enter the path to the CSV file with 'username' and 'password' columns: ")
+                    try:
+                        report = await provision_users(file_path)
+                    except RuntimeError as re:
+                        print(f"Provisioning error: {re}")
+                        continue
+                    if report.error:
+                        print(f"Provisioning stopped: {report.error} ({report.summary()})")
+                        continue
+                    print(f"Provisioning finished: {report.summary()}")
+                    for row_number, username in report.duplicates:
+                        print(f"Row {row_number}: username {username} already exists")
+                    for row_number, reason in report.invalid + report.failed:
+                        print(f"Row {row_number}: {reason}")
+
+                elif choice == '14':
+                    # Stream stores to a file that can be imported again
+                    file_path = input("Enter the path to export to (.csv, .xlsx or .parquet): ").strip()
+                    criteria = input("Enter criteria to export matching stores only, or press Enter for all stores: ").strip()
+                    columns = input(f"Enter comma separated columns ({', '.join(EXPORT_COLUMNS)}), or press Enter for all: ").strip()
+
+                    try:
+                        filter_query = parse_criteria(criteria) if criteria else None
+                        column_list = [column.strip() for column in columns.split(",") if column.strip()] or None
+                        exported = await export_documents(file_path, filter_query, column_list)
+                        print(f"{exported} stores exported to {file_path}")
+                    except ValueError as ve:
+                        print(f"Export error: {ve}")
+                    except Exception as e:
+                        # File and MongoDB errors; the partial file has been deleted
+                        print(f"Export failed: {e}")
+
+                elif choice == '15':
+                    # Find the stores taking deliveries at a time, or during part of a window
+                    day = input("Enter the day (e.g., Monday): ").strip()
+                    start = input("Enter the time, or the start of the window (e.g., 10:30 AM): ").strip()
+                    end = input("Enter the end of the window, or press Enter to search for a single time: ").strip()
+                    criteria = input("Enter criteria to narrow the search, or press Enter for all stores: ").strip()
+
+                    try:
+                        filter_query = parse_criteria(criteria) if criteria else None
+                        if end:
+                            stores = await stores_open_during(day, start, end, filter_query)
+                        else:
+                            stores = await stores_open_at(day, start, filter_query)
+                    except ValueError as ve:
+                        print(f"Search error: {ve}")
+                        continue
+
+                    print("-" * 30)
+                    print(f"{len(stores)} stores open:")
+                    for store in stores:
+                        print_store(store)
+
+                elif choice == EXIT_CHOICE:
                     # Exit the program
                     break
 
-                else:
-                    print("Invalid choice. Please enter a number between 3 and 10.")
-
         except ValueError as ve:
             print(f"Error: {ve}")
             continue
+        except Exception as e:
+            # A failed search is reported without ending the session
+            print(f"Unexpected error: {e}; see the logs.")
+            continue
+
+async def run():
+    """
+    Run the application and close the shared MongoDB client on exit.
+    """
+    try:
+        await main()
+    finally:
+        disconnect_from_database()
 
 if __name__ == "__main__":
     # Set up logging
     setup_logging(log_dir)
-    # Run the main function
-    asyncio.run(main())
+    exit_code = 0
+    try:
+        if len(sys.argv) > 1:
+            # Run a single command or batch file non-interactively
+            exit_code = asyncio.run(run_cli(sys.argv[1:]))
+        else:
+            # Run the main function
+            asyncio.run(run())
+    finally:
+        # Write any queued log records before exiting
+        shutdown_logging()
+    sys.exit(exit_code)
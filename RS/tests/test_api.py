@@ -0,0 +1,93 @@
+import asyncio
+import dataclasses
+import pytest
+import API.api as api
+from aiohttp.test_utils import TestClient, TestServer
+
+AUTH = {"Authorization": "Bearer good"}
+
+STORE = {"id": 5, "name": "Depot", "address": "1 High St", "postcode": "AB1 2CD", "km": 4.5, "tail_lift": False}
+
+@pytest.fixture(autouse=True)
+def fake_tokens(monkeypatch):
+    monkeypatch.setattr(api, "verify_token", lambda token: "alice" if token == "good" else None)
+
+def request(method, path, **kwargs):
+    async def send():
+        app = api.create_app()
+        # No database: skip connecting on startup
+        app.on_startup.clear()
+        app.on_cleanup.clear()
+        async with TestClient(TestServer(app)) as client:
+            response = await client.request(method, path, **kwargs)
+            return response.status, await response.text()
+    return asyncio.run(send())
+
+def failing():
+    from pymongo.errors import PyMongoError
+
+    async def fail(*args, **kwargs):
+        raise PyMongoError("connection lost")
+    return fail
+
+def returning(value):
+    async def result(*args, **kwargs):
+        return value
+    return result
+
+def test_health_is_public_but_metrics_needs_a_token():
+    assert request("GET", "/health")[0] == 200
+    assert request("GET", "/metrics")[0] == 401
+    assert request("GET", "/metrics", headers=AUTH)[0] == 200
+
+def test_metrics_can_be_made_public(monkeypatch):
+    monkeypatch.setattr(api, "settings", dataclasses.replace(api.settings, api_public_metrics=True))
+    assert request("GET", "/metrics")[0] == 200
+    assert request("GET", "/stores/5")[0] == 401
+
+def test_failed_queries_return_503(monkeypatch):
+    monkeypatch.setattr(api, "search_one", failing())
+    monkeypatch.setattr(api, "search_page", failing())
+    monkeypatch.setattr(api, "stores_open_at", failing())
+    assert request("GET", "/stores/5", headers=AUTH)[0] == 503
+    assert request("GET", "/stores", headers=AUTH)[0] == 503
+    assert request("GET", "/stores/open?day=mo&at=10:00", headers=AUTH)[0] == 503
+
+def test_failed_writes_return_503(monkeypatch):
+    monkeypatch.setattr(api, "insert_document", failing())
+    monkeypatch.setattr(api, "modify_document", failing())
+    monkeypatch.setattr(api, "delete_one_document", failing())
+    assert request("POST", "/stores", json=STORE, headers=AUTH)[0] == 503
+    assert request("PUT", "/stores/5/restrictions", json={"Monday": "9am - 5pm"}, headers=AUTH)[0] == 503
+    assert request("DELETE", "/stores/5", headers=AUTH)[0] == 503
+
+def test_missing_and_duplicate_stores(monkeypatch):
+    monkeypatch.setattr(api, "search_one", returning(None))
+    monkeypatch.setattr(api, "insert_document", returning(None))
+    monkeypatch.setattr(api, "modify_document", returning(False))
+    monkeypatch.setattr(api, "delete_one_document", returning(False))
+    assert request("GET", "/stores/5", headers=AUTH)[0] == 404
+    assert request("POST", "/stores", json=STORE, headers=AUTH)[0] == 409
+    assert request("PUT", "/stores/5/restrictions", json={"Monday": "9am - 5pm"}, headers=AUTH)[0] == 404
+    assert request("DELETE", "/stores/5", headers=AUTH)[0] == 404
+
+def test_invalid_input_returns_400():
+    assert request("GET", "/stores?ids=1,x", headers=AUTH)[0] == 400
+    assert request("GET", "/stores?criteria=colour=red", headers=AUTH)[0] == 400
+    assert request("GET", "/stores/open?day=someday&at=10:00", headers=AUTH)[0] == 400
+    assert request("POST", "/stores", json={**STORE, "tail_lift": "no"}, headers=AUTH)[0] == 400
+    assert request("DELETE", "/stores", headers=AUTH)[0] == 400
+
+def test_etag_gives_304(monkeypatch):
+    monkeypatch.setattr(api, "search_one", returning({"_id": 5, "n": "Depot"}))
+
+    async def conditional():
+        app = api.create_app()
+        app.on_startup.clear()
+        app.on_cleanup.clear()
+        async with TestClient(TestServer(app)) as client:
+            first = await client.get("/stores/5", headers=AUTH)
+            second = await client.get("/stores/5", headers={**AUTH, "If-None-Match": first.headers["ETag"]})
+            return first.status, second.status
+
+    assert asyncio.run(conditional()) == (200, 304)
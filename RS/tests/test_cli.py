@@ -0,0 +1,98 @@
+import json
+import asyncio
+import pytest
+import CLI.cli as cli
+from Database.InsertMany.insert_many import ImportReport
+
+@pytest.fixture
+def logged_in(monkeypatch):
+    async def connected():
+        return 1.0
+
+    async def no_status():
+        return False
+
+    monkeypatch.setattr(cli, "resume_session", lambda: "alice")
+    monkeypatch.setattr(cli, "connect_to_database", connected)
+    monkeypatch.setattr(cli, "disconnect_from_database", lambda: None)
+    monkeypatch.setattr(cli, "load_migration_status", no_status)
+
+def run(argv, capsys):
+    code = asyncio.run(cli.run_cli(argv))
+    output = capsys.readouterr().out
+    if argv[:2] == ["--format", "json"]:
+        return code, json.loads(output)
+    return code, [json.loads(line) for line in output.splitlines() if line.strip()]
+
+def test_not_logged_in_exits_2(monkeypatch, capsys):
+    monkeypatch.setattr(cli, "resume_session", lambda: None)
+    code, records = run(["search", "1"], capsys)
+    assert code == 2 and "Not logged in" in records[0]["error"]
+
+def test_unreachable_database_exits_1(logged_in, monkeypatch, capsys):
+    async def unreachable():
+        return None
+
+    monkeypatch.setattr(cli, "connect_to_database", unreachable)
+    code, records = run(["search", "1"], capsys)
+    assert code == 1 and "Could not connect" in records[0]["error"]
+
+def test_successful_delete_exits_0(logged_in, monkeypatch, capsys):
+    async def delete_by_ids(ids):
+        return len(ids)
+
+    monkeypatch.setattr(cli, "delete_documents_by_ids", delete_by_ids)
+    assert run(["delete", "--ids", "1,2,2"], capsys) == (0, [{"deleted": 2}])
+
+def test_delete_by_ids_database_error_exits_1(logged_in, monkeypatch, capsys):
+    from pymongo.errors import PyMongoError
+
+    async def delete_by_ids(ids):
+        raise PyMongoError("connection lost")
+
+    monkeypatch.setattr(cli, "delete_documents_by_ids", delete_by_ids)
+    code, records = run(["delete", "--ids", "1,2"], capsys)
+    assert code == 1 and "connection lost" in records[0]["error"]
+
+def test_search_database_error_exits_1(logged_in, monkeypatch, capsys):
+    from pymongo.errors import PyMongoError
+
+    async def failing_search(ids):
+        raise PyMongoError("connection lost")
+
+    monkeypatch.setattr(cli, "search_many", failing_search)
+    code, records = run(["search", "1"], capsys)
+    assert code == 1 and records == [{"error": "MongoDB error: connection lost"}]
+
+def test_modify_missing_store_exits_1(logged_in, monkeypatch, capsys):
+    async def not_found(document_id, restrictions):
+        return False
+
+    monkeypatch.setattr(cli, "modify_document", not_found)
+    code, records = run(["modify", "--id", "7", "--restriction", "Monday=9am - 5pm"], capsys)
+    assert code == 1 and "No store was modified" in records[0]["error"]
+
+def test_import_missing_file_and_invalid_rows_exit_1(logged_in, monkeypatch, capsys, tmp_path):
+    code, records = run(["import", str(tmp_path / "missing.csv")], capsys)
+    assert code == 1 and "No such file" in records[0]["error"]
+
+    async def partly_invalid(file_path, batch_size):
+        return ImportReport(inserted=[1], invalid=[(3, "Column 'ID' is missing or empty.")])
+
+    stores_file = tmp_path / "stores.csv"
+    stores_file.write_text("ID\n1\n\n")
+    monkeypatch.setattr(cli, "insert_documents", partly_invalid)
+    code, records = run(["import", str(stores_file)], capsys)
+    assert code == 1 and "invalid rows" in records[0]["error"]
+
+def test_batch_reports_each_line_and_fails_if_any_line_fails(logged_in, monkeypatch, capsys, tmp_path):
+    async def delete_by_ids(ids):
+        return len(ids)
+
+    monkeypatch.setattr(cli, "delete_documents_by_ids", delete_by_ids)
+    commands = tmp_path / "commands.txt"
+    commands.write_text("# nightly clean-up\ndelete --id 5\nfrobnicate\n")
+    code, results = run(["--format", "json", "batch", str(commands)], capsys)
+    assert code == 1
+    assert results[0] == {"line": 2, "command": "delete --id 5", "results": [{"deleted": 1}], "ok": True}
+    assert results[1]["line"] == 3 and not results[1]["ok"]
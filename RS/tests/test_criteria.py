@@ -0,0 +1,29 @@
+import pytest
+from Database.Delete.criteria import parse_criteria
+
+def test_compact_fields():
+    assert parse_criteria("tail_lift=true, postcode=AB*, km=0..50", legacy=False) == {
+        "tl": True,
+        "p": {"$regex": "^AB"},
+        "km": {"$gte": 0.0, "$lte": 50.0},
+    }
+
+def test_kilometer_comparisons_combine():
+    assert parse_criteria("km>=5, km<10", legacy=False) == {"km": {"$gte": 5.0, "$lt": 10.0}}
+
+def test_legacy_single_term():
+    assert parse_criteria("postcode=LS1 1AA", legacy=True) == {
+        "$or": [{"p": "LS1 1AA"}, {"Store Postcode": "LS1 1AA"}]
+    }
+
+def test_legacy_terms_match_text_tail_lift():
+    filter_query = parse_criteria("tail_lift=false, km<10", legacy=True)
+    assert filter_query == {"$and": [
+        {"$or": [{"tl": False}, {"Does the store require a tail lift? (True/False)": {"$in": [False, "False", "false"]}}]},
+        {"$or": [{"km": {"$lt": 10.0}}, {"Kilometers": {"$lt": 10.0}}]},
+    ]}
+
+@pytest.mark.parametrize("criteria", ["", "colour=red", "tail_lift=maybe", "postcode>AB", "km<ten"])
+def test_invalid_criteria(criteria):
+    with pytest.raises(ValueError):
+        parse_criteria(criteria, legacy=False)
@@ -0,0 +1,43 @@
+import pytest
+from Database.Model.hours import MINUTES_PER_DAY, MINUTES_PER_WEEK, day_windows, parse_hours, parse_time, week_ranges
+
+@pytest.mark.parametrize("text, expected", [
+    ("09:00 AM - 05:00 PM", [(540, 1020)]),
+    ("9-17", [(540, 1020)]),
+    ("9am - 5", [(540, 1020)]),
+    ("9 - 5pm", [(540, 1020)]),
+    ("9am - 11", [(540, 660)]),
+    ("10pm - 2", [(1320, 1560)]),
+    ("11 - 2am", [(1380, 1560)]),
+    ("22:00 - 06:00", [(1320, 1800)]),
+    ("13:00 - 17:00, 09:00 - 12:00", [(540, 720), (780, 1020)]),
+    ("Closed", []),
+    ("", []),
+    ("24 hours", [(0, MINUTES_PER_DAY)]),
+])
+def test_parse_hours(text, expected):
+    assert parse_hours(text) == expected
+
+@pytest.mark.parametrize("text", ["9-5", "12-5", "8 - 8", "whenever", "25:00 - 26:00", "13pm - 2pm", "24:00 - 02:00"])
+def test_parse_hours_rejects(text):
+    with pytest.raises(ValueError):
+        parse_hours(text)
+
+def test_parse_time():
+    assert parse_time("10:30") == 630
+    assert parse_time("12am") == 0
+    assert parse_time("12:15 PM") == 735
+    assert parse_time("24:00") == MINUTES_PER_DAY
+    with pytest.raises(ValueError):
+        parse_time("noon")
+
+def test_week_ranges_wraps_and_splits():
+    assert week_ranges(100, 200) == [(100, 200)]
+    assert week_ranges(MINUTES_PER_WEEK + 100, MINUTES_PER_WEEK + 200) == [(100, 200)]
+    assert week_ranges(MINUTES_PER_WEEK - 60, MINUTES_PER_WEEK + 60) == [(MINUTES_PER_WEEK - 60, MINUTES_PER_WEEK), (0, 60)]
+    assert week_ranges(0, MINUTES_PER_WEEK) == [(0, MINUTES_PER_WEEK)]
+
+def test_day_windows_splits_sunday_night_into_monday():
+    sunday = 6 * MINUTES_PER_DAY
+    assert day_windows(6, "22:00 - 02:00") == [(sunday + 1320, MINUTES_PER_WEEK), (0, 120)]
+    assert day_windows(0, "9am - 5pm") == [(540, 1020)]
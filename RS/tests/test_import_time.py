@@ -0,0 +1,16 @@
+import pytest
+from Benchmarks.import_time import LAZY_MODULES, budget_from_env, import_failures, measure_import_time
+
+@pytest.mark.parametrize("module", ["main", "CLI.cli", "API.api"])
+def test_entry_points_import_within_budget_without_heavy_dependencies(module):
+    elapsed_ms, packages, slowest = measure_import_time(module, runs=3)
+    assert not packages.intersection(LAZY_MODULES)
+    assert elapsed_ms <= budget_from_env(), f"slowest imports: {slowest}"
+
+def test_import_failures_reports_budget_and_eager_modules():
+    assert import_failures(10.0, {"asyncio", "dotenv"}, 100.0) == []
+    failures = import_failures(150.0, {"pandas", "pymongo", "asyncio"}, 100.0)
+    assert failures == [
+        "import time 150.0 ms exceeds the 100.0 ms budget",
+        "heavy dependencies imported at startup: pandas, pymongo",
+    ]
@@ -0,0 +1,29 @@
+import pytest
+from Database.Delete.criteria import parse_criteria
+from Database.Indexes.indexes import INDEXES, LEGACY_INDEXES, QUERY_SHAPES, _plan_stages
+
+SHAPES = {description: filter_query for _, _, description, filter_query in QUERY_SHAPES}
+
+@pytest.mark.parametrize("criteria, compact, legacy", [
+    ("postcode=AB*", "stores by postcode prefix", "stores by postcode prefix, compact or legacy"),
+    ("tail_lift=true", "stores requiring a tail lift", "stores requiring a tail lift, compact or legacy"),
+    ("km=0..50", "stores within a kilometers range", "stores within a kilometers range, compact or legacy"),
+    ("tail_lift=true, km<10", None, "stores requiring a tail lift within a kilometers range, compact or legacy"),
+])
+def test_query_shapes_match_the_criteria_filters(criteria, compact, legacy):
+    if compact is not None:
+        assert SHAPES[compact] == parse_criteria(criteria, legacy=False)
+    assert SHAPES[legacy] == parse_criteria(criteria, legacy=True)
+
+def test_every_criteria_field_is_indexed_in_both_layouts():
+    stores = [keys[0][0] for keys, _ in INDEXES[("StoreInformation", "Stores")]]
+    legacy = [keys[0][0] for keys, _ in LEGACY_INDEXES[("StoreInformation", "Stores")]]
+    for field in parse_criteria("tail_lift=true, postcode=AB*, km<10", legacy=False):
+        assert field in stores
+    for clause in parse_criteria("tail_lift=true, postcode=AB*, km<10", legacy=True)["$and"]:
+        assert all(next(iter(branch)) in stores + legacy for branch in clause["$or"])
+
+def test_plan_stages_flattens_or_plans():
+    plan = {"queryPlan": {"stage": "SUBPLAN", "inputStage": {"stage": "FETCH", "inputStage": {
+        "stage": "OR", "inputStages": [{"stage": "IXSCAN"}, {"stage": "COLLSCAN"}]}}}}
+    assert _plan_stages(plan) == ["SUBPLAN", "FETCH", "OR", "IXSCAN", "COLLSCAN"]
@@ -0,0 +1,58 @@
+import itertools
+import pytest
+from Scripting.ProductGrouping.classifier import ProductClassifier
+from Scripting.ProductGrouping.compatibility import GROUPING_BITS, LoadCompatibility, order_masks
+from Scripting.ProductGrouping.product_grouping import FRZ
+
+@pytest.fixture(scope="module")
+def classifier():
+    return ProductClassifier()
+
+@pytest.fixture(scope="module")
+def engine():
+    return LoadCompatibility()
+
+def test_mask_accepts_tags_instances_and_codes(engine):
+    assert engine.mask(["A", FRZ, 60]) == GROUPING_BITS["A"] | GROUPING_BITS["FRZ"]
+    with pytest.raises(ValueError):
+        engine.mask(["NOPE"])
+
+def test_feasible_and_minimal_cover(engine):
+    assert "AZ" in engine.feasible(["A", "FRZ"])
+    assert engine.minimal_cover(["A", "FRZ"]) == ["AZ"]
+    assert engine.minimal_cover(["A", "CH", "FRZ"]) == ["FL"]
+    assert engine.minimal_cover([]) == []
+
+def test_cover_table_is_minimal_for_every_order():
+    engine = LoadCompatibility(["AZ", "FBC", "CZ"])
+    masks = engine.masks.tolist()
+    for order in range(1 << len(GROUPING_BITS)):
+        best = None
+        for size in range(len(masks) + 1):
+            for subset in itertools.combinations(range(len(masks)), size):
+                union = 0
+                for position in subset:
+                    union |= masks[position]
+                if union & order == order:
+                    best = size
+                    break
+            if best is not None:
+                break
+        cover = int(engine.cover_table[order])
+        if best is None:
+            assert cover == -1
+        else:
+            union = 0
+            for position in range(len(masks)):
+                if cover >> position & 1:
+                    union |= masks[position]
+            assert union & order == order
+            assert bin(cover).count("1") == best
+
+def test_batch_lookups_match_single_lookups(engine, classifier):
+    stores, masks = order_masks([2, 1, 1, 2, 3], [10, 60, 10, 40, 99], classifier)
+    assert list(stores) == [1, 2, 3]
+    assert list(masks) == [engine.mask(["A", "FRZ"]), engine.mask(["A", "CH"]), 0]
+    covers = engine.cover_batch(masks)
+    assert [engine.cover_names(int(cover)) for cover in covers] == [engine.minimal_cover(["A", "FRZ"]), engine.minimal_cover(["A", "CH"]), []]
+    assert engine.feasible_batch(masks)[0].tolist() == [name in engine.feasible(["A", "FRZ"]) for name in engine.names]
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import pytest
+from Metrics.metrics import ROW_ERROR, OperationStats, instrument, metrics
+
+test_logger = logging.getLogger("test_metrics_logger")
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+def test_percentiles_come_from_the_histogram_buckets():
+    stats = OperationStats()
+    for seconds in [0.002] * 98 + [0.2, 3.0]:
+        stats.record(seconds)
+    assert stats.percentile(0.50) == 0.0025
+    assert stats.percentile(0.99) == 0.25
+    assert stats.percentile(1.0) == 3.0
+    assert stats.snapshot()["count"] == 100
+
+def test_instrument_counts_documents_and_errors():
+    @instrument("test_counted", test_logger, documents=len)
+    async def fetch(count):
+        return list(range(count))
+
+    @instrument("test_failing", test_logger)
+    async def fail():
+        raise RuntimeError("down")
+
+    asyncio.run(fetch(3))
+    asyncio.run(fetch(4))
+    with pytest.raises(RuntimeError):
+        asyncio.run(fail())
+
+    operations = metrics.snapshot()["operations"]
+    assert operations["test_counted"]["count"] == 2 and operations["test_counted"]["documents"] == 7
+    assert operations["test_failing"]["errors"] == 1 and operations["test_failing"]["documents"] == 0
+
+def test_logged_errors_fail_the_call_but_row_errors_do_not():
+    @instrument("test_logged", test_logger)
+    async def swallow():
+        test_logger.error("MongoDB error: down")
+
+    @instrument("test_rows", test_logger)
+    async def import_rows():
+        test_logger.error("Validation error on row 2", extra=ROW_ERROR)
+        test_logger.error("Validation error on row 5", extra=ROW_ERROR)
+
+    asyncio.run(swallow())
+    asyncio.run(import_rows())
+
+    operations = metrics.snapshot()["operations"]
+    assert operations["test_logged"]["errors"] == 1
+    assert operations["test_rows"]["errors"] == 0 and operations["test_rows"]["row_errors"] == 2
+
+def test_prometheus_buckets_are_cumulative():
+    metrics.record("test_prom", 0.002)
+    metrics.record("test_prom", 0.02, error=True, row_errors=3)
+    text = metrics.to_prometheus()
+    assert 'rs_operation_duration_seconds_bucket{operation="test_prom",le="0.0025"} 1' in text
+    assert 'rs_operation_duration_seconds_bucket{operation="test_prom",le="+Inf"} 2' in text
+    assert 'rs_operation_errors_total{operation="test_prom"} 1' in text
+    assert 'rs_operation_row_errors_total{operation="test_prom"} 3' in text
@@ -0,0 +1,23 @@
+import pytest
+from Scripting.ProductGrouping.classifier import ProductClassifier
+
+@pytest.fixture(scope="module")
+def classifier():
+    return ProductClassifier()
+
+def test_classify_known_and_unknown_codes(classifier):
+    result = classifier.classify([10, "60", 60.0, 99, "x", -1])
+    assert list(result["group"]) == ["A", "FRZ", "FRZ", None, None, None]
+    assert list(result["known"]) == [True, True, True, False, False, False]
+    assert result["temp_min"][1] == -28.0 and result["temp_max"][1] == -18.0
+    # Zones recorded warmest first are ordered
+    assert classifier.classify([40])["temp_min"][0] == -2.0
+
+def test_unknown_codes(classifier):
+    assert classifier.unknown_codes([10, 99, 99, 5]) == [99, 5]
+
+def test_classify_frame(classifier):
+    pd = pytest.importorskip("pandas")
+    frame = classifier.classify_frame(pd.DataFrame({"Product Group": [10, 70, 12]}))
+    assert frame["Group"].tolist()[:2] == ["A", "FV"] and frame["Group"].isna().tolist() == [False, False, True]
+    assert list(frame["Known Group"]) == [True, True, False]
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+import Database.SearchMany.search_many as search_many_module
+from Database.Cache.store_cache import StoreCache
+from Database.SearchMany.search_many import read_ids, search_many
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+
+    def find(self, filter_query, batch_size=None):
+        requested = filter_query["_id"]["$in"]
+        self.queries.append(requested)
+
+        async def cursor():
+            for store_id in requested:
+                if store_id in self.documents:
+                    yield dict(self.documents[store_id])
+        return cursor()
+
+@pytest.fixture
+def stores(monkeypatch):
+    collection = FakeCollection({1: {"_id": 1}, 2: {"_id": 2}})
+    monkeypatch.setattr(search_many_module, "get_client", lambda: {"StoreInformation": {"Stores": collection}})
+    monkeypatch.setattr(search_many_module, "store_cache", StoreCache(max_size=10, ttl_seconds=60))
+    return collection
+
+def test_read_ids_keeps_order_and_drops_duplicates(tmp_path):
+    assert read_ids("3, 1 2,3\n1") == [3, 1, 2]
+    id_file = tmp_path / "ids.txt"
+    id_file.write_text("7\n8\n7\n")
+    assert read_ids(str(id_file)) == [7, 8]
+
+def test_read_ids_names_the_bad_tokens():
+    with pytest.raises(ValueError, match="x1, 2.5"):
+        read_ids("1, x1, 2.5")
+
+def test_repeated_ids_are_fetched_and_reported_once(stores):
+    found, missing = asyncio.run(search_many([1, 9, "1", 9, "abc", "abc"], chunk_size=1))
+    assert list(found) == [1]
+    assert missing == ["abc", 9]
+    assert stores.queries == [[1], [9]]
+
+def test_cached_stores_are_not_fetched_again(stores):
+    asyncio.run(search_many([1, 2]))
+    found, missing = asyncio.run(search_many([2, 1]))
+    assert set(found) == {1, 2} and missing == []
+    assert stores.queries == [[1, 2]]
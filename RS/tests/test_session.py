@@ -0,0 +1,57 @@
+import os
+import stat
+import dataclasses
+import pytest
+import User.Passwords.passwords as passwords
+import User.Session.session as session
+from User.Passwords.passwords import check_password, hash_password, needs_rehash, password_rounds
+from User.Session.session import clear_token, issue_token, load_token, save_token, verify_token
+
+@pytest.fixture(autouse=True)
+def session_settings(monkeypatch):
+    monkeypatch.setattr(session, "settings", dataclasses.replace(session.settings, session_secret="test-secret", session_ttl=60))
+
+def test_token_round_trip():
+    assert verify_token(issue_token("alice")) == "alice"
+
+def test_tampered_and_malformed_tokens_are_rejected():
+    token = issue_token("alice")
+    payload, signature = token.split(".")
+    forged = issue_token("mallory").split(".")[0]
+    assert verify_token(f"{forged}.{signature}") is None
+    assert verify_token(payload) is None
+    assert verify_token("") is None
+    assert verify_token(None) is None
+
+def test_token_signed_with_another_secret_is_rejected(monkeypatch):
+    token = issue_token("alice")
+    monkeypatch.setattr(session, "settings", dataclasses.replace(session.settings, session_secret="other-secret"))
+    assert verify_token(token) is None
+
+def test_expired_token_is_rejected(monkeypatch):
+    token = issue_token("alice", ttl=5)
+    now = session.time.time()
+    monkeypatch.setattr(session.time, "time", lambda: now + 10)
+    assert verify_token(token) is None
+
+def test_token_file_is_private_and_can_be_cleared(tmp_path):
+    file_path = str(tmp_path / "session")
+    assert load_token(file_path) is None
+    save_token("abc.def", file_path)
+    assert load_token(file_path) == "abc.def"
+    if os.name == "posix":
+        assert stat.S_IMODE(os.stat(file_path).st_mode) == 0o600
+    clear_token(file_path)
+    clear_token(file_path)
+    assert load_token(file_path) is None
+
+def test_hashes_below_the_work_factor_need_a_rehash(monkeypatch):
+    pytest.importorskip("bcrypt")
+    monkeypatch.setattr(passwords, "settings", dataclasses.replace(passwords.settings, bcrypt_rounds=5))
+    weak = hash_password("secret", rounds=4)
+    assert password_rounds(weak) == 4 and needs_rehash(weak)
+    strong = hash_password("secret")
+    assert password_rounds(strong) == 5 and not needs_rehash(strong)
+    assert check_password("secret", weak) and not check_password("wrong", weak)
+    assert not check_password("secret", "not a hash")
+    assert password_rounds("not a hash") == 0
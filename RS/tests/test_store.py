@@ -0,0 +1,44 @@
+import pytest
+from Database.Model.store import LEGACY_FIELDS, Store, decode_restrictions, encode_restrictions
+
+LEGACY_DOCUMENT = {
+    "_id": 7,
+    "Store name": "Leeds",
+    "Store Address": "1 High Street",
+    "Store Postcode": "LS1 1AA",
+    "Kilometers": "12.5",
+    "Does the store require a tail lift? (True/False)": "True",
+    "Store Restrictions": {"Monday": "09:00 AM - 05:00 PM", "Tuesday": ""},
+}
+
+def test_compact_round_trip():
+    store = Store(7, "Leeds", "1 High Street", "LS1 1AA", 12.5, True,
+                  {"Monday": "09:00 AM - 05:00 PM", "Sunday": "22:00 - 02:00"}, "hash")
+    document = store.to_document()
+    assert document["r"] == {"mo": "09:00 AM - 05:00 PM", "su": "22:00 - 02:00"}
+    assert document["w"][0] == {"d": "mo", "s": 540, "e": 1020}
+    assert Store.from_document(document) == store
+
+def test_legacy_document_decodes_and_re_encodes_compact():
+    store = Store.from_document(LEGACY_DOCUMENT)
+    assert store == Store(7, "Leeds", "1 High Street", "LS1 1AA", 12.5, True, {"Monday": "09:00 AM - 05:00 PM"})
+    document = store.to_document()
+    assert not set(document) & set(LEGACY_FIELDS.values())
+    assert Store.from_document(document) == store
+
+def test_compact_days_win_over_legacy_days():
+    store = Store.from_document({**LEGACY_DOCUMENT, "r": {"mo": "10:00 - 12:00", "fr": "Closed"}})
+    assert store.restrictions == {"Monday": "10:00 - 12:00", "Friday": "Closed"}
+
+def test_bad_legacy_values_read_as_none():
+    store = Store.from_document({"_id": 1, "Kilometers": "N/A", "Does the store require a tail lift? (True/False)": "maybe"})
+    assert store.kilometers is None and store.tail_lift is None
+
+def test_bad_legacy_values_raise_when_strict():
+    with pytest.raises(ValueError):
+        Store.from_document({"_id": 1, "Kilometers": "N/A"}, strict=True)
+
+def test_restrictions_encoding_drops_empty_days():
+    encoded = encode_restrictions({"Monday": " 9-17 ", "Tuesday": None, "Wednesday": ""})
+    assert encoded == {"mo": "9-17"}
+    assert decode_restrictions(encoded) == {"Monday": "9-17"}
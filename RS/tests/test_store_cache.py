@@ -0,0 +1,55 @@
+from Database.Cache.store_cache import StoreCache
+
+def test_get_returns_a_copy_and_counts_hits():
+    cache = StoreCache(max_size=10, ttl_seconds=60)
+    assert cache.get(1) is None
+    cache.put("1", {"_id": 1, "r": {"mo": "9-17"}})
+    document = cache.get(1)
+    document["r"]["mo"] = "changed"
+    assert cache.get(1) == {"_id": 1, "r": {"mo": "9-17"}}
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("Database.Cache.store_cache.time.monotonic", lambda: now[0])
+    cache = StoreCache(max_size=10, ttl_seconds=5)
+    cache.put(1, {"_id": 1})
+    now[0] += 4
+    assert cache.get(1) == {"_id": 1}
+    now[0] += 2
+    assert cache.get(1) is None
+    assert cache.stats()["size"] == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = StoreCache(max_size=2, ttl_seconds=60)
+    cache.put(1, {"_id": 1})
+    cache.put(2, {"_id": 2})
+    cache.get(1)
+    cache.put(3, {"_id": 3})
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+    assert cache.evictions == 1
+
+def test_put_from_a_read_older_than_an_invalidation_is_skipped():
+    cache = StoreCache(max_size=10, ttl_seconds=60)
+    generation = cache.generation()
+    cache.invalidate(1)
+    cache.put(1, {"_id": 1, "n": "before the write"}, generation)
+    assert cache.get(1) is None
+    assert cache.stale_puts == 1
+
+    cache.put(1, {"_id": 1}, cache.generation())
+    assert cache.get(1) == {"_id": 1}
+
+def test_invalidate_clear_and_disable():
+    cache = StoreCache(max_size=10, ttl_seconds=60)
+    cache.put(1, {"_id": 1})
+    cache.put(2, {"_id": 2})
+    cache.invalidate("1")
+    assert cache.get(1) is None and cache.get(2) is not None
+    cache.clear()
+    assert cache.get(2) is None
+
+    cache.disable()
+    cache.put(3, {"_id": 3})
+    assert cache.get(3) is None and cache.stats()["size"] == 0
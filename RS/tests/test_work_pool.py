@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from WorkPool.work_pool import WorkPool
+
+def test_results_keep_input_order_and_concurrency_is_bounded():
+    in_flight = 0
+    peak = 0
+
+    async def square(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001 * (5 - item % 5))
+        in_flight -= 1
+        return item * item
+
+    progress = []
+    pool = WorkPool(3, progress=lambda completed, total: progress.append((completed, total)))
+    assert asyncio.run(pool.map(square, list(range(20)))) == [item * item for item in range(20)]
+    assert peak == 3
+    assert pool.completed == 20 and pool.failed == 0
+    assert progress[-1] == (20, 20)
+
+def test_async_iterator_input():
+    async def items():
+        for item in range(5):
+            yield item
+
+    async def double(item):
+        return item * 2
+
+    assert asyncio.run(WorkPool(2).map(double, items())) == [0, 2, 4, 6, 8]
+
+def test_return_exceptions_keeps_going():
+    async def check(item):
+        if item == 2:
+            raise ValueError("bad item")
+        return item
+
+    pool = WorkPool(2, return_exceptions=True)
+    results = asyncio.run(pool.map(check, [0, 1, 2, 3]))
+    assert results[:2] == [0, 1] and isinstance(results[2], ValueError) and results[3] == 3
+    assert pool.failed == 1
+
+def test_first_error_cancels_and_awaits_the_rest():
+    finished_cleanup = []
+
+    async def work(item):
+        try:
+            if item == 0:
+                await asyncio.sleep(0.01)
+                raise RuntimeError("boom")
+            await asyncio.sleep(10)
+        finally:
+            # Cleanup that needs the loop, like closing a cursor
+            await asyncio.sleep(0)
+            finished_cleanup.append(item)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(WorkPool(4).map(work, range(4)))
+    assert sorted(finished_cleanup) == [0, 1, 2, 3]
+
+def test_cancelled_caller_waits_for_operations_to_unwind():
+    finished_cleanup = []
+
+    async def work(item):
+        try:
+            await asyncio.sleep(10)
+        finally:
+            await asyncio.sleep(0)
+            finished_cleanup.append(item)
+
+    async def main():
+        task = asyncio.create_task(WorkPool(3).map(work, range(3)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Every operation has unwound by the time the caller sees the cancellation
+        assert sorted(finished_cleanup) == [0, 1, 2]
+
+    asyncio.run(main())